@@ -13,19 +13,33 @@ Example: python scripts/update-version.py 8.1.1   # patch current
 Example: python scripts/update-version.py 7.6.7   # patch versioned
 Example: python scripts/update-version.py 8.2.0   # minor beta (from production) or minor production (from beta)
 
+Every update is planned first: files are read at most once and all edits,
+renames, removals and commands are collected in a ChangeSet. The change set
+is then applied in one phase that is rolled back if any step fails, so a
+failed bump leaves the tree as it was. With --dry-run, the change set is
+printed (including a diff of every edited file) and nothing is changed.
+
+Versioned-docs patches find cross-references through an index of version
+references kept in scripts/.cache and refreshed by file mtime and content hash.
+
 Note: the docs search widget derives its version-routing map from the same
 `docsVersions` / `current.label` in docusaurus.config.ts that this script edits
 (see buildVersionTagByMajor + customFields.versionTagByMajor). Version bumps
 therefore flow into search automatically - no separate update is needed here.
 """
 
+import difflib
+import hashlib
 import json
+import os
 import re
 import shutil
+import stat
 import subprocess
 import sys
+import tempfile
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
 
 # ---------------------------------------------------------------------------
@@ -73,26 +87,151 @@ class Version:
         return (self.major, self.minor)
 
 
+# ---------------------------------------------------------------------------
+# Change set
+# ---------------------------------------------------------------------------
+
+class ChangeSet:
+    """Planned changes to the docs tree, applied all at once.
+
+    Files are read through the change set, once each; later reads see the
+    edits already planned. apply() runs commands, writes edited files,
+    renames and removes paths in that order, and undoes every completed
+    step in reverse if one of them fails."""
+
+    def __init__(self):
+        self.originals: dict[Path, bytes] = {}
+        self.contents: dict[Path, str] = {}
+        self.commands: list[tuple[list[str], list[Path], list[Path]]] = []
+        self.renames: list[tuple[Path, Path]] = []
+        self.removals: list[Path] = []
+        self.on_commit: list[Callable[[], None]] = []
+
+    def read(self, path: Path) -> str:
+        if path not in self.contents:
+            self.originals[path] = path.read_bytes()
+            self.contents[path] = self.originals[path].decode('utf-8')
+        return self.contents[path]
+
+    def write(self, path: Path, content: str) -> None:
+        self.read(path)
+        self.contents[path] = content
+
+    def run(self, command: list[str], creates: list[Path], modifies: list[Path]) -> None:
+        """Plan *command*, which creates the paths in *creates* and edits
+        the files in *modifies*; rollback removes and restores those."""
+        self.commands.append((command, creates, modifies))
+
+    def rename(self, old_path: Path, new_path: Path) -> None:
+        self.renames.append((old_path, new_path))
+
+    def remove(self, path: Path) -> None:
+        self.removals.append(path)
+
+    def edited(self) -> list[Path]:
+        return [
+            path for path, content in self.contents.items()
+            if content.encode('utf-8') != self.originals[path]
+        ]
+
+    def describe(self) -> None:
+        for command, _, _ in self.commands:
+            print(f"  Would run: {' '.join(command)}")
+        for old_path, new_path in self.renames:
+            print(f"  Would rename {old_path} → {new_path}")
+        for path in self.removals:
+            print(f"  Would remove {path}")
+        edited = self.edited()
+        for path in edited:
+            diff = difflib.unified_diff(
+                self.originals[path].decode('utf-8').splitlines(),
+                self.contents[path].splitlines(),
+                f"a/{path.as_posix()}",
+                f"b/{path.as_posix()}",
+                n=0,
+                lineterm='',
+            )
+            for line in diff:
+                print(f"    {line}")
+        print(f"  Would update {len(edited)} files")
+
+    def apply(self) -> None:
+        undo: list[Callable[[], None]] = []
+        removed: list[Path] = []
+        try:
+            for command, creates, modifies in self.commands:
+                # Only what the command itself creates is removed on rollback.
+                created = [path for path in creates if not path.exists()]
+                snapshots = {path: path.read_bytes() for path in modifies if path.exists()}
+                undo.append(lambda created=created, snapshots=snapshots: _undo_command(created, snapshots))
+                print(f"  Running {' '.join(command)}")
+                subprocess.run(command, check=True)
+            edited = self.edited()
+            if edited:
+                print(f"  Writing {len(edited)} files")
+            for path in edited:
+                write_atomic(path, self.contents[path].encode('utf-8'))
+                undo.append(lambda path=path: write_atomic(path, self.originals[path]))
+            for old_path, new_path in self.renames:
+                print(f"  Renaming {old_path} → {new_path}")
+                old_path.rename(new_path)
+                undo.append(lambda old_path=old_path, new_path=new_path: new_path.rename(old_path))
+            for path in self.removals:
+                # Moved aside first, and deleted only once every step succeeded.
+                print(f"  Removing {path}")
+                aside = path.with_name(f".{path.name}.removed-{os.getpid()}")
+                path.rename(aside)
+                undo.append(lambda path=path, aside=aside: aside.rename(path))
+                removed.append(aside)
+        except BaseException:
+            print("  Rolling back...")
+            failed = 0
+            for step in reversed(undo):
+                try:
+                    step()
+                except Exception as e:
+                    failed += 1
+                    print(f"  Rollback step failed: {e}")
+            if failed:
+                print(f"  {failed} rollback steps failed; check the working tree with `git status`.")
+            raise
+        for aside in removed:
+            _remove_path(aside)
+        for callback in self.on_commit:
+            callback()
+
+
+def _remove_path(path: Path) -> None:
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
+
+
+def _undo_command(created: list[Path], snapshots: dict[Path, bytes]) -> None:
+    for path in created:
+        _remove_path(path)
+    for path, data in snapshots.items():
+        write_atomic(path, data)
+
+
 # ---------------------------------------------------------------------------
 # Config readers
 # ---------------------------------------------------------------------------
 
-def extract_current_version(config_path: Path) -> str:
-    content = config_path.read_text()
+def extract_current_version(content: str) -> str:
     match = re.search(r'current:\s*\{[^}]*label:\s*"([^"]+)"', content, re.DOTALL)
     if not match:
         raise ValueError("Could not extract current version from docusaurus.config.ts")
     return match.group(1)
 
 
-def extract_current_banner(config_path: Path) -> str:
-    content = config_path.read_text()
+def extract_current_banner(content: str) -> str:
     match = re.search(r'current:\s*\{[^}]*banner:\s*"([^"]+)"', content, re.DOTALL)
     return match.group(1) if match else 'none'
 
 
-def extract_last_version(config_path: Path) -> str:
-    content = config_path.read_text()
+def extract_last_version(content: str) -> str:
     line_match = re.search(r'lastVersion:[^\n]*', content)
     if not line_match:
         raise ValueError("Could not extract lastVersion from docusaurus.config.ts")
@@ -107,18 +246,19 @@ def extract_last_version(config_path: Path) -> str:
     return version
 
 
-def extract_versioned_versions(versions_json_path: Path) -> list[str]:
+def extract_versioned_versions(changes: ChangeSet, versions_json_path: Path) -> list[str]:
     if not versions_json_path.exists():
         return []
-    return json.loads(versions_json_path.read_text())
+    return json.loads(changes.read(versions_json_path))
 
 
-def build_version_registry(config_path: Path, versions_json_path: Path) -> dict:
-    current_str = extract_current_version(config_path)
-    versioned_strs = extract_versioned_versions(versions_json_path)
+def build_version_registry(changes: ChangeSet, config_path: Path, versions_json_path: Path) -> dict:
+    config = changes.read(config_path)
+    current_str = extract_current_version(config)
+    versioned_strs = extract_versioned_versions(changes, versions_json_path)
     return {
         'current': Version(current_str),
-        'current_banner': extract_current_banner(config_path),
+        'current_banner': extract_current_banner(config),
         'versioned': [Version(v) for v in versioned_strs],
     }
 
@@ -187,139 +327,283 @@ def validate_patch_version(current: str, new: str) -> None:
         raise ValueError(f"Patch version must be higher than existing: {new} <= {current}")
 
 
-def update_current_version_label(config_path: Path, new_version: str) -> None:
-    content = config_path.read_text()
+def update_current_version_label(changes: ChangeSet, config_path: Path, new_version: str) -> None:
+    content = changes.read(config_path)
     content = re.sub(
         r'(current:\s*\{[^}]*label:\s*")[^"]+"',
         rf'\g<1>{new_version}"',
         content,
         flags=re.DOTALL,
     )
-    config_path.write_text(content)
+    changes.write(config_path, content)
 
 
-def rename_directory(old_path: Path, new_path: Path) -> None:
+def rename_directory(changes: ChangeSet, old_path: Path, new_path: Path) -> None:
     if not old_path.exists():
         raise FileNotFoundError(f"Directory not found: {old_path}")
     if not old_path.is_dir():
         raise ValueError(f"Not a directory: {old_path}")
     if new_path.exists():
         raise FileExistsError(f"Target directory already exists: {new_path}")
-    old_path.rename(new_path)
+    changes.rename(old_path, new_path)
 
 
-def rename_file(old_path: Path, new_path: Path) -> None:
+def rename_file(changes: ChangeSet, old_path: Path, new_path: Path) -> None:
     if not old_path.exists():
         raise FileNotFoundError(f"File not found: {old_path}")
     if not old_path.is_file():
         raise ValueError(f"Not a file: {old_path}")
     if new_path.exists():
         raise FileExistsError(f"Target file already exists: {new_path}")
-    old_path.rename(new_path)
+    changes.rename(old_path, new_path)
 
 
-def update_versions_json(old_version: str, new_version: str) -> None:
+def update_versions_json(changes: ChangeSet, old_version: str, new_version: str) -> None:
     versions_file = Path("versions.json")
-    versions = json.loads(versions_file.read_text())
+    versions = json.loads(changes.read(versions_file))
     if old_version in versions:
         idx = versions.index(old_version)
         versions[idx] = new_version
-    versions_file.write_text(json.dumps(versions, indent=2) + "\n")
+    changes.write(versions_file, json.dumps(versions, indent=2) + "\n")
 
 
-def update_config_version_entry(config_path: Path, old_version: str, new_version: str) -> None:
-    content = config_path.read_text()
+def update_config_version_entry(changes: ChangeSet, config_path: Path, old_version: str, new_version: str) -> None:
+    content = changes.read(config_path)
     content = re.sub(rf'"{re.escape(old_version)}":', f'"{new_version}":', content)
     content = re.sub(
         rf'(lastVersion:\s*(?:isPreviewBuild\s*\?\s*["\']current["\']\s*:\s*)?)["\']{re.escape(old_version)}["\']',
         rf'\g<1>"{new_version}"',
         content,
     )
-    config_path.write_text(content)
+    changes.write(config_path, content)
+
+
+# Release-note headings ("## 8.1.0") name the release they describe and are
+# never rewritten.
+_RELEASE_HEADING = r'^[^\S\n]*##[^\S\n]+\d+\.\d+\.\d+.*$'
+
+CROSS_REFERENCE_PATTERNS = [
+    "docs/**/release-notes.md",
+    "docs/partials/*.mdx",
+    "src/components/HomePage/data/frameworkCardsArr.tsx",
+    "src/components/**/*.tsx",
+    "src/theme/**/*.js",
+    "src/utils/**/*.js",
+    "versioned_docs/**/*.md",
+    "versioned_docs/**/*.mdx",
+]
+
+
+def cross_reference_pattern(old_version: str) -> re.Pattern:
+    """One pattern for every rewritten form of *old_version*: URL segments
+    (/8.1.0/), versioned doc ids (version-8.1.0) and the bare version not
+    embedded in a longer one. Release-note heading lines match as a whole
+    so that they can be kept as they are."""
+    old = re.escape(old_version)
+    return re.compile(
+        rf'(?P<heading>{_RELEASE_HEADING})|/{old}/|version-{old}|(?<![.\d]){old}(?![.\d])',
+        re.MULTILINE,
+    )
 
 
-def update_file_cross_references(file_path: Path, old_version: str, new_version: str) -> int:
-    content = file_path.read_text()
-    lines = content.split('\n')
-    updated_lines = []
-    changes = 0
+def rewrite_cross_references(content: str, old_version: str, new_version: str) -> tuple[str, int]:
+    """Rewrite *content* in one pass. Returns (new_content, changed_lines)."""
+    changed_lines: set[int] = set()
 
-    for line in lines:
-        original_line = line
-        if not re.match(r'^\s*##\s+\d+\.\d+\.\d+', line):
-            line = line.replace(f'/{old_version}/', f'/{new_version}/')
-            line = line.replace(f'version-{old_version}', f'version-{new_version}')
-            line = re.sub(
-                rf'(?<![.\d]){re.escape(old_version)}(?![.\d])',
-                new_version,
-                line,
-            )
-        if line != original_line:
-            changes += 1
-        updated_lines.append(line)
+    def replace(match: re.Match) -> str:
+        if match.group('heading') is not None:
+            return match.group(0)
+        changed_lines.add(content.rfind('\n', 0, match.start()))
+        return match.group(0).replace(old_version, new_version)
+
+    content = cross_reference_pattern(old_version).sub(replace, content)
+    return content, len(changed_lines)
 
-    if changes > 0:
-        file_path.write_text('\n'.join(updated_lines))
+
+def write_atomic(file_path: Path, data: bytes) -> None:
+    """Replace *file_path* with *data* in one rename, keeping its permissions."""
+    mode = stat.S_IMODE(file_path.stat().st_mode) if file_path.exists() else 0o644
+    fd, tmp_name = tempfile.mkstemp(dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(data)
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, file_path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def cross_reference_changes(
+    content: str, old_version: str, new_version: str, lines: list[int]
+) -> list[tuple[int, str, str]]:
+    """The (line, old_text, new_text) rewrites of the given 0-based *lines*
+    of *content*, leaving out lines that stay the same."""
+    content_lines = content.split('\n')
+    changes = []
+    for line in lines:
+        old_text = content_lines[line]
+        new_text, _ = rewrite_cross_references(old_text, old_version, new_version)
+        if new_text != old_text:
+            changes.append((line, old_text, new_text))
     return changes
 
 
-def update_cross_references(old_version: str, new_version: str) -> None:
-    total_changes = 0
-    files_changed = 0
-    patterns = [
-        "docs/**/release-notes.md",
-        "docs/partials/*.mdx",
-        "src/components/HomePage/data/frameworkCardsArr.tsx",
-        "src/components/**/*.tsx",
-        "src/theme/**/*.js",
-        "src/utils/**/*.js",
-        "versioned_docs/**/*.md",
-        "versioned_docs/**/*.mdx",
-    ]
-    processed_files: set[Path] = set()
-    for pattern in patterns:
-        for file_path in Path(".").glob(pattern):
-            if file_path in processed_files:
-                continue
-            processed_files.add(file_path)
-            changes = update_file_cross_references(file_path, old_version, new_version)
-            if changes > 0:
-                total_changes += changes
-                files_changed += 1
+def update_file_cross_references(
+    changes: ChangeSet, file_path: Path, old_version: str, new_version: str, lines: list[int]
+) -> int:
+    content = changes.read(file_path)
+    rewrites = cross_reference_changes(content, old_version, new_version, lines)
+    if rewrites:
+        content_lines = content.split('\n')
+        for line, _, new_text in rewrites:
+            content_lines[line] = new_text
+        changes.write(file_path, '\n'.join(content_lines))
+    return len(rewrites)
 
-    if files_changed > 0:
-        print(f"  Updated {total_changes} references in {files_changed} files")
 
+def update_cross_references(changes: ChangeSet, old_version: str, new_version: str, index: dict) -> tuple[int, int]:
+    """Plan the cross-reference rewrites. Returns (references, files)."""
+    total_changes = 0
+    files_changed = 0
+    for file_path, lines in indexed_reference_lines(index, old_version).items():
+        file_changes = update_file_cross_references(changes, file_path, old_version, new_version, lines)
+        if file_changes > 0:
+            total_changes += file_changes
+            files_changed += 1
+    return total_changes, files_changed
 
-def update_versioned_docs(old_version: str, new_version: str) -> None:
-    print(f"Updating versioned docs from {old_version} to {new_version}...")
 
+def update_versioned_docs(changes: ChangeSet, old_version: str, new_version: str) -> tuple[int, int]:
+    """Plan a versioned-docs patch. Returns the (references, files) counts
+    of the cross-reference rewrites."""
     old_docs_dir = Path(f"versioned_docs/version-{old_version}")
     new_docs_dir = Path(f"versioned_docs/version-{new_version}")
-    print(f"  Renaming {old_docs_dir} → {new_docs_dir}")
-    rename_directory(old_docs_dir, new_docs_dir)
-
     old_sidebar = Path(f"versioned_sidebars/version-{old_version}-sidebars.json")
     new_sidebar = Path(f"versioned_sidebars/version-{new_version}-sidebars.json")
-    print(f"  Renaming {old_sidebar.name} → {new_sidebar.name}")
-    rename_file(old_sidebar, new_sidebar)
 
-    print("  Updating versions.json")
-    update_versions_json(old_version, new_version)
+    index = load_version_index()
+    refresh_version_index(index)
+    save_version_index(index)
+    # Edits are written before renames, so files are planned at their current paths.
+    counts = update_cross_references(changes, old_version, new_version, index)
+    update_versions_json(changes, old_version, new_version)
+    update_config_version_entry(changes, Path("docusaurus.config.ts"), old_version, new_version)
+    rename_directory(changes, old_docs_dir, new_docs_dir)
+    rename_file(changes, old_sidebar, new_sidebar)
 
-    print("  Updating docusaurus.config.ts")
-    update_config_version_entry(Path("docusaurus.config.ts"), old_version, new_version)
+    def reindex() -> None:
+        rename_indexed_paths(index, old_docs_dir, new_docs_dir)
+        refresh_version_index(index)
+        save_version_index(index)
 
-    print("  Updating cross-references...")
-    update_cross_references(old_version, new_version)
+    changes.on_commit.append(reindex)
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# Version reference index
+# ---------------------------------------------------------------------------
+
+# Where each version occurs in the files matched by CROSS_REFERENCE_PATTERNS.
+# Kept between runs, so a bump only reads the files that changed since the
+# last run, plus the lines that reference the old version.
+VERSION_INDEX_PATH = Path("scripts/.cache/version-references.json")
+
+# Bump whenever the index layout or _VERSION_TOKEN changes.
+_VERSION_INDEX_FORMAT = 1
+
+# A version at a digit boundary. Every rewritten form of a version starts at
+# such a boundary, so its lines are indexed under a token beginning with the
+# version's X.Y.Z (a longer token such as 8.1.10 for 8.1.1 included).
+_VERSION_TOKEN = re.compile(rb'(?<!\d)\d+\.\d+\.\d+')
+
+
+def scan_version_references(data: bytes) -> dict[str, list[int]]:
+    """Map each version token in *data* to the 0-based lines it occurs on."""
+    references: dict[str, list[int]] = {}
+    line = 0
+    position = 0
+    for match in _VERSION_TOKEN.finditer(data):
+        line += data.count(b'\n', position, match.start())
+        position = match.start()
+        token_lines = references.setdefault(match.group(0).decode(), [])
+        if not token_lines or token_lines[-1] != line:
+            token_lines.append(line)
+    return references
+
+
+def load_version_index() -> dict:
+    try:
+        index = json.loads(VERSION_INDEX_PATH.read_text())
+        if index.get('format') == _VERSION_INDEX_FORMAT and index.get('patterns') == CROSS_REFERENCE_PATTERNS:
+            return index
+    except (FileNotFoundError, ValueError):
+        pass
+    return {'format': _VERSION_INDEX_FORMAT, 'patterns': CROSS_REFERENCE_PATTERNS, 'files': {}}
+
+
+def save_version_index(index: dict) -> None:
+    VERSION_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(VERSION_INDEX_PATH, json.dumps(index, separators=(',', ':')).encode())
+
+
+def refresh_version_index(index: dict) -> None:
+    """Bring *index* up to date with the files matched by
+    CROSS_REFERENCE_PATTERNS. A file is read again only when its mtime or
+    size changed, and rescanned only when its content hash changed too."""
+    files = index['files']
+    fresh: dict[str, dict] = {}
+    for pattern in CROSS_REFERENCE_PATTERNS:
+        for file_path in Path(".").glob(pattern):
+            key = file_path.as_posix()
+            if key in fresh:
+                continue
+            st = file_path.stat()
+            entry = files.get(key)
+            if entry is None or entry['mtime_ns'] != st.st_mtime_ns or entry['size'] != st.st_size:
+                data = file_path.read_bytes()
+                digest = hashlib.sha256(data).hexdigest()
+                if entry is None or entry['sha256'] != digest:
+                    entry = {'sha256': digest, 'references': scan_version_references(data)}
+                entry = {**entry, 'mtime_ns': st.st_mtime_ns, 'size': st.st_size}
+            fresh[key] = entry
+    index['files'] = fresh
+
+
+def rename_indexed_paths(index: dict, old_dir: Path, new_dir: Path) -> None:
+    """Move the entries of files under *old_dir* to *new_dir* once the
+    directory itself has been renamed, so that they are not rescanned."""
+    old_prefix = old_dir.as_posix() + '/'
+    new_prefix = new_dir.as_posix() + '/'
+    index['files'] = {
+        (new_prefix + key[len(old_prefix):] if key.startswith(old_prefix) else key): entry
+        for key, entry in index['files'].items()
+    }
+
+
+def indexed_reference_lines(index: dict, old_version: str) -> dict[Path, list[int]]:
+    """The 0-based lines of each indexed file that may reference *old_version*."""
+    core = re.match(r'\d+\.\d+\.\d+', old_version).group(0)
+    candidates: dict[Path, list[int]] = {}
+    for key, entry in index['files'].items():
+        lines = {
+            line
+            for token, token_lines in entry['references'].items()
+            if token.startswith(core)
+            for line in token_lines
+        }
+        if lines:
+            candidates[Path(key)] = sorted(lines)
+    return candidates
 
 
 # ---------------------------------------------------------------------------
 # Minor beta helpers
 # ---------------------------------------------------------------------------
 
-def update_config_for_minor_beta(config_path: Path, current_version: str, new_version: str) -> None:
-    content = config_path.read_text()
+def update_config_for_minor_beta(changes: ChangeSet, config_path: Path, current_version: str, new_version: str) -> None:
+    content = changes.read(config_path)
 
     content = re.sub(
         r'(lastVersion:\s*(?:isPreviewBuild\s*\?\s*["\']current["\']\s*:\s*)?)["\']current["\']',
@@ -350,32 +634,49 @@ def update_config_for_minor_beta(config_path: Path, current_version: str, new_ve
     )
     content = re.sub(r"(current:\s*\{[^}]*\},)", rf"\g<1>{new_version_section}", content, flags=re.DOTALL)
 
-    config_path.write_text(content)
+    changes.write(config_path, content)
+
+
+def snapshot_current_docs(changes: ChangeSet, current_version: str) -> None:
+    """Plan `docusaurus docs:version`, which copies the current docs to
+    versioned_docs and adds the version to versions.json."""
+    creates = [
+        Path(f"versioned_docs/version-{current_version}"),
+        Path(f"versioned_sidebars/version-{current_version}-sidebars.json"),
+    ]
+    for path in creates:
+        if path.exists():
+            raise ValueError(f"{path} already exists; remove it before snapshotting {current_version}")
+    changes.run(
+        ["npm", "run", "docusaurus", "docs:version", current_version],
+        creates=creates,
+        modifies=[Path("versions.json")],
+    )
 
 
 # ---------------------------------------------------------------------------
 # Minor production helpers
 # ---------------------------------------------------------------------------
 
-def remove_from_versions_json(version: str) -> None:
+def remove_from_versions_json(changes: ChangeSet, version: str) -> None:
     versions_file = Path("versions.json")
-    versions = json.loads(versions_file.read_text())
+    versions = json.loads(changes.read(versions_file))
     if version in versions:
         versions.remove(version)
-    versions_file.write_text(json.dumps(versions, indent=2) + "\n")
+    changes.write(versions_file, json.dumps(versions, indent=2) + "\n")
 
 
-def delete_versioned_files(version: str) -> None:
+def delete_versioned_files(changes: ChangeSet, version: str) -> None:
     versioned_docs = Path(f"versioned_docs/version-{version}")
     versioned_sidebar = Path(f"versioned_sidebars/version-{version}-sidebars.json")
     if versioned_docs.exists():
-        shutil.rmtree(versioned_docs)
+        changes.remove(versioned_docs)
     if versioned_sidebar.exists():
-        versioned_sidebar.unlink()
+        changes.remove(versioned_sidebar)
 
 
-def update_config_for_minor_production(config_path: Path, version: str) -> None:
-    content = config_path.read_text()
+def update_config_for_minor_production(changes: ChangeSet, config_path: Path, version: str) -> None:
+    content = changes.read(config_path)
 
     content = re.sub(
         r'(lastVersion:\s*(?:isPreviewBuild\s*\?\s*["\']current["\']\s*:\s*)?)["\'][^"\']+["\']',
@@ -396,7 +697,7 @@ def update_config_for_minor_production(config_path: Path, version: str) -> None:
         content,
     )
 
-    config_path.write_text(content)
+    changes.write(config_path, content)
 
 
 # ---------------------------------------------------------------------------
@@ -404,15 +705,19 @@ def update_config_for_minor_production(config_path: Path, version: str) -> None:
 # ---------------------------------------------------------------------------
 
 def main() -> int:
-    if len(sys.argv) != 2:
-        print("Usage: python scripts/update-version.py <new-version>")
+    args = sys.argv[1:]
+    dry_run = '--dry-run' in args
+    args = [arg for arg in args if arg != '--dry-run']
+    if len(args) != 1:
+        print("Usage: python scripts/update-version.py [--dry-run] <new-version>")
         print("Examples:")
         print("  python scripts/update-version.py 8.1.1   # patch current version")
         print("  python scripts/update-version.py 7.6.7   # patch versioned docs")
         print("  python scripts/update-version.py 8.2.0   # minor beta (or promote beta to production)")
+        print("  python scripts/update-version.py --dry-run 7.6.7   # report the changes, make none")
         return 1
 
-    new_version_string = sys.argv[1]
+    new_version_string = args[0]
     config_path = Path("docusaurus.config.ts")
     versions_json_path = Path("versions.json")
 
@@ -422,8 +727,9 @@ def main() -> int:
 
     try:
         new_version = Version(new_version_string)
-        registry = build_version_registry(config_path, versions_json_path)
-        current_banner = extract_current_banner(config_path)
+        changes = ChangeSet()
+        registry = build_version_registry(changes, config_path, versions_json_path)
+        current_banner = registry['current_banner']
 
         update_type, old_version_string = detect_update_type(new_version, registry, current_banner)
 
@@ -437,32 +743,45 @@ def main() -> int:
         elif update_type == 'patch_current':
             print(f"Detected: patch update for current version")
             validate_patch_version(str(registry['current']), new_version_string)
-            update_current_version_label(config_path, new_version_string)
-            print(f"✓ Updated current version to {new_version_string}")
+            update_current_version_label(changes, config_path, new_version_string)
+            summary = [f"✓ Updated current version to {new_version_string}"]
 
         elif update_type == 'patch_versioned':
             print(f"Detected: patch update for versioned docs")
             validate_patch_version(old_version_string, new_version_string)
-            update_versioned_docs(old_version_string, new_version_string)
-            print(f"✓ Updated versioned docs from {old_version_string} to {new_version_string}")
+            references, files = update_versioned_docs(changes, old_version_string, new_version_string)
+            summary = [
+                f"  Updated {references} references in {files} files",
+                f"✓ Updated versioned docs from {old_version_string} to {new_version_string}",
+            ]
 
         elif update_type == 'minor_beta':
             current_version = str(registry['current'])
             print(f"Detected: new minor beta ({current_version} → {new_version_string})")
-            subprocess.run(["npm", "run", "docusaurus", "docs:version", current_version], check=True)
-            update_config_for_minor_beta(config_path, current_version, new_version_string)
-            print(f"✓ Updated from {current_version} to {new_version_string} (beta)")
+            snapshot_current_docs(changes, current_version)
+            update_config_for_minor_beta(changes, config_path, current_version, new_version_string)
+            summary = [f"✓ Updated from {current_version} to {new_version_string} (beta)"]
 
         elif update_type == 'minor_production':
-            removed_version = extract_last_version(config_path)
+            removed_version = extract_last_version(changes.read(config_path))
             current_version = str(registry['current'])
             print(f"Detected: promote {current_version} to production (removing snapshot of {removed_version})")
-            remove_from_versions_json(removed_version)
-            delete_versioned_files(removed_version)
-            update_config_for_minor_production(config_path, removed_version)
-            print(f"✓ {current_version} promoted to production")
-            print(f'  - Removed "Unreleased" banner')
-            print(f"  - Removed version snapshot of {removed_version}")
+            remove_from_versions_json(changes, removed_version)
+            delete_versioned_files(changes, removed_version)
+            update_config_for_minor_production(changes, config_path, removed_version)
+            summary = [
+                f"✓ {current_version} promoted to production",
+                f'  - Removed "Unreleased" banner',
+                f"  - Removed version snapshot of {removed_version}",
+            ]
+
+        if dry_run:
+            print("Dry run: nothing was changed. The update would:")
+            changes.describe()
+            return 0
+        changes.apply()
+        for line in summary:
+            print(line)
 
     except ValueError as e:
         print(f"Error: {e}")
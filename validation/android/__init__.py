@@ -2,12 +2,22 @@
 Shared Gradle infrastructure for all JVM language validation plugins.
 """
 
+import contextlib
+import functools
+import hashlib
 import json
 import os
 import re
+import sqlite3
 import subprocess
 import sys
+import threading
+import zipfile
+from collections.abc import Mapping
 from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import timing
 
 # =============================================================================
 # Paths and constants
@@ -15,6 +25,16 @@ from pathlib import Path
 
 ANDROID_PROJECT_DIR = Path(__file__).parent / "test-bed"
 CLASSPATH_FILE = ANDROID_PROJECT_DIR / "app" / "build" / "compile-classpath.txt"
+CLASSPATH_CACHE_DIR = ANDROID_PROJECT_DIR / "build" / "classpath-cache"
+
+# Test-bed files whose content determines the resolved classpath
+_GRADLE_INPUTS = [
+    ANDROID_PROJECT_DIR / "settings.gradle.kts",
+    ANDROID_PROJECT_DIR / "build.gradle.kts",
+    ANDROID_PROJECT_DIR / "gradle.properties",
+    ANDROID_PROJECT_DIR / "app" / "build.gradle.kts",
+    ANDROID_PROJECT_DIR / "gradle" / "wrapper" / "gradle-wrapper.properties",
+]
 
 # Both Java and Kotlin generated sources share the same directory
 GENERATED_DIR = (
@@ -43,12 +63,13 @@ def ensure_gradle_wrapper():
     gradlew = ANDROID_PROJECT_DIR / "gradlew"
     if not gradlew.exists():
         print("Setting up Gradle wrapper (requires `gradle` on PATH)…")
-        r = subprocess.run(
-            ["gradle", "wrapper", "--gradle-version=8.6"],
-            cwd=ANDROID_PROJECT_DIR,
-            capture_output=True,
-            text=True,
-        )
+        with timing.span("gradle wrapper", "tool"):
+            r = subprocess.run(
+                ["gradle", "wrapper", "--gradle-version=8.6"],
+                cwd=ANDROID_PROJECT_DIR,
+                capture_output=True,
+                text=True,
+            )
         if r.returncode != 0:
             print("ERROR: could not set up Gradle wrapper.")
             print(r.stderr)
@@ -60,16 +81,97 @@ def ensure_gradle_wrapper():
 # Classpath resolution
 # =============================================================================
 
+_classpath_lock = threading.Lock()
+_classpath_memo: dict[str, dict] = {}
+
+
+def _classpath_cache_key(sdk_version: str) -> str:
+    """Hash the SDK version and every test-bed file that can change resolution."""
+    digest = hashlib.sha256(sdk_version.encode())
+    for path in _GRADLE_INPUTS:
+        digest.update(path.name.encode())
+        if path.exists():
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def _read_cached_classpath(entry_file: Path) -> Optional[dict]:
+    """Return the cached classpath entry if every recorded jar is still unchanged."""
+    try:
+        entry = json.loads(entry_file.read_text(encoding="utf-8"))
+        for jar, mtime_ns in entry["jars"].items():
+            if os.stat(jar).st_mtime_ns != mtime_ns:
+                return None
+        if "classpath" in entry and "digest" in entry:
+            return entry
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        pass
+    return None
+
+
+def _jar_digest(jar: str) -> bytes:
+    """Hash a jar by the names and CRCs in its central directory — content-stable
+    across Gradle cache locations, and cheap because nothing is decompressed."""
+    digest = hashlib.sha256()
+    try:
+        with zipfile.ZipFile(jar) as zf:
+            for info in sorted(zf.infolist(), key=lambda i: i.filename):
+                digest.update(f"{info.filename}:{info.CRC:08x}\n".encode())
+    except (zipfile.BadZipFile, IsADirectoryError, FileNotFoundError):
+        digest.update(jar.encode())
+    return digest.digest()
+
+
+def _classpath_entry(sdk_version: str) -> dict:
+    with _classpath_lock:
+        if sdk_version in _classpath_memo:
+            return _classpath_memo[sdk_version]
+        entry_file = CLASSPATH_CACHE_DIR / f"{_classpath_cache_key(sdk_version)}.json"
+        entry = _read_cached_classpath(entry_file)
+        if entry is None:
+            classpath = _run_export_classpath(sdk_version)
+            jars = [jar for jar in classpath.split(os.pathsep) if jar]
+            digest = hashlib.sha256()
+            for jar_digest in sorted(_jar_digest(jar) for jar in jars):
+                digest.update(jar_digest)
+            entry = {
+                "sdk_version": sdk_version,
+                "classpath": classpath,
+                "digest": digest.hexdigest(),
+                "jars": {jar: os.stat(jar).st_mtime_ns for jar in jars},
+            }
+            CLASSPATH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            entry_file.write_text(json.dumps(entry), encoding="utf-8")
+        _classpath_memo[sdk_version] = entry
+        return entry
+
 
 def export_classpath(sdk_version: str) -> str:
+    """Return the resolved SDK classpath, running Gradle only on a cache miss.
+
+    The result is cached on disk under a key built from *sdk_version* and the
+    test-bed's Gradle files, and is reused as long as every resolved jar keeps
+    its modification time. Java and Kotlin share the cache, and within one
+    process each version is resolved at most once."""
+    return _classpath_entry(sdk_version)["classpath"]
+
+
+def classpath_digest(sdk_version: str) -> str:
+    """Content digest of the SDK classpath: equal for two SDK versions only if
+    every jar on their classpaths holds the same classes."""
+    return _classpath_entry(sdk_version)["digest"]
+
+
+def _run_export_classpath(sdk_version: str) -> str:
     """Run the exportClasspath Gradle task and return the resolved classpath."""
     gradlew = str(ANDROID_PROJECT_DIR / "gradlew")
-    r = subprocess.run(
-        [gradlew, f"-PscanditSdkVersion={sdk_version}", ":app:exportClasspath", "-q"],
-        cwd=ANDROID_PROJECT_DIR,
-        capture_output=True,
-        text=True,
-    )
+    with timing.span("gradle exportClasspath", "tool", sdk_version=sdk_version):
+        r = subprocess.run(
+            [gradlew, f"-PscanditSdkVersion={sdk_version}", ":app:exportClasspath", "-q"],
+            cwd=ANDROID_PROJECT_DIR,
+            capture_output=True,
+            text=True,
+        )
     if r.returncode != 0:
         print("ERROR: could not export SDK classpath.")
         print(r.stderr)
@@ -94,26 +196,272 @@ def split_imports(content: str) -> tuple[list[str], str]:
     return imports, "\n".join(rest)
 
 
+def write_generated_sources(
+    sources: Iterable[tuple[str, str]],
+    extension: str,
+    class_prefix: str,
+    classes_dir: Optional[Path],
+    generated_dir: Path = GENERATED_DIR,
+) -> None:
+    """Write (class_name, source) pairs to *generated_dir*, touching only files
+    whose content changed, and delete generated files that are no longer
+    produced. Compiled classes are removed only for changed or deleted sources,
+    so output for unchanged snippets survives between runs."""
+    generated_dir.mkdir(parents=True, exist_ok=True)
+    produced: set[str] = set()
+    stale: set[str] = set()
+    for class_name, source in sources:
+        path = generated_dir / f"{class_name}{extension}"
+        produced.add(class_name)
+        try:
+            if path.read_text(encoding="utf-8") == source:
+                continue
+        except FileNotFoundError:
+            pass
+        path.write_text(source, encoding="utf-8")
+        stale.add(class_name)
+    for path in generated_dir.glob(f"{class_prefix}*{extension}"):
+        if path.stem not in produced:
+            path.unlink()
+            stale.add(path.stem)
+    if stale and classes_dir is not None and classes_dir.exists():
+        for path in classes_dir.rglob("*.class"):
+            if path.stem.split("$", 1)[0] in stale:
+                path.unlink()
+
+
 # =============================================================================
-# Snippet hash and compilation cache
+# Snippet fingerprints and compilation cache
 # =============================================================================
 
 
-def load_cache(sdk_version: str, cache_file: Path) -> dict:
+def fingerprint(*parts: str) -> str:
+    """Combine the given parts into one SHA-256 hex digest."""
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+def file_digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+# Files identifying a compiler distribution, in order of preference: the
+# JDK's `release` and Kotlin's `build.txt` name the exact build; the compiler
+# jar covers Kotlin installs that ship without build.txt.
+_TOOLCHAIN_MARKERS = ("release", "build.txt", "lib/kotlin-compiler.jar")
+
+
+@functools.lru_cache(maxsize=None)
+def compiler_version(env_var: str, binary: str) -> str:
+    """Identify a JVM compiler (javac, kotlinc) for cache keys without
+    starting a JVM: a digest of its distribution's version file, falling
+    back to the `-version` banner when the distribution has none."""
+    home = compiler_home(env_var, binary)
+    for marker in _TOOLCHAIN_MARKERS:
+        path = home / marker
+        if path.is_file():
+            return f"{binary} {marker} {file_digest(path)}"
+    r = subprocess.run(
+        [find_compiler(env_var, binary), "-version"], capture_output=True, text=True
+    )
+    return (r.stdout + r.stderr).strip()
+
+
+# The cache is one SQLite database per language. Rows are keyed by each
+# plugin's composite snippet fingerprint (see LanguagePlugin.cache_key) and
+# the SDK version that produced them. Lookups match on the fingerprint alone,
+# so results stay valid across SDK versions whose classpath and toolchain are
+# unchanged. WAL mode lets concurrent runs read while one writes; writers
+# queue on the database lock instead of overwriting each other.
+_CACHE_FORMAT = 5  # stored in PRAGMA user_version; a mismatch resets the cache
+_CACHE_BUSY_TIMEOUT = 60  # seconds to wait for another run's write to finish
+# A row is dropped once its SDK version has had this many runs without it.
+CACHE_RETENTION_RUNS = 50
+
+_CACHE_SCHEMA = """
+CREATE TABLE results (
+    fingerprint TEXT NOT NULL,
+    sdk_version TEXT NOT NULL,
+    errors TEXT NOT NULL,
+    duration REAL,
+    last_run INTEGER NOT NULL,
+    PRIMARY KEY (fingerprint, sdk_version)
+) WITHOUT ROWID;
+CREATE INDEX results_by_run ON results (sdk_version, last_run);
+CREATE TABLE runs (
+    sdk_version TEXT PRIMARY KEY,
+    run INTEGER NOT NULL
+);
+CREATE TABLE locations (
+    sdk_version TEXT NOT NULL,
+    source_file TEXT NOT NULL,
+    snippet_index INTEGER NOT NULL,
+    failed INTEGER NOT NULL,
+    last_run INTEGER NOT NULL,
+    PRIMARY KEY (sdk_version, source_file, snippet_index)
+) WITHOUT ROWID;
+"""
+
+
+@contextlib.contextmanager
+def _write_transaction(conn: sqlite3.Connection) -> Iterator[None]:
+    """Take the database write lock up front, so the transaction never has
+    to upgrade a read lock and can't deadlock with another writer."""
+    conn.execute("BEGIN IMMEDIATE")
     try:
-        data = json.loads(cache_file.read_text(encoding="utf-8"))
-        if data.get("sdk_version") != sdk_version:
-            return {}
-        return data.get("entries", {})
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
+        yield
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _cache_format(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
 
 
-def save_cache(cache: dict, sdk_version: str, cache_file: Path):
+def _connect_cache(cache_file: Path) -> sqlite3.Connection:
     cache_file.parent.mkdir(parents=True, exist_ok=True)
-    cache_file.write_text(
-        json.dumps({"sdk_version": sdk_version, "entries": cache}), encoding="utf-8"
+    conn = sqlite3.connect(
+        cache_file,
+        timeout=_CACHE_BUSY_TIMEOUT,
+        isolation_level=None,
+        check_same_thread=False,
     )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if _cache_format(conn) != _CACHE_FORMAT:
+        with _write_transaction(conn):
+            if _cache_format(conn) != _CACHE_FORMAT:
+                conn.execute("DROP TABLE IF EXISTS results")
+                conn.execute("DROP TABLE IF EXISTS runs")
+                conn.execute("DROP TABLE IF EXISTS locations")
+                for statement in _CACHE_SCHEMA.split(";"):
+                    if statement.strip():
+                        conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {_CACHE_FORMAT}")
+    return conn
+
+
+class _CacheView(Mapping):
+    """Read-only {fingerprint: errors} view of a cache database. Rows are
+    fetched on lookup, so a run only reads the entries it asks for. Close it,
+    or use it as a context manager, once the lookups are done."""
+
+    def __init__(self, conn: sqlite3.Connection, sdk_version: str):
+        self._conn = conn
+        self._sdk_version = sdk_version
+
+    def __enter__(self) -> "_CacheView":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __getitem__(self, fingerprint: str) -> list[str]:
+        row = self._conn.execute(
+            "SELECT errors FROM results WHERE fingerprint = ? LIMIT 1", (fingerprint,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(fingerprint)
+        return json.loads(row[0])
+
+    def __iter__(self) -> Iterator[str]:
+        for (fingerprint,) in self._conn.execute("SELECT DISTINCT fingerprint FROM results"):
+            yield fingerprint
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(DISTINCT fingerprint) FROM results").fetchone()[0]
+
+    def duration(self, fingerprint: str) -> Optional[float]:
+        """Seconds the snippet last took to compile, if recorded."""
+        row = self._conn.execute(
+            "SELECT duration FROM results WHERE fingerprint = ? AND duration IS NOT NULL "
+            "LIMIT 1",
+            (fingerprint,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def failed_locations(self) -> set[tuple[str, int]]:
+        """(source file, snippet index) of every snippet that failed the last
+        time it was validated against this SDK version."""
+        return set(
+            self._conn.execute(
+                "SELECT source_file, snippet_index FROM locations "
+                "WHERE sdk_version = ? AND failed",
+                (self._sdk_version,),
+            )
+        )
+
+
+def load_cache(sdk_version: str, cache_file: Path) -> _CacheView:
+    """Return a {fingerprint: errors} mapping over every cached snippet result."""
+    return _CacheView(_connect_cache(cache_file), sdk_version)
+
+
+def save_cache(
+    cache: dict,
+    sdk_version: str,
+    cache_file: Path,
+    durations: Optional[dict[str, float]] = None,
+    outcomes: Optional[dict[tuple[str, int], bool]] = None,
+):
+    """Upsert *cache* ({fingerprint: errors}) as the results seen in this run
+    of *sdk_version*, then prune that version's rows not seen in the last
+    CACHE_RETENTION_RUNS runs. Only the given rows are written.
+
+    *durations* ({fingerprint: seconds}) records compile times; rows without
+    one keep the time recorded earlier. *outcomes* ({(source file, snippet
+    index): failed}) records which snippet locations failed, so the next run
+    can compile them first."""
+    durations = durations or {}
+    outcomes = outcomes or {}
+    conn = _connect_cache(cache_file)
+    try:
+        with _write_transaction(conn):
+            conn.execute(
+                "INSERT INTO runs VALUES (?, 1) "
+                "ON CONFLICT (sdk_version) DO UPDATE SET run = run + 1",
+                (sdk_version,),
+            )
+            (run,) = conn.execute(
+                "SELECT run FROM runs WHERE sdk_version = ?", (sdk_version,)
+            ).fetchone()
+            conn.executemany(
+                "INSERT INTO results VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (fingerprint, sdk_version) DO UPDATE SET "
+                "errors = excluded.errors, "
+                "duration = COALESCE(excluded.duration, results.duration), "
+                "last_run = excluded.last_run",
+                (
+                    (key, sdk_version, json.dumps(errors), durations.get(key), run)
+                    for key, errors in cache.items()
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO locations VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (sdk_version, source_file, snippet_index) DO UPDATE SET "
+                "failed = excluded.failed, last_run = excluded.last_run",
+                (
+                    (sdk_version, source_file, index, failed, run)
+                    for (source_file, index), failed in outcomes.items()
+                ),
+            )
+            for table in ("results", "locations"):
+                conn.execute(
+                    f"DELETE FROM {table} WHERE sdk_version = ? AND last_run <= ?",
+                    (sdk_version, run - CACHE_RETENTION_RUNS),
+                )
+    finally:
+        conn.close()
+
+
+def delete_cache(cache_file: Path):
+    """Remove a cache database together with its WAL files."""
+    for path in (cache_file, Path(f"{cache_file}-wal"), Path(f"{cache_file}-shm")):
+        path.unlink(missing_ok=True)
 
 
 def find_compiler(env_var: str, binary: str) -> str:
@@ -130,3 +478,12 @@ def find_compiler(env_var: str, binary: str) -> str:
     raise FileNotFoundError(
         f"'{binary}' not found. Set {env_var} or add {binary} to PATH."
     )
+
+
+def compiler_home(env_var: str, binary: str) -> Path:
+    """The distribution directory (the parent of bin/) of the compiler
+    find_compiler() locates, with symlinks such as /usr/bin/javac resolved."""
+    import shutil
+
+    compiler = find_compiler(env_var, binary)
+    return Path(shutil.which(compiler) or compiler).resolve().parent.parent
@@ -0,0 +1,329 @@
+import java.io.BufferedReader;
+import java.io.ByteArrayOutputStream;
+import java.io.File;
+import java.io.IOException;
+import java.io.InputStreamReader;
+import java.io.OutputStream;
+import java.io.OutputStreamWriter;
+import java.io.PrintStream;
+import java.io.PrintWriter;
+import java.lang.reflect.Method;
+import java.net.InetAddress;
+import java.net.ServerSocket;
+import java.net.Socket;
+import java.net.SocketTimeoutException;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.nio.file.Paths;
+import java.nio.file.StandardCopyOption;
+import java.nio.file.attribute.PosixFilePermissions;
+import java.security.SecureRandom;
+import java.util.ArrayList;
+import java.util.Deque;
+import java.util.Iterator;
+import java.util.List;
+import java.util.Map;
+import java.util.concurrent.ConcurrentHashMap;
+import java.util.concurrent.ConcurrentLinkedDeque;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.atomic.AtomicLong;
+import javax.tools.JavaCompiler;
+import javax.tools.JavaFileObject;
+import javax.tools.StandardJavaFileManager;
+import javax.tools.StandardLocation;
+import javax.tools.ToolProvider;
+
+/**
+ * Long-lived compile server for snippet validation.
+ *
+ * Keeps one JVM — and the Kotlin compiler classes loaded into it — warm across
+ * validation runs, so a run that only touches a handful of snippets doesn't pay
+ * JVM startup and compiler warm-up again. Started and stopped through
+ * validation/compile-server.py; the Python plugins fall back to spawning
+ * kotlinc/javac when no server is running.
+ *
+ * javac requests also reuse the SDK classpath: each classpath keeps a pool of
+ * file managers that hold its jars open and indexed between requests. kotlinc
+ * reopens its classpath on every request; only its JVM and classes stay warm.
+ *
+ * Protocol (UTF-8, one connection per request, localhost only):
+ *   request:  token \n tool \n argc \n arg_1 \n ... arg_argc \n
+ *             tool is one of: kotlinc, javac, ping, shutdown
+ *   response: exit code \n compiler output until the connection closes
+ */
+public final class SnippetCompileServer {
+
+    private static final String KOTLIN_COMPILER = "org.jetbrains.kotlin.cli.jvm.K2JVMCompiler";
+
+    private final String token;
+    private final Path kotlinHome;
+    private final ClassLoader kotlinLoader;
+    /** Idle javac file managers keyed by classpath and the jars' stamps. */
+    private final Map<String, Deque<StandardJavaFileManager>> fileManagers = new ConcurrentHashMap<>();
+    private final AtomicLong lastRequest = new AtomicLong(System.currentTimeMillis());
+    private volatile boolean running = true;
+
+    private SnippetCompileServer(String token, Path kotlinHome) throws IOException {
+        this.token = token;
+        this.kotlinHome = kotlinHome;
+        this.kotlinLoader = kotlinHome == null ? null : kotlinClassLoader(kotlinHome);
+    }
+
+    public static void main(String[] args) throws Exception {
+        Path portFile = null;
+        Path kotlinHome = null;
+        long idleTimeoutMinutes = 120;
+        for (int i = 0; i < args.length; i++) {
+            switch (args[i]) {
+                case "--port-file":
+                    portFile = Paths.get(args[++i]);
+                    break;
+                case "--kotlin-home":
+                    kotlinHome = Paths.get(args[++i]);
+                    break;
+                case "--idle-timeout":
+                    idleTimeoutMinutes = Long.parseLong(args[++i]);
+                    break;
+                default:
+                    throw new IllegalArgumentException("Unknown argument: " + args[i]);
+            }
+        }
+        if (portFile == null) {
+            throw new IllegalArgumentException("--port-file is required");
+        }
+
+        byte[] secret = new byte[16];
+        new SecureRandom().nextBytes(secret);
+        StringBuilder token = new StringBuilder();
+        for (byte b : secret) {
+            token.append(String.format("%02x", b));
+        }
+
+        SnippetCompileServer server = new SnippetCompileServer(token.toString(), kotlinHome);
+        try (ServerSocket socket = new ServerSocket(0, 50, InetAddress.getLoopbackAddress())) {
+            writePortFile(portFile, socket.getLocalPort(), server.token);
+            try {
+                server.serve(socket, idleTimeoutMinutes * 60_000L);
+            } finally {
+                Files.deleteIfExists(portFile);
+            }
+        }
+    }
+
+    private static ClassLoader kotlinClassLoader(Path kotlinHome) throws IOException {
+        File[] jars = kotlinHome.resolve("lib").toFile().listFiles((dir, name) -> name.endsWith(".jar"));
+        if (jars == null || jars.length == 0) {
+            throw new IOException("No compiler jars found under " + kotlinHome.resolve("lib"));
+        }
+        List<URL> urls = new ArrayList<>();
+        for (File jar : jars) {
+            urls.add(jar.toURI().toURL());
+        }
+        return new URLClassLoader(urls.toArray(new URL[0]), ClassLoader.getSystemClassLoader().getParent());
+    }
+
+    /** The port file is the client's only way to find the server and its token: owner-readable only. */
+    private static void writePortFile(Path portFile, int port, String token) throws IOException {
+        Files.createDirectories(portFile.getParent());
+        Path tmp = portFile.resolveSibling(portFile.getFileName() + ".tmp");
+        Files.deleteIfExists(tmp);
+        try {
+            Files.createFile(tmp, PosixFilePermissions.asFileAttribute(PosixFilePermissions.fromString("rw-------")));
+        } catch (UnsupportedOperationException e) {
+            Files.createFile(tmp);
+        }
+        Files.write(tmp, (port + "\n" + token + "\n").getBytes(StandardCharsets.UTF_8));
+        Files.move(tmp, portFile, StandardCopyOption.REPLACE_EXISTING, StandardCopyOption.ATOMIC_MOVE);
+    }
+
+    private void serve(ServerSocket socket, long idleTimeoutMillis) throws IOException {
+        ExecutorService workers = Executors.newFixedThreadPool(Runtime.getRuntime().availableProcessors());
+        socket.setSoTimeout(10_000);
+        try {
+            while (running) {
+                Socket client;
+                try {
+                    client = socket.accept();
+                } catch (SocketTimeoutException e) {
+                    if (System.currentTimeMillis() - lastRequest.get() > idleTimeoutMillis) {
+                        System.err.println("Idle timeout reached, shutting down.");
+                        running = false;
+                    }
+                    continue;
+                }
+                lastRequest.set(System.currentTimeMillis());
+                workers.submit(() -> handle(client));
+            }
+        } finally {
+            workers.shutdown();
+        }
+    }
+
+    private void handle(Socket client) {
+        try (Socket c = client) {
+            BufferedReader in = new BufferedReader(new InputStreamReader(c.getInputStream(), StandardCharsets.UTF_8));
+            OutputStream out = c.getOutputStream();
+            if (!token.equals(in.readLine())) {
+                return;
+            }
+            String tool = in.readLine();
+            int argc = Integer.parseInt(in.readLine().trim());
+            List<String> args = new ArrayList<>(argc);
+            for (int i = 0; i < argc; i++) {
+                args.add(in.readLine());
+            }
+
+            ByteArrayOutputStream output = new ByteArrayOutputStream();
+            int exitCode;
+            try (PrintStream printer = new PrintStream(output, true, "UTF-8")) {
+                exitCode = run(tool, args, printer);
+            }
+            out.write((exitCode + "\n").getBytes(StandardCharsets.UTF_8));
+            output.writeTo(out);
+            out.flush();
+        } catch (Exception e) {
+            e.printStackTrace();
+        } finally {
+            lastRequest.set(System.currentTimeMillis());
+        }
+    }
+
+    private int run(String tool, List<String> args, PrintStream out) throws Exception {
+        switch (tool) {
+            case "ping":
+                out.println("kotlin-home=" + (kotlinHome == null ? "" : kotlinHome));
+                return 0;
+            case "shutdown":
+                running = false;
+                return 0;
+            case "javac":
+                return javac(args, out);
+            case "kotlinc":
+                return kotlinc(args, out);
+            default:
+                out.println("error: unknown tool '" + tool + "'");
+                return 2;
+        }
+    }
+
+    private int javac(List<String> args, PrintStream out) throws IOException {
+        JavaCompiler compiler = ToolProvider.getSystemJavaCompiler();
+        if (compiler == null) {
+            out.println("error: the compile server is running on a JRE without javac");
+            return 2;
+        }
+        String classpath = null;
+        List<String> options = new ArrayList<>();
+        List<File> sources = new ArrayList<>();
+        for (int i = 0; i < args.size(); i++) {
+            String arg = args.get(i);
+            if ((arg.equals("-cp") || arg.equals("-classpath")) && i + 1 < args.size()) {
+                classpath = args.get(++i);
+            } else if (arg.endsWith(".java")) {
+                sources.add(new File(arg));
+            } else {
+                options.add(arg);
+            }
+        }
+        if (classpath == null) {
+            return compiler.run(null, out, out, args.toArray(new String[0]));
+        }
+
+        String key = classpath + "\n" + classpathStamp(classpath);
+        Deque<StandardJavaFileManager> idle = idleFileManagers(classpath, key);
+        StandardJavaFileManager fileManager = idle.poll();
+        if (fileManager == null) {
+            fileManager = compiler.getStandardFileManager(null, null, null);
+            List<File> entries = new ArrayList<>();
+            for (String entry : classpath.split(File.pathSeparator)) {
+                if (!entry.isEmpty()) {
+                    entries.add(new File(entry));
+                }
+            }
+            fileManager.setLocation(StandardLocation.CLASS_PATH, entries);
+        }
+        PrintWriter writer = new PrintWriter(new OutputStreamWriter(out, StandardCharsets.UTF_8));
+        try {
+            Iterable<? extends JavaFileObject> units = fileManager.getJavaFileObjectsFromFiles(sources);
+            return compiler.getTask(writer, fileManager, null, options, null, units).call() ? 0 : 1;
+        } catch (IllegalArgumentException | IllegalStateException e) {
+            writer.println("error: " + e.getMessage());
+            return 2;
+        } finally {
+            writer.flush();
+            fileManager.flush();
+            if (fileManagers.get(key) == idle) {
+                idle.push(fileManager);
+            } else {
+                fileManager.close();
+            }
+        }
+    }
+
+    /**
+     * The pool of idle file managers for {@code key}. A new key for the same
+     * classpath means its jars changed on disk: the old pool is closed.
+     */
+    private Deque<StandardJavaFileManager> idleFileManagers(String classpath, String key) throws IOException {
+        Deque<StandardJavaFileManager> idle = fileManagers.get(key);
+        if (idle != null) {
+            return idle;
+        }
+        Deque<StandardJavaFileManager> created = new ConcurrentLinkedDeque<>();
+        idle = fileManagers.putIfAbsent(key, created);
+        if (idle != null) {
+            return idle;
+        }
+        Iterator<Map.Entry<String, Deque<StandardJavaFileManager>>> it = fileManagers.entrySet().iterator();
+        while (it.hasNext()) {
+            Map.Entry<String, Deque<StandardJavaFileManager>> entry = it.next();
+            if (!entry.getKey().equals(key) && entry.getKey().startsWith(classpath + "\n")) {
+                it.remove();
+                StandardJavaFileManager stale;
+                while ((stale = entry.getValue().poll()) != null) {
+                    stale.close();
+                }
+            }
+        }
+        return created;
+    }
+
+    /** Modification times and sizes of the classpath entries. */
+    private static String classpathStamp(String classpath) {
+        StringBuilder stamp = new StringBuilder();
+        for (String entry : classpath.split(File.pathSeparator)) {
+            File file = new File(entry);
+            stamp.append(file.lastModified()).append(':').append(file.length()).append(';');
+        }
+        return stamp.toString();
+    }
+
+    private int kotlinc(List<String> args, PrintStream out) throws Exception {
+        if (kotlinLoader == null) {
+            out.println("error: the compile server was started without --kotlin-home");
+            return 2;
+        }
+        List<String> fullArgs = new ArrayList<>(args);
+        if (!fullArgs.contains("-kotlin-home")) {
+            fullArgs.add(0, kotlinHome.toString());
+            fullArgs.add(0, "-kotlin-home");
+        }
+
+        Thread thread = Thread.currentThread();
+        ClassLoader previous = thread.getContextClassLoader();
+        thread.setContextClassLoader(kotlinLoader);
+        try {
+            Class<?> compilerClass = kotlinLoader.loadClass(KOTLIN_COMPILER);
+            Object compiler = compilerClass.getDeclaredConstructor().newInstance();
+            Method exec = compilerClass.getMethod("exec", PrintStream.class, String[].class);
+            Object exitCode = exec.invoke(compiler, out, (Object) fullArgs.toArray(new String[0]));
+            return (Integer) exitCode.getClass().getMethod("getCode").invoke(exitCode);
+        } finally {
+            thread.setContextClassLoader(previous);
+        }
+    }
+}
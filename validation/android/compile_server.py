@@ -0,0 +1,275 @@
+"""
+Client and lifecycle helpers for the warm JVM compile server.
+
+The server (compile-server/SnippetCompileServer.java) hosts kotlinc and javac
+in one long-lived JVM. Plugins call `connect()` before compiling and fall back
+to spawning the compiler themselves when it returns None.
+"""
+
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from android import ANDROID_PROJECT_DIR, compiler_home, find_compiler
+
+# =============================================================================
+# Paths and constants
+# =============================================================================
+
+SERVER_SOURCE = Path(__file__).parent / "compile-server" / "SnippetCompileServer.java"
+SERVER_DIR = ANDROID_PROJECT_DIR / "build" / "compile-server"
+SERVER_CLASSES_DIR = SERVER_DIR / "classes"
+PORT_FILE = SERVER_DIR / "server.port"
+LOG_FILE = SERVER_DIR / "server.log"
+
+_STARTUP_TIMEOUT = 60  # seconds
+_IDLE_TIMEOUT_MINUTES = 120
+
+# =============================================================================
+# Client
+# =============================================================================
+
+
+class CompileServerClient:
+    """Sends compiler invocations to a running compile server."""
+
+    def __init__(self, port: int, token: str):
+        self.port = port
+        self.token = token
+        # Set by ping(): the Kotlin distribution the server hosts, if any.
+        self.kotlin_home: Optional[str] = None
+        # Cleared once a request fails, so callers stop sending requests and
+        # spawn the compiler instead; set again by a successful ping().
+        self.available = True
+
+    def run(self, tool: str, args: list[str]) -> tuple[int, str]:
+        """Run *tool* ('kotlinc' or 'javac') with *args* on the server.
+        Returns (exit_code, combined_output)."""
+        request = "\n".join([self.token, tool, str(len(args)), *args]) + "\n"
+        try:
+            with socket.create_connection(("127.0.0.1", self.port)) as conn:
+                conn.sendall(request.encode("utf-8"))
+                conn.shutdown(socket.SHUT_WR)
+                chunks = []
+                while chunk := conn.recv(65536):
+                    chunks.append(chunk)
+            response = b"".join(chunks).decode("utf-8", errors="replace")
+            status, _, output = response.partition("\n")
+            if not status.strip().lstrip("-").isdigit():
+                raise ConnectionError("compile server closed the connection without a response")
+        except OSError:
+            self.available = False
+            raise
+        return int(status), output
+
+    def ping(self) -> bool:
+        try:
+            code, output = self.run("ping", [])
+        except OSError:
+            return False
+        self.kotlin_home = output.strip().partition("kotlin-home=")[2] or None
+        self.available = code == 0
+        return self.available
+
+
+def connect(port_file: Path = PORT_FILE) -> Optional[CompileServerClient]:
+    """Return a client for the running compile server, or None if there is none."""
+    try:
+        port, token = port_file.read_text(encoding="utf-8").split()[:2]
+        client = CompileServerClient(int(port), token)
+    except (FileNotFoundError, ValueError):
+        return None
+    return client if client.ping() else None
+
+
+# =============================================================================
+# Lifecycle
+# =============================================================================
+
+
+def _kotlin_home() -> Optional[Path]:
+    """Locate the Kotlin distribution whose lib/ holds kotlin-compiler.jar."""
+    try:
+        home = compiler_home("KOTLIN_HOME", "kotlinc")
+    except FileNotFoundError:
+        return None
+    return home if (home / "lib" / "kotlin-compiler.jar").exists() else None
+
+
+def _java_launcher() -> str:
+    javac = find_compiler("JAVA_HOME", "javac")
+    java = Path(javac).with_name("java")
+    return str(java) if java.is_absolute() and java.exists() else "java"
+
+
+def _build_server() -> None:
+    """Compile the server sources if they changed since the last build."""
+    server_class = SERVER_CLASSES_DIR / "SnippetCompileServer.class"
+    if server_class.exists() and server_class.stat().st_mtime >= SERVER_SOURCE.stat().st_mtime:
+        return
+    SERVER_CLASSES_DIR.mkdir(parents=True, exist_ok=True)
+    r = subprocess.run(
+        [find_compiler("JAVA_HOME", "javac"), "-d", str(SERVER_CLASSES_DIR), str(SERVER_SOURCE)],
+        capture_output=True,
+        text=True,
+    )
+    if r.returncode != 0:
+        raise RuntimeError(f"could not build the compile server:\n{r.stdout}{r.stderr}")
+
+
+def _launch(
+    port_file: Path, kotlin_home: Optional[Path]
+) -> tuple[subprocess.Popen, Optional[CompileServerClient]]:
+    """Launch a server process writing *port_file* and wait until it answers.
+    Returns (process, client); the client is None if the server failed to start."""
+    _build_server()
+    cmd = [_java_launcher(), "-Xss2m", "-cp", str(SERVER_CLASSES_DIR), "SnippetCompileServer"]
+    cmd += ["--port-file", str(port_file), "--idle-timeout", str(_IDLE_TIMEOUT_MINUTES)]
+    if kotlin_home:
+        cmd += ["--kotlin-home", str(kotlin_home)]
+
+    port_file.unlink(missing_ok=True)
+    with LOG_FILE.open("a", encoding="utf-8") as log:
+        process = subprocess.Popen(
+            cmd, stdout=log, stderr=subprocess.STDOUT, start_new_session=True
+        )
+
+    deadline = time.monotonic() + _STARTUP_TIMEOUT
+    while time.monotonic() < deadline and process.poll() is None:
+        client = connect(port_file)
+        if client:
+            return process, client
+        time.sleep(0.2)
+    return process, None
+
+
+def start_server() -> CompileServerClient:
+    """Start a detached compile server (if none is running) and return a client."""
+    client = connect()
+    if client:
+        return client
+
+    kotlin_home = _kotlin_home()
+    if not kotlin_home:
+        print("WARNING: kotlinc not found — the server will only handle javac requests.")
+    try:
+        _, client = _launch(PORT_FILE, kotlin_home)
+    except RuntimeError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    if not client:
+        print(f"ERROR: compile server did not start. See {LOG_FILE}")
+        sys.exit(1)
+    return client
+
+
+_session_lock = threading.Lock()
+_session_users = 0
+_session_started = False
+_session_client: Optional[CompileServerClient] = None
+_session_stop: Optional[Callable[[], None]] = None
+
+
+def _open_private_server() -> tuple[Optional[CompileServerClient], Optional[Callable[[], None]]]:
+    """Launch a server private to this process. Returns (client, stop) or
+    (None, None) if no JVM is available to host it."""
+    SERVER_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = tempfile.TemporaryDirectory(dir=SERVER_DIR)
+    try:
+        process, client = _launch(Path(tmp.name) / "server.port", _kotlin_home())
+    except (FileNotFoundError, RuntimeError):
+        tmp.cleanup()
+        return None, None
+
+    def stop():
+        process.terminate()
+        process.wait()
+        tmp.cleanup()
+
+    if not client:
+        stop()
+        return None, None
+    return client, stop
+
+
+def _acquire(start: bool) -> Optional[CompileServerClient]:
+    global _session_users, _session_started, _session_client, _session_stop
+    with _session_lock:
+        _session_users += 1
+        if start and not _session_started:
+            _session_started = True
+            _session_client = connect()
+            if not _session_client:
+                _session_client, _session_stop = _open_private_server()
+        return _session_client
+
+
+def _release() -> None:
+    global _session_users, _session_started, _session_client, _session_stop
+    with _session_lock:
+        _session_users -= 1
+        if _session_users == 0:
+            if _session_stop:
+                _session_stop()
+            _session_started = False
+            _session_client = _session_stop = None
+
+
+def refresh_session() -> None:
+    """Drop the server held by the enclosing session_scope() if it stopped
+    answering (idle timeout, --stop-server, crash), so the next
+    compile_session() reconnects or launches a new one. Call it between
+    compile jobs, not while any of them runs."""
+    global _session_started, _session_client, _session_stop
+    with _session_lock:
+        if not _session_client or _session_client.ping():
+            return
+        if _session_stop:
+            _session_stop()
+        _session_started = False
+        _session_client = _session_stop = None
+
+
+@contextmanager
+def compile_session() -> Iterator[Optional[CompileServerClient]]:
+    """Yield a client for one warm compiler JVM shared by every caller in this
+    process, so concurrent compile jobs don't each start their own.
+
+    Reuses the long-lived server when it is running. Otherwise the first caller
+    launches a private server hosting javac and, if found, kotlinc; it stays up
+    until the last overlapping session (or enclosing session_scope()) closes.
+    Yields None if no JVM is available, so the caller can fall back to
+    spawning the compiler."""
+    client = _acquire(start=True)
+    try:
+        yield client
+    finally:
+        _release()
+
+
+@contextmanager
+def session_scope() -> Iterator[None]:
+    """Keep the server of every compile_session() opened inside this block
+    alive until the block exits, so compile jobs that run one after another
+    share it too. Launches nothing unless a session is actually opened."""
+    _acquire(start=False)
+    try:
+        yield
+    finally:
+        _release()
+
+
+def stop_server() -> bool:
+    """Ask the running server to shut down. Returns False if none was running."""
+    client = connect()
+    if not client:
+        PORT_FILE.unlink(missing_ok=True)
+        return False
+    client.run("shutdown", [])
+    return True
@@ -7,6 +7,12 @@ import re
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Iterable
+
+
+class ToolchainUnavailable(Exception):
+    """Raised by LanguagePlugin.prepare() when the plugin's toolchain is
+    missing or cannot be set up."""
 
 
 @dataclass
@@ -14,6 +20,10 @@ class Snippet:
     source_file: Path  # relative to repo root
     index: int  # position within the source file (0-based)
     content: str
+    fence: str = ""  # info string of the code fence, e.g. 'ts'
+    # Docs files importing the partial this snippet is in, directly or through
+    # other partials; empty for snippets of the docs files themselves.
+    importers: frozenset = frozenset()
     hash: str = field(init=False)
 
     def __post_init__(self):
@@ -33,9 +43,18 @@ class CompileResult:
     """Compilation outcome for a batch of snippets."""
 
     failures: list[Failure]
+    # Snippets left uncompiled, e.g. after --fail-fast stopped the run.
+    skipped: list[Snippet] = field(default_factory=list)
 
 
 class LanguagePlugin(ABC):
+    # Subtrees of each docs root (e.g. Path("sdks") / "web") whose snippets in
+    # this language are not collected.
+    excluded_doc_dirs: frozenset = frozenset()
+    # Only report diagnostics, without writing compiler output (--check-only).
+    # Compile results are the same either way, so they share the cache.
+    check_only: bool = False
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -46,14 +65,42 @@ class LanguagePlugin(ABC):
     def value(self) -> str:
         """CLI argument value, e.g. 'java'."""
 
+    @property
+    def fence_tags(self) -> tuple[str, ...]:
+        """Code fence info strings whose blocks this plugin validates."""
+        return (self.value,)
+
     def _class_name(self, snippet: "Snippet") -> str:
         slug = re.sub(r"[^A-Za-z0-9]", "_", str(snippet.source_file))
         slug = re.sub(r"_+", "_", slug).strip("_")
         return f"Snippet_{self.value}_{slug}_{snippet.index:03d}"
 
+    def prepare(self) -> None:
+        """Check or set up the toolchain before snippets are extracted.
+        Raises ToolchainUnavailable if it is missing."""
+
+    @abstractmethod
+    def toolchain_fingerprint(self, sdk_version: str) -> str:
+        """Digest of everything besides the snippet itself that can change its
+        compile result: source template, base class, compiler and classpath."""
+
+    def content_key(self, snippet: "Snippet") -> str:
+        """Identity of a snippet's compile input. Occurrences with equal keys
+        (e.g. the same code block in several guides) compile identically and
+        are compiled once."""
+        return snippet.hash
+
+    def cache_key(self, snippet: "Snippet", toolchain: str) -> str:
+        """Cache key for *snippet* compiled with the given toolchain fingerprint."""
+        return hashlib.sha256(
+            f"{toolchain}\0{self.content_key(snippet)}".encode()
+        ).hexdigest()
+
     @abstractmethod
-    def generate_sources(self, snippets: list[Snippet]) -> None:
-        """Compute class names, generate source text, and write files to disk."""
+    def generate_sources(self, snippets: Iterable[Snippet]) -> None:
+        """Compute class names, generate source text, and write files to disk.
+
+        *snippets* may be a stream that is still being extracted."""
 
     @abstractmethod
     def clean(self) -> None:
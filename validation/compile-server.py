@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Starts, stops, or reports on the warm JVM compile server used by the Java and
+Kotlin snippet validators. While it runs, validate-code-snippets.py sends its
+compiler invocations to the server instead of launching a fresh kotlinc/javac
+JVM, which skips JVM startup and compiler warm-up on every run.
+
+Usage:
+    python3 validation/compile-server.py start
+    python3 validation/compile-server.py status
+    python3 validation/compile-server.py stop
+"""
+
+import sys
+from pathlib import Path
+
+# Add the validation/ directory to sys.path so the android package is importable
+sys.path.insert(0, str(Path(__file__).parent))
+
+from android import compile_server
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Manage the warm compile server for snippet validation."
+    )
+    parser.add_argument("action", choices=["start", "stop", "status"])
+    args = parser.parse_args()
+
+    if args.action == "start":
+        client = compile_server.start_server()
+        print(f"Compile server running on port {client.port}.")
+    elif args.action == "stop":
+        if compile_server.stop_server():
+            print("Compile server stopped.")
+        else:
+            print("No compile server running.")
+    else:
+        client = compile_server.connect()
+        if client:
+            print(f"Compile server running on port {client.port}.")
+        else:
+            print("No compile server running.")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+from .plugin import CSharpPlugin
+
+plugin = CSharpPlugin()
@@ -0,0 +1,261 @@
+"""
+C#-specific validation plugin.
+"""
+
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from textwrap import indent
+from typing import Iterable
+
+from android import ELLIPSIS_LINE, file_digest, fingerprint, write_generated_sources
+from base import CompileResult, Failure, LanguagePlugin, Snippet, ToolchainUnavailable
+from dotnet import (
+    BUILD_DIR,
+    GENERATED_DIR,
+    PROJECT_TEMPLATE,
+    SHARED_SOURCES_DIR,
+    build,
+    dotnet_version,
+    find_dotnet,
+    reference_digest,
+)
+
+# =============================================================================
+# C#-specific constants
+# =============================================================================
+
+_ERROR_RE = re.compile(r"^(.+?\.cs)\((\d+),\d+\): error (CS\d+): (.+?)(?: \[[^\]]+\])?$", re.MULTILINE)
+
+# Part of every snippet's cache key. Bump it whenever _generate_source or the
+# project template change in a way that can change compile results.
+_TEMPLATE_VERSION = 1
+
+# `using Foo.Bar;`, `using static Foo.Bar;` or `using Alias = Foo.Bar;` at column 0
+_USING_DIRECTIVE = re.compile(r"^using\s+(?:static\s+)?[\w.]+(?:\s*=\s*[\w.<>, ]+)?\s*;\s*$")
+# A member or type declaration at column 0 (e.g. `private void OnScan(...)`,
+# `public class Listener : ...`) — hoisted out of Validate() into the class body.
+_MEMBER_DECL = re.compile(
+    r"^(?:(?:public|private|protected|internal|static|override|virtual|abstract|"
+    r"sealed|partial|readonly|async|new)\s+)+\S"
+    r"|^(?:class|interface|record|struct|enum)\s+\w+"
+)
+_ATTRIBUTE_LINE = re.compile(r"^\[.+\]\s*$")
+
+# =============================================================================
+# C# source generation utilities
+# =============================================================================
+
+
+def _platform(page: Path) -> str:
+    """The .NET platform a docs page is written for."""
+    return "ios" if "net/ios" in page.as_posix() else "android"
+
+
+def _platforms(snippet: Snippet) -> list[str]:
+    """The .NET platforms whose assemblies *snippet* is compiled against:
+    that of its page, or of every page importing its partial."""
+    return sorted({_platform(page) for page in snippet.importers or {snippet.source_file}})
+
+
+def _split_usings(content: str) -> tuple[list[str], str]:
+    """Peel off any `using …;` directives the snippet itself contains.
+    Returns (usings_list, remaining_content)."""
+    usings: list[str] = []
+    body: list[str] = []
+    for line in content.split("\n"):
+        if _USING_DIRECTIVE.match(line):
+            usings.append(line.strip())
+        else:
+            body.append(line)
+    return usings, "\n".join(body)
+
+
+def _extract_member(lines: list[str], start: int) -> tuple[str, int]:
+    """Collect one declaration starting at lines[start]: up to its closing
+    brace (which may open on a later line), or up to the `;` ending a field,
+    expression-bodied member or abstract signature.
+    Returns (member_text, next_index)."""
+    depth = 0
+    opened = False
+    i = start
+    while i < len(lines):
+        line = lines[i]
+        depth += line.count("{") - line.count("}")
+        opened = opened or "{" in line
+        i += 1
+        if opened and depth <= 0:
+            break
+        if not opened and line.rstrip().endswith(";"):
+            break
+    return "\n".join(lines[start:i]), i
+
+
+def _split_members(content: str) -> tuple[list[str], str]:
+    """Extract member and type declarations from snippet content, together
+    with any attribute lines directly above them.
+
+    Returns (members, remaining): members go into the generated class body,
+    the rest into Validate()."""
+    lines = content.split("\n")
+    members: list[str] = []
+    remaining: list[str] = []
+    i = 0
+    while i < len(lines):
+        j = i
+        while j < len(lines) and _ATTRIBUTE_LINE.match(lines[j]):
+            j += 1
+        if j < len(lines) and _MEMBER_DECL.match(lines[j]):
+            member, next_i = _extract_member(lines, j)
+            members.append("\n".join(lines[i:j] + [member]))
+            i = next_i
+        else:
+            remaining.append(lines[i])
+            i += 1
+    return members, "\n".join(remaining)
+
+
+# =============================================================================
+# CSharpPlugin
+# =============================================================================
+
+
+class CSharpPlugin(LanguagePlugin):
+    # The web SDK docs contain C# server-side samples, not .NET SDK snippets.
+    excluded_doc_dirs = frozenset({Path("sdks") / "web"})
+
+    @property
+    def name(self) -> str:
+        return "C#"
+
+    @property
+    def value(self) -> str:
+        return "csharp"
+
+    def prepare(self) -> None:
+        try:
+            find_dotnet()
+        except FileNotFoundError as e:
+            raise ToolchainUnavailable(str(e)) from e
+
+    def content_key(self, snippet: Snippet) -> str:
+        # The same code block in the Android and iOS guides compiles against
+        # different assemblies, so the two are compiled separately.
+        return f"{'+'.join(_platforms(snippet))}:{snippet.hash}"
+
+    def toolchain_fingerprint(self, sdk_version: str) -> str:
+        return fingerprint(
+            f"csharp-template-{_TEMPLATE_VERSION}",
+            file_digest(PROJECT_TEMPLATE),
+            *(file_digest(p) for p in sorted(SHARED_SOURCES_DIR.glob("*.cs"))),
+            dotnet_version(),
+            reference_digest(sdk_version, "android"),
+            reference_digest(sdk_version, "ios"),
+        )
+
+    def _generate_source(self, class_name: str, snippet: Snippet) -> str:
+        extra_usings, body = _split_usings(snippet.content)
+        body = ELLIPSIS_LINE.sub("// ...", body)
+        members, body = _split_members(body)
+
+        usings_block = ("\n".join(extra_usings) + "\n\n") if extra_usings else ""
+        members_section = ""
+        if members:
+            members_section = "\n\n".join(indent(m, "        ") for m in members) + "\n\n"
+
+        indented_body = indent(body, "            ")
+
+        return (
+            f"{usings_block}"
+            f"namespace Scandit.Validation\n"
+            f"{{\n"
+            f"    // Source: {snippet.source_file}, snippet {snippet.index}\n"
+            f"    public class {class_name} : ValidationBase\n"
+            f"    {{\n"
+            f"{members_section}"
+            f"        public async Task Validate()\n"
+            f"        {{\n"
+            f"{indented_body}\n"
+            f"        }}\n"
+            f"    }}\n"
+            f"}}\n"
+        )
+
+    def generate_sources(self, snippets: Iterable[Snippet]) -> None:
+        def sources():
+            for snippet in snippets:
+                class_name = self._class_name(snippet)
+                yield class_name, self._generate_source(class_name, snippet)
+
+        write_generated_sources(sources(), ".cs", f"Snippet_{self.value}_", None, GENERATED_DIR)
+
+    def clean(self) -> None:
+        if GENERATED_DIR.exists():
+            shutil.rmtree(GENERATED_DIR)
+        if BUILD_DIR.exists():
+            shutil.rmtree(BUILD_DIR)
+
+    def _build_platform(self, sdk_version: str, platform: str, class_names: list[str]) -> dict[str, list[str]]:
+        """Build *class_names* into one assembly for *platform* and return the
+        error messages keyed by class name."""
+        returncode, output = build(
+            sdk_version, platform, [GENERATED_DIR / f"{cn}.cs" for cn in class_names]
+        )
+        errors_by_cn: dict[str, list[str]] = {}
+        if returncode == 0:
+            return errors_by_cn
+        shared_errors: list[str] = []
+        seen: set[tuple[str, ...]] = set()
+        for m in _ERROR_RE.finditer(output):
+            if m.groups() in seen:
+                continue
+            seen.add(m.groups())
+            path = Path(m.group(1))
+            message = f"  line {m.group(2)}: {m.group(3)}: {m.group(4).strip()}"
+            if path.stem in class_names:
+                errors_by_cn.setdefault(path.stem, []).append(message)
+            else:
+                shared_errors.append(f"  {path.name}: {message.strip()}")
+        if shared_errors or (not errors_by_cn and not seen):
+            raise RuntimeError(
+                f"C# test-bed failed to build for {platform}:\n"
+                + ("\n".join(shared_errors) or output)
+            )
+        return errors_by_cn
+
+    def compile(self, snippets: list[Snippet], sdk_version: str) -> CompileResult:
+        """Compile the snippets of each platform in one `dotnet build`, the
+        Android and iOS builds in parallel. A partial imported by both
+        Android and iOS pages is compiled in both builds.
+
+        MSBuild worker nodes and the Roslyn compiler server are reused across
+        builds, so after the first build of a session each compile only pays
+        for the compilation itself."""
+        if not snippets:
+            return CompileResult(failures=[])
+
+        snippet_by_class_name = {self._class_name(s): s for s in snippets}
+        by_platform: dict[str, list[str]] = {}
+        for cn, snippet in snippet_by_class_name.items():
+            for platform in _platforms(snippet):
+                by_platform.setdefault(platform, []).append(cn)
+
+        with ThreadPoolExecutor(max_workers=len(by_platform)) as pool:
+            futures = {
+                platform: pool.submit(self._build_platform, sdk_version, platform, class_names)
+                for platform, class_names in by_platform.items()
+            }
+            errors_by_cn: dict[str, list[str]] = {}
+            for platform, future in futures.items():
+                for cn, errors in future.result().items():
+                    if len(_platforms(snippet_by_class_name[cn])) > 1:
+                        errors = [f"  [{platform}] {e.strip()}" for e in errors]
+                    errors_by_cn.setdefault(cn, []).extend(errors)
+
+        return CompileResult(
+            failures=[
+                Failure(snippet=snippet_by_class_name[cn], errors=errs)
+                for cn, errs in errors_by_cn.items()
+            ]
+        )
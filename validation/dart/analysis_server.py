@@ -0,0 +1,332 @@
+"""
+Per-version analysis projects and a client for the persistent Dart analysis server.
+
+One server process (`dart language-server --protocol=analyzer`) serves the
+whole validation run. Generated snippets are sent to it as overlays, so it
+never waits for file-system events and only re-analyzes overlays whose
+content changed.
+"""
+
+import atexit
+import functools
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+# =============================================================================
+# Paths and constants
+# =============================================================================
+
+TEST_BED_DIR = Path(__file__).parent / "test-bed"
+PUBSPEC_TEMPLATE = TEST_BED_DIR / "pubspec.template.yaml"
+VALIDATION_BASE_DART = TEST_BED_DIR / "lib" / "validation_base.dart"
+GENERATED_DIR = TEST_BED_DIR / "src" / "generated"
+BUILD_DIR = TEST_BED_DIR / "build"
+PUB_CACHE_DIR = TEST_BED_DIR / ".pub-cache"
+LOG_FILE = BUILD_DIR / "analysis-server.log"
+
+# An `export 'package:<name>/<path>' …;` line of validation_base.dart
+_EXPORT_LINE = re.compile(r"^export 'package:(\w+)/([^']+)'[^\n]*\n", re.M)
+
+# =============================================================================
+# Toolchain
+# =============================================================================
+
+
+def find_flutter() -> str:
+    """Locate the Flutter CLI via FLUTTER_ROOT or PATH."""
+    root = os.environ.get("FLUTTER_ROOT")
+    if root:
+        path = Path(root) / "bin" / "flutter"
+        if path.exists():
+            return str(path)
+    if shutil.which("flutter"):
+        return "flutter"
+    raise FileNotFoundError("'flutter' not found. Set FLUTTER_ROOT or add flutter to PATH.")
+
+
+def find_dart() -> str:
+    """The dart executable of the Flutter SDK, whose analyzer knows the
+    Flutter packages' SDK constraints."""
+    flutter = Path(shutil.which(find_flutter()) or find_flutter()).resolve()
+    dart = flutter.parent / "dart"
+    return str(dart) if dart.exists() else "dart"
+
+
+@functools.lru_cache(maxsize=None)
+def flutter_version() -> str:
+    r = subprocess.run(
+        [find_flutter(), "--version", "--machine"], capture_output=True, text=True, env=_env()
+    )
+    try:
+        info = json.loads(r.stdout[r.stdout.index("{"):])
+    except ValueError:
+        return r.stdout.strip()
+    return f"flutter-{info.get('frameworkVersion')}-dart-{info.get('dartSdkVersion')}"
+
+
+def _env() -> dict:
+    return {**os.environ, "PUB_CACHE": str(PUB_CACHE_DIR), "FLUTTER_SUPPRESS_ANALYTICS": "true"}
+
+
+# =============================================================================
+# Per-version analysis projects
+# =============================================================================
+
+_project_lock = threading.Lock()
+_project_memo: dict[str, dict] = {}
+
+
+def _project_path(sdk_version: str) -> Path:
+    return BUILD_DIR / sdk_version
+
+
+def _missing_packages(pubspec: str) -> list[tuple[str, str]]:
+    """(name, version) of the hosted dependencies in *pubspec* that the test
+    bed's package cache does not hold."""
+    hosted = PUB_CACHE_DIR / "hosted" / "pub.dev"
+    dependencies = pubspec.split("\ndependencies:", 1)[-1]
+    missing = []
+    for name, version in re.findall(r"^  (\w+): (\S+)$", dependencies, re.M):
+        pattern = f"{name}-*" if version == "any" else f"{name}-{version}"
+        if not any(hosted.glob(pattern)):
+            missing.append((name, version))
+    return missing
+
+
+def _pub_get(project: Path, pubspec: str) -> None:
+    """Resolve *project* from the test bed's package cache, without network
+    access. Raises RuntimeError naming the packages to fetch if the cache
+    does not hold them."""
+    r = subprocess.run(
+        [find_flutter(), "pub", "get", "--offline"],
+        cwd=project, capture_output=True, text=True, env=_env(),
+    )
+    if r.returncode == 0:
+        return
+    missing = _missing_packages(pubspec)
+    if not missing:
+        raise RuntimeError(f"flutter pub get --offline failed in {project}:\n{r.stdout}{r.stderr}")
+    fetch = "\n".join(
+        f"  PUB_CACHE={PUB_CACHE_DIR} flutter pub cache add {name}"
+        + ("" if version == "any" else f" --version {version}")
+        for name, version in missing
+    )
+    raise RuntimeError(
+        f"{', '.join(f'{n} {v}' for n, v in missing)} not in {PUB_CACHE_DIR}. "
+        f"Fetch them once with:\n{fetch}"
+    )
+
+
+def _write_base(project: Path) -> None:
+    """Copy validation_base.dart into *project* without the exports of
+    libraries that its resolved packages do not have. Exports of packages
+    that were not resolved at all are kept, so the analyzer reports them."""
+    dart_tool = project / ".dart_tool"
+    config = json.loads((dart_tool / "package_config.json").read_text(encoding="utf-8"))
+    libraries = {}
+    for package in config["packages"]:
+        root = package["rootUri"]
+        if root.startswith("file:"):
+            root = Path(url2pathname(urlparse(root).path))
+        else:
+            root = dart_tool / root
+        libraries[package["name"]] = root / package.get("packageUri", "lib/")
+
+    def available(m: re.Match) -> str:
+        library = libraries.get(m[1])
+        return m[0] if library is None or (library / m[2]).exists() else ""
+
+    text = _EXPORT_LINE.sub(available, VALIDATION_BASE_DART.read_text(encoding="utf-8"))
+    base = project / "lib" / VALIDATION_BASE_DART.name
+    if not base.exists() or base.read_text(encoding="utf-8") != text:
+        base.write_text(text, encoding="utf-8")
+
+
+def _project_entry(sdk_version: str) -> dict:
+    """Set up the analysis project for one SDK version, resolving packages
+    only when the pubspec template or Flutter version changed."""
+    with _project_lock:
+        if sdk_version in _project_memo:
+            return _project_memo[sdk_version]
+        project = _project_path(sdk_version)
+        pubspec = PUBSPEC_TEMPLATE.read_text(encoding="utf-8").replace("{sdk_version}", sdk_version)
+        stamp_file = project / "resolve.json"
+        key = hashlib.sha256(
+            f"{pubspec}\0{flutter_version()}".encode()
+        ).hexdigest()
+        try:
+            entry = json.loads(stamp_file.read_text(encoding="utf-8"))
+            if entry["key"] != key or not (project / "pubspec.lock").exists():
+                entry = None
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            entry = None
+
+        (project / "lib").mkdir(parents=True, exist_ok=True)
+        if entry is None:
+            (project / "pubspec.yaml").write_text(pubspec, encoding="utf-8")
+            _pub_get(project, pubspec)
+            lock_digest = hashlib.sha256((project / "pubspec.lock").read_bytes()).hexdigest()
+            entry = {"key": key, "digest": lock_digest}
+            stamp_file.write_text(json.dumps(entry), encoding="utf-8")
+        _write_base(project)
+
+        _project_memo[sdk_version] = entry
+        return entry
+
+
+def project_dir(sdk_version: str) -> Path:
+    """The analysis project for *sdk_version*, set up on first use."""
+    _project_entry(sdk_version)
+    return _project_path(sdk_version)
+
+
+def packages_digest(sdk_version: str) -> str:
+    """Digest of the package versions resolved for *sdk_version*."""
+    return _project_entry(sdk_version)["digest"]
+
+
+# =============================================================================
+# Client
+# =============================================================================
+
+
+class AnalysisServerClient:
+    """Sends requests to an analysis server over its stdin/stdout.
+
+    Requests may be issued from several threads at once; a reader thread
+    matches responses to requests by id and drops notifications."""
+
+    def __init__(self):
+        LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with LOG_FILE.open("a", encoding="utf-8") as log:
+            self.process = subprocess.Popen(
+                [
+                    find_dart(),
+                    "language-server",
+                    "--protocol=analyzer",
+                    "--client-id=scandit-snippet-validation",
+                    "--suppress-analytics",
+                ],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=log,
+                text=True,
+                encoding="utf-8",
+                env=_env(),
+            )
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._pending: dict[str, Future] = {}
+        self._roots_lock = threading.Lock()
+        self._roots: set[str] = set()
+        self._checked_bases: set[str] = set()
+        threading.Thread(target=self._read_responses, daemon=True).start()
+
+    def _read_responses(self):
+        for line in self.process.stdout:
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            future = self._pending.pop(message.get("id"), None) if "id" in message else None
+            if future is None:
+                continue
+            if "error" in message:
+                future.set_exception(
+                    RuntimeError(f"Dart analysis server failed: {message['error'].get('message')}")
+                )
+            else:
+                future.set_result(message.get("result") or {})
+        for future in list(self._pending.values()):
+            future.set_exception(RuntimeError(f"Dart analysis server exited. See {LOG_FILE}"))
+        self._pending.clear()
+
+    def send(self, method: str, params: dict) -> Future:
+        """Send one request and return a future for its result."""
+        future: Future = Future()
+        with self._lock:
+            self._next_id += 1
+            request_id = str(self._next_id)
+            self._pending[request_id] = future
+            try:
+                self.process.stdin.write(
+                    json.dumps({"id": request_id, "method": method, "params": params}) + "\n"
+                )
+                self.process.stdin.flush()
+            except OSError:
+                self._pending.pop(request_id, None)
+                future.set_exception(
+                    RuntimeError(f"Dart analysis server exited. See {LOG_FILE}")
+                )
+        return future
+
+    def add_root(self, project: Path) -> None:
+        """Add *project* to the analysis roots, and check its base file once."""
+        with self._roots_lock:
+            if str(project) not in self._roots:
+                self._roots.add(str(project))
+                self.send(
+                    "analysis.setAnalysisRoots", {"included": sorted(self._roots), "excluded": []}
+                ).result()
+        base = str(project / "lib" / VALIDATION_BASE_DART.name)
+        if base in self._checked_bases:
+            return
+        errors = self.errors([base])[base]
+        if errors:
+            raise RuntimeError(
+                f"{VALIDATION_BASE_DART.name} failed to analyze:\n"
+                + "\n".join(f"  line {e['location']['startLine']}: {e['message']}" for e in errors)
+            )
+        self._checked_bases.add(base)
+
+    def set_overlays(self, contents: dict[str, str]) -> None:
+        """Make the server read *contents* instead of the files on disk."""
+        self.send(
+            "analysis.updateContent",
+            {"files": {path: {"type": "add", "content": text} for path, text in contents.items()}},
+        ).result()
+
+    def errors(self, paths: list[str]) -> dict[str, list[dict]]:
+        """Error-severity diagnostics of each file in *paths*, analyzing them
+        first if needed. The requests are pipelined."""
+        futures = {path: self.send("analysis.getErrors", {"file": path}) for path in paths}
+        return {
+            path: [e for e in future.result()["errors"] if e["severity"] == "ERROR"]
+            for path, future in futures.items()
+        }
+
+    def close(self):
+        if self.process.poll() is None:
+            try:
+                self.send("server.shutdown", {}).result(timeout=10)
+            except Exception:
+                pass
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+_client_lock = threading.Lock()
+_client: Optional[AnalysisServerClient] = None
+
+
+def client() -> AnalysisServerClient:
+    """The analysis server of this run, started on first use and stopped
+    when the run exits."""
+    global _client
+    with _client_lock:
+        if _client is None or _client.process.poll() is not None:
+            _client = AnalysisServerClient()
+            atexit.register(_client.close)
+        return _client
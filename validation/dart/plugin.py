@@ -0,0 +1,217 @@
+"""
+Dart-specific validation plugin.
+"""
+
+import re
+import shutil
+from pathlib import Path
+from textwrap import indent
+from typing import Iterable
+
+from android import ELLIPSIS_LINE, file_digest, fingerprint, write_generated_sources
+from base import CompileResult, Failure, LanguagePlugin, Snippet, ToolchainUnavailable
+from dart import analysis_server
+from dart.analysis_server import (
+    BUILD_DIR,
+    GENERATED_DIR,
+    PUBSPEC_TEMPLATE,
+    VALIDATION_BASE_DART,
+    find_flutter,
+    flutter_version,
+    packages_digest,
+)
+import timing
+
+# =============================================================================
+# Dart-specific constants
+# =============================================================================
+
+# Part of every snippet's cache key. Bump it whenever _generate_source changes
+# in a way that can change analysis results.
+_TEMPLATE_VERSION = 1
+
+# `import 'package:…';` (with optional prefix, show or hide) at column 0
+_IMPORT_DIRECTIVE = re.compile(r"""^import\s+['"][^'"]+['"][^;]*;\s*$""")
+# A type declaration at column 0. Dart has no local types, so these are
+# hoisted to library scope, before the generated class.
+_TYPE_DECL = re.compile(
+    r"^(?:(?:abstract|base|final|interface|sealed|mixin)\s+)*(?:class|mixin|enum|extension|typedef)\b"
+)
+# An annotation line such as `@override` or `@pragma('vm:prefer-inline')`
+_ANNOTATION_LINE = re.compile(r"^@\w+(?:\(.*\))?\s*$")
+
+# =============================================================================
+# Dart source generation utilities
+# =============================================================================
+
+
+def _split_imports(content: str) -> tuple[list[str], str]:
+    """Peel off any `import '…';` directives the snippet itself contains.
+    Returns (imports_list, remaining_content)."""
+    imports: list[str] = []
+    body: list[str] = []
+    for line in content.split("\n"):
+        if _IMPORT_DIRECTIVE.match(line):
+            imports.append(line.strip())
+        else:
+            body.append(line)
+    return imports, "\n".join(body)
+
+
+def _extract_declaration(lines: list[str], start: int) -> tuple[str, int]:
+    """Collect one declaration starting at lines[start]: up to its closing
+    brace, or up to the `;` ending an expression body or field.
+    Returns (declaration_text, next_index)."""
+    depth = 0
+    opened = False
+    i = start
+    while i < len(lines):
+        line = lines[i]
+        depth += line.count("{") - line.count("}")
+        opened = opened or "{" in line
+        i += 1
+        if opened and depth <= 0:
+            break
+        if not opened and line.rstrip().endswith(";"):
+            break
+    return "\n".join(lines[start:i]), i
+
+
+def _split_declarations(content: str) -> tuple[list[str], list[str], str]:
+    """Extract declarations that cannot live inside validate().
+
+    Returns (types, members, remaining):
+    - types: class, mixin, enum, extension and typedef declarations, placed
+      at library scope.
+    - members: annotated declarations (e.g. an `@override` method), placed
+      in the generated class body.
+    - remaining: the rest of the content destined for ``validate()``.
+    """
+    lines = content.split("\n")
+    types: list[str] = []
+    members: list[str] = []
+    remaining: list[str] = []
+    i = 0
+    while i < len(lines):
+        j = i
+        while j < len(lines) and _ANNOTATION_LINE.match(lines[j]):
+            j += 1
+        if j < len(lines) and _TYPE_DECL.match(lines[j]):
+            declaration, next_i = _extract_declaration(lines, j)
+            types.append("\n".join(lines[i:j] + [declaration]))
+            i = next_i
+        elif j > i and j < len(lines):
+            declaration, next_i = _extract_declaration(lines, j)
+            members.append("\n".join(lines[i:j] + [declaration]))
+            i = next_i
+        else:
+            remaining.append(lines[i])
+            i += 1
+    return types, members, "\n".join(remaining)
+
+
+# =============================================================================
+# DartPlugin
+# =============================================================================
+
+
+class DartPlugin(LanguagePlugin):
+    @property
+    def name(self) -> str:
+        return "Dart"
+
+    @property
+    def value(self) -> str:
+        return "dart"
+
+    def prepare(self) -> None:
+        try:
+            find_flutter()
+        except FileNotFoundError as e:
+            raise ToolchainUnavailable(str(e)) from e
+
+    def toolchain_fingerprint(self, sdk_version: str) -> str:
+        return fingerprint(
+            f"dart-template-{_TEMPLATE_VERSION}",
+            file_digest(VALIDATION_BASE_DART),
+            file_digest(PUBSPEC_TEMPLATE),
+            flutter_version(),
+            packages_digest(sdk_version),
+        )
+
+    def _generate_source(self, class_name: str, snippet: Snippet) -> str:
+        extra_imports, body = _split_imports(snippet.content)
+        body = ELLIPSIS_LINE.sub("// ...", body)
+        types, members, body = _split_declarations(body)
+
+        extra_block = ("\n" + "\n".join(extra_imports)) if extra_imports else ""
+        types_block = ("\n\n" + "\n\n".join(types)) if types else ""
+        members_section = ""
+        if members:
+            members_section = "\n" + "\n\n".join(indent(m, "  ") for m in members) + "\n"
+
+        indented_body = indent(body, "    ")
+
+        return (
+            f"// ignore_for_file: type=lint\n"
+            f"import 'package:scandit_validation/validation_base.dart';"
+            f"{extra_block}{types_block}\n\n"
+            f"// Source: {snippet.source_file}, snippet {snippet.index}\n"
+            f"class {class_name} extends ValidationBase {{{members_section}\n"
+            f"  Future<void> validate() async {{\n"
+            f"{indented_body}\n"
+            f"  }}\n"
+            f"}}\n"
+        )
+
+    def generate_sources(self, snippets: Iterable[Snippet]) -> None:
+        def sources():
+            for snippet in snippets:
+                class_name = self._class_name(snippet)
+                yield class_name, self._generate_source(class_name, snippet)
+
+        write_generated_sources(sources(), ".dart", f"Snippet_{self.value}_", None, GENERATED_DIR)
+
+    def clean(self) -> None:
+        if GENERATED_DIR.exists():
+            shutil.rmtree(GENERATED_DIR)
+        if BUILD_DIR.exists():
+            shutil.rmtree(BUILD_DIR)
+
+    def compile(self, snippets: list[Snippet], sdk_version: str) -> CompileResult:
+        """Analyze the snippets on the run's persistent analysis server.
+
+        Each generated file is sent as an overlay inside the analysis project
+        of *sdk_version*, so the server resolves it against that version's
+        packages and re-analyzes only overlays whose content changed."""
+        if not snippets:
+            return CompileResult(failures=[])
+
+        project = analysis_server.project_dir(sdk_version)
+        server = analysis_server.client()
+        server.add_root(project)
+
+        snippet_by_path = {
+            str(project / "lib" / "generated" / f"{self._class_name(s)}.dart"): s
+            for s in snippets
+        }
+        with timing.span("dart analysis", "tool", files=len(snippet_by_path)):
+            server.set_overlays({
+                path: (GENERATED_DIR / Path(path).name).read_text(encoding="utf-8")
+                for path in snippet_by_path
+            })
+            errors_by_path = server.errors(list(snippet_by_path))
+
+        failures: list[Failure] = []
+        for path, errors in errors_by_path.items():
+            if errors:
+                failures.append(
+                    Failure(
+                        snippet=snippet_by_path[path],
+                        errors=[
+                            f"  line {e['location']['startLine']}: {e['code']}: {e['message']}"
+                            for e in errors
+                        ],
+                    )
+                )
+        return CompileResult(failures=failures)
@@ -0,0 +1,35 @@
+// Base class for generated Dart snippet validators.
+//
+// Re-exports the Flutter and Scandit libraries that documentation snippets use
+// without importing them, and pre-declares the variables most commonly
+// referenced across snippet sections within a single documentation page.
+// The exports are a superset across SDK versions: each version's analysis
+// project gets a copy without the libraries its packages do not have.
+
+export 'package:flutter/material.dart' hide Feedback;
+export 'package:scandit_flutter_datacapture_core/scandit_flutter_datacapture_core.dart';
+export 'package:scandit_flutter_datacapture_barcode/scandit_flutter_datacapture_barcode.dart';
+export 'package:scandit_flutter_datacapture_barcode/scandit_flutter_datacapture_barcode_capture.dart';
+export 'package:scandit_flutter_datacapture_barcode/scandit_flutter_datacapture_barcode_tracking.dart';
+export 'package:scandit_flutter_datacapture_barcode/scandit_flutter_datacapture_barcode_batch.dart';
+export 'package:scandit_flutter_datacapture_barcode/scandit_flutter_datacapture_barcode_selection.dart';
+export 'package:scandit_flutter_datacapture_barcode/scandit_flutter_datacapture_barcode_count.dart';
+export 'package:scandit_flutter_datacapture_barcode/scandit_flutter_datacapture_barcode_find.dart';
+export 'package:scandit_flutter_datacapture_barcode/scandit_flutter_datacapture_barcode_pick.dart';
+export 'package:scandit_flutter_datacapture_barcode/scandit_flutter_datacapture_spark_scan.dart';
+export 'package:scandit_flutter_datacapture_barcode/scandit_flutter_datacapture_barcode_ar.dart';
+export 'package:scandit_flutter_datacapture_id/scandit_flutter_datacapture_id.dart';
+export 'package:scandit_flutter_datacapture_label/scandit_flutter_datacapture_label.dart';
+export 'package:scandit_flutter_datacapture_parser/scandit_flutter_datacapture_parser.dart';
+
+import 'package:scandit_flutter_datacapture_core/scandit_flutter_datacapture_core.dart';
+
+abstract class ValidationBase {
+  static const String licenseKey = '-- ENTER YOUR SCANDIT LICENSE KEY HERE --';
+
+  // Core SDK
+  late DataCaptureContext context;
+  late DataCaptureContext dataCaptureContext;
+  late Camera camera;
+  late DataCaptureView dataCaptureView;
+}
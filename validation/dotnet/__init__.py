@@ -0,0 +1,293 @@
+"""
+Shared .NET infrastructure for .NET language validation plugins.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import re
+import shutil
+import struct
+import subprocess
+import threading
+from pathlib import Path
+
+import timing
+
+# =============================================================================
+# Paths and constants
+# =============================================================================
+
+DOTNET_PROJECT_DIR = Path(__file__).parent / "test-bed"
+PROJECT_TEMPLATE = DOTNET_PROJECT_DIR / "SnippetValidation.csproj"
+SHARED_SOURCES_DIR = DOTNET_PROJECT_DIR / "src" / "shared"
+GENERATED_DIR = DOTNET_PROJECT_DIR / "src" / "generated"
+BUILD_DIR = DOTNET_PROJECT_DIR / "build"
+
+PLATFORMS = ("android", "ios")
+
+# Shared global usings compiled for every platform, and for one platform only
+_GLOBAL_USINGS = SHARED_SOURCES_DIR / "GlobalUsings.cs"
+_PLATFORM_GLOBAL_USINGS = {
+    "android": SHARED_SOURCES_DIR / "GlobalUsings.Android.cs",
+    "ios": SHARED_SOURCES_DIR / "GlobalUsings.iOS.cs",
+}
+_GLOBAL_USING = re.compile(r"^global using ([\w.]+);\s*$")
+
+# Keep the CLI quiet and its output parseable; MSBuild nodes and the Roslyn
+# compiler server (VBCSCompiler) stay alive between builds, so only the first
+# build of a session pays for starting and JIT-ing them.
+_DOTNET_ENV = {
+    "DOTNET_CLI_TELEMETRY_OPTOUT": "1",
+    "DOTNET_NOLOGO": "1",
+    "DOTNET_SKIP_FIRST_TIME_EXPERIENCE": "1",
+    "MSBUILDTERMINALLOGGER": "off",
+}
+_BUILD_SERVER_FLAGS = ["-nodeReuse:true", "-p:UseSharedCompilation=true"]
+
+# =============================================================================
+# Toolchain
+# =============================================================================
+
+
+def find_dotnet() -> str:
+    """Locate the dotnet CLI via DOTNET_ROOT or PATH."""
+    root = os.environ.get("DOTNET_ROOT")
+    if root:
+        path = Path(root) / "dotnet"
+        if path.exists():
+            return str(path)
+    if shutil.which("dotnet"):
+        return "dotnet"
+    raise FileNotFoundError("'dotnet' not found. Set DOTNET_ROOT or add dotnet to PATH.")
+
+
+@functools.lru_cache(maxsize=None)
+def dotnet_version() -> str:
+    r = subprocess.run(
+        [find_dotnet(), "--version"], capture_output=True, text=True, env=_env()
+    )
+    return r.stdout.strip()
+
+
+def _env() -> dict:
+    return {**os.environ, **_DOTNET_ENV}
+
+
+def _run_dotnet(args: list[str], cwd: Path) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [find_dotnet()] + args, cwd=cwd, capture_output=True, text=True, env=_env()
+    )
+
+
+# =============================================================================
+# Per-version projects and reference assemblies
+# =============================================================================
+
+_project_lock = threading.Lock()
+_project_memo: dict[tuple[str, str], dict] = {}
+
+
+def _project_dir(sdk_version: str, platform: str) -> Path:
+    return BUILD_DIR / f"{sdk_version}-{platform}"
+
+
+def _msbuild_properties(sdk_version: str, platform: str) -> list[str]:
+    return [
+        f"-p:ScanditSdkVersion={sdk_version}",
+        f"-p:SnippetPlatform={platform}",
+        f"-p:SnippetTestBedDir={DOTNET_PROJECT_DIR}{os.sep}",
+    ]
+
+
+def _restore_key(sdk_version: str, platform: str) -> str:
+    digest = hashlib.sha256(f"{sdk_version}\0{platform}\0{dotnet_version()}".encode())
+    digest.update(PROJECT_TEMPLATE.read_bytes())
+    return digest.hexdigest()
+
+
+def _resolve_references(project: Path, sdk_version: str, platform: str) -> list[str]:
+    """Ask MSBuild for the reference assemblies the restored project resolves."""
+    r = _run_dotnet(
+        ["msbuild", str(project), "-getItem:Reference", "-nologo"]
+        + _msbuild_properties(sdk_version, platform),
+        project.parent,
+    )
+    if r.returncode != 0:
+        raise RuntimeError(
+            f"could not resolve .NET reference assemblies for {platform}:\n{r.stdout}{r.stderr}"
+        )
+    items = json.loads(r.stdout).get("Items", {}).get("Reference", [])
+    return sorted(item["FullPath"] for item in items)
+
+
+def _assembly_namespaces(path: Path) -> set[str]:
+    """Namespaces (and their parent namespaces) of the types an assembly
+    defines, read from the TypeDef table of its ECMA-335 metadata."""
+    data = path.read_bytes()
+
+    def u16(offset: int) -> int:
+        return struct.unpack_from("<H", data, offset)[0]
+
+    def u32(offset: int) -> int:
+        return struct.unpack_from("<I", data, offset)[0]
+
+    coff = u32(0x3C) + 4
+    optional = coff + 20
+    data_dirs = optional + (96 if u16(optional) == 0x10B else 112)
+    sections = [
+        struct.unpack_from("<IIII", data, optional + u16(coff + 16) + 40 * i + 8)
+        for i in range(u16(coff + 2))
+    ]
+
+    def file_offset(rva: int) -> int:
+        for virtual_size, address, raw_size, raw_pointer in sections:
+            if address <= rva < address + max(virtual_size, raw_size):
+                return raw_pointer + rva - address
+        raise ValueError(f"{path.name}: RVA {rva:#x} is outside every section")
+
+    cli_header = u32(data_dirs + 14 * 8)
+    if not cli_header:
+        return set()  # a native library
+    root = file_offset(u32(file_offset(cli_header) + 8))
+    streams = {}
+    offset = root + 16 + u32(root + 12) + 2
+    stream_count = u16(offset)
+    offset += 2
+    for _ in range(stream_count):
+        end = data.index(b"\0", offset + 8)
+        streams[data[offset + 8:end].decode()] = root + u32(offset)
+        offset = (end + 4) & ~3
+    tables = streams.get("#~", streams.get("#-"))
+    strings = streams["#Strings"]
+
+    heap_sizes = data[tables + 6]
+    valid = struct.unpack_from("<Q", data, tables + 8)[0]
+    rows = {}
+    offset = tables + 24
+    for table in range(64):
+        if valid >> table & 1:
+            rows[table] = u32(offset)
+            offset += 4
+    string_index = 4 if heap_sizes & 1 else 2
+    guid_index = 4 if heap_sizes & 2 else 2
+
+    def index(*tables_: int, tag_bits: int = 0) -> int:
+        return 4 if max(rows.get(t, 0) for t in tables_) >= 1 << (16 - tag_bits) else 2
+
+    module_row = 2 + string_index + 3 * guid_index
+    type_ref_row = index(0x00, 0x1A, 0x23, 0x01, tag_bits=2) + 2 * string_index
+    type_def_row = (
+        4 + 2 * string_index + index(0x02, 0x01, 0x1B, tag_bits=2) + index(0x04) + index(0x06)
+    )
+    offset += rows.get(0x00, 0) * module_row + rows.get(0x01, 0) * type_ref_row
+    read_index = u32 if string_index == 4 else u16
+
+    namespaces = set()
+    for row in range(rows.get(0x02, 0)):
+        start = strings + read_index(offset + row * type_def_row + 4 + string_index)
+        namespace = data[start:data.index(b"\0", start)].decode()
+        while namespace and namespace not in namespaces:
+            namespaces.add(namespace)
+            namespace = namespace.rpartition(".")[0]
+    return namespaces
+
+
+def _write_global_usings(project_dir: Path, platform: str, namespaces: set[str]) -> None:
+    """Write the project's GlobalUsings.cs: the shared global usings of
+    *platform* without the namespaces its reference assemblies do not define."""
+    lines = []
+    for source in (_GLOBAL_USINGS, _PLATFORM_GLOBAL_USINGS[platform]):
+        for line in source.read_text(encoding="utf-8").splitlines():
+            m = _GLOBAL_USING.match(line)
+            if m is None or m[1] in namespaces:
+                lines.append(line)
+    text = "\n".join(lines) + "\n"
+    path = project_dir / _GLOBAL_USINGS.name
+    if not path.exists() or path.read_text(encoding="utf-8") != text:
+        path.write_text(text, encoding="utf-8")
+
+
+def _project_entry(sdk_version: str, platform: str) -> dict:
+    """Set up the build project for one SDK version and platform, restoring
+    it only when the template, SDK version or dotnet version changed."""
+    with _project_lock:
+        memo_key = (sdk_version, platform)
+        if memo_key in _project_memo:
+            return _project_memo[memo_key]
+        project_dir = _project_dir(sdk_version, platform)
+        project = project_dir / PROJECT_TEMPLATE.name
+        stamp_file = project_dir / "restore.json"
+        key = _restore_key(sdk_version, platform)
+        try:
+            entry = json.loads(stamp_file.read_text(encoding="utf-8"))
+            if entry["key"] != key or not all(Path(r).exists() for r in entry["references"]):
+                entry = None
+            elif "namespaces" not in entry:
+                entry = None
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            entry = None
+
+        if entry is None:
+            project_dir.mkdir(parents=True, exist_ok=True)
+            project.write_bytes(PROJECT_TEMPLATE.read_bytes())
+            with timing.span("dotnet restore", "tool", sdk_version=sdk_version, platform=platform):
+                r = _run_dotnet(
+                    ["restore", str(project)] + _msbuild_properties(sdk_version, platform),
+                    project_dir,
+                )
+            if r.returncode != 0:
+                raise RuntimeError(
+                    f"could not restore the Scandit .NET {sdk_version} packages for {platform}:\n"
+                    f"{r.stdout}{r.stderr}"
+                )
+            references = _resolve_references(project, sdk_version, platform)
+            digest = hashlib.sha256()
+            namespaces: set[str] = set()
+            for reference in references:
+                digest.update(Path(reference).name.encode())
+                digest.update(hashlib.sha256(Path(reference).read_bytes()).digest())
+                namespaces |= _assembly_namespaces(Path(reference))
+            entry = {
+                "key": key,
+                "references": references,
+                "digest": digest.hexdigest(),
+                "namespaces": sorted(namespaces),
+            }
+            stamp_file.write_text(json.dumps(entry), encoding="utf-8")
+        _write_global_usings(project_dir, platform, set(entry["namespaces"]))
+
+        entry["project"] = str(project)
+        _project_memo[memo_key] = entry
+        return entry
+
+
+def reference_digest(sdk_version: str, platform: str) -> str:
+    """Content digest of the reference assemblies for *platform*."""
+    return _project_entry(sdk_version, platform)["digest"]
+
+
+def build(sdk_version: str, platform: str, sources: list[Path]) -> tuple[int, str]:
+    """Compile *sources* together with the shared sources in one build of the
+    project for *sdk_version* and *platform*. Returns (exit_code, output)."""
+    entry = _project_entry(sdk_version, platform)
+    project = Path(entry["project"])
+    snippet_list = project.parent / "snippets.sources"
+    snippet_list.write_text(";".join(str(s) for s in sources), encoding="utf-8")
+    with timing.span("dotnet build", "tool", platform=platform, files=len(sources)):
+        r = _run_dotnet(
+            [
+                "build",
+                str(project),
+                "--no-restore",
+                "-nologo",
+                "-v:q",
+                "-clp:NoSummary",
+                f"-p:SnippetList={snippet_list}",
+            ]
+            + _BUILD_SERVER_FLAGS
+            + _msbuild_properties(sdk_version, platform),
+            project.parent,
+        )
+    return r.returncode, r.stdout + r.stderr
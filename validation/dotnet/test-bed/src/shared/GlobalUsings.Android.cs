@@ -0,0 +1,6 @@
+global using Android.App;
+global using Android.Content;
+global using Android.Graphics;
+global using Android.OS;
+global using Android.Views;
+global using Android.Widget;
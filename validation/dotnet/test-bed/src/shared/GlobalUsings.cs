@@ -0,0 +1,45 @@
+// Namespaces the documentation snippets use without importing them. This is a
+// superset across SDK versions (e.g. Barcode.Tracking became Barcode.Batch):
+// validation/dotnet writes each build project a copy, together with the
+// platform's GlobalUsings file, without the namespaces its SDK version lacks.
+global using Scandit.DataCapture.Core.Area;
+global using Scandit.DataCapture.Core.Capture;
+global using Scandit.DataCapture.Core.Common;
+global using Scandit.DataCapture.Core.Common.Feedback;
+global using Scandit.DataCapture.Core.Common.Geometry;
+global using Scandit.DataCapture.Core.Data;
+global using Scandit.DataCapture.Core.Source;
+global using Scandit.DataCapture.Core.UI;
+global using Scandit.DataCapture.Core.UI.Style;
+global using Scandit.DataCapture.Core.UI.Viewfinder;
+global using Scandit.DataCapture.Barcode.Capture;
+global using Scandit.DataCapture.Barcode.Data;
+global using Scandit.DataCapture.Barcode.Feedback;
+global using Scandit.DataCapture.Barcode.UI.Overlay;
+global using Scandit.DataCapture.Barcode.Ar.Capture;
+global using Scandit.DataCapture.Barcode.Ar.UI;
+global using Scandit.DataCapture.Barcode.Batch.Capture;
+global using Scandit.DataCapture.Barcode.Batch.Data;
+global using Scandit.DataCapture.Barcode.Batch.UI.Overlay;
+global using Scandit.DataCapture.Barcode.Count.Capture;
+global using Scandit.DataCapture.Barcode.Count.UI;
+global using Scandit.DataCapture.Barcode.Find.Capture;
+global using Scandit.DataCapture.Barcode.Find.UI;
+global using Scandit.DataCapture.Barcode.Pick.Capture;
+global using Scandit.DataCapture.Barcode.Pick.Data;
+global using Scandit.DataCapture.Barcode.Pick.UI;
+global using Scandit.DataCapture.Barcode.Selection.Capture;
+global using Scandit.DataCapture.Barcode.Selection.UI.Overlay;
+global using Scandit.DataCapture.Barcode.Spark.Capture;
+global using Scandit.DataCapture.Barcode.Spark.Feedback;
+global using Scandit.DataCapture.Barcode.Spark.UI;
+global using Scandit.DataCapture.Barcode.Tracking.Capture;
+global using Scandit.DataCapture.Barcode.Tracking.Data;
+global using Scandit.DataCapture.Barcode.Tracking.UI.Overlay;
+global using Scandit.DataCapture.ID.Capture;
+global using Scandit.DataCapture.ID.Data;
+global using Scandit.DataCapture.ID.UI.Overlay;
+global using Scandit.DataCapture.Label.Capture;
+global using Scandit.DataCapture.Label.Data;
+global using Scandit.DataCapture.Label.UI.Overlay;
+global using Scandit.DataCapture.Parser;
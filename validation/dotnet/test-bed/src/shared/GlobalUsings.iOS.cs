@@ -0,0 +1,3 @@
+global using CoreGraphics;
+global using Foundation;
+global using UIKit;
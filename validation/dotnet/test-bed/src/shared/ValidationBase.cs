@@ -0,0 +1,25 @@
+namespace Scandit.Validation
+{
+    /// <summary>
+    /// Base class for generated C# snippet validators.
+    ///
+    /// Derives from the platform's screen type so snippets that pass `this` as
+    /// a context or override lifecycle methods compile, and pre-declares the
+    /// variables most commonly referenced across snippet sections within a
+    /// single documentation page.
+    /// </summary>
+#if SNIPPET_IOS
+    public abstract class ValidationBase : UIKit.UIViewController
+#else
+    public abstract class ValidationBase : Android.App.Activity
+#endif
+    {
+        protected const string SCANDIT_LICENSE_KEY = "-- ENTER YOUR SCANDIT LICENSE KEY HERE --";
+
+        // Core SDK
+        protected Scandit.DataCapture.Core.Capture.DataCaptureContext context;
+        protected Scandit.DataCapture.Core.Capture.DataCaptureContext dataCaptureContext;
+        protected Scandit.DataCapture.Core.Source.Camera camera;
+        protected Scandit.DataCapture.Core.UI.DataCaptureView dataCaptureView;
+    }
+}
@@ -9,17 +9,26 @@ import subprocess
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from textwrap import indent
+from typing import Iterable, Optional
 
 from android import (
     ANDROID_PROJECT_DIR,
     GENERATED_DIR,
     VALIDATION_BASE_JAVA,
+    classpath_digest,
+    compiler_version,
+    ensure_gradle_wrapper,
     export_classpath,
+    file_digest,
     find_compiler,
+    fingerprint,
     split_imports,
+    write_generated_sources,
     ELLIPSIS_LINE,
 )
+from android import compile_server
 from base import CompileResult, Failure, LanguagePlugin, Snippet
+import timing
 
 # =============================================================================
 # Java-specific constants
@@ -41,37 +50,82 @@ _PUBLIC_LOCAL_CLASS = re.compile(
 )
 _ERROR_RE = re.compile(r"(.+?\.java):(\d+):\s*error:\s*(.+)")
 
+# Part of every snippet's cache key. Bump it whenever _generate_source or the
+# compiler flags change in a way that can change compile results.
+_TEMPLATE_VERSION = 1
+
+# Snippets per in-process javac call: large enough to amortise classpath
+# loading, small enough that batches spread across the server's threads.
+_BATCH_SIZE = 64
+
 # =============================================================================
 # Java compiler utilities
 # =============================================================================
 
 
-def _compile_file(javac: str, classpath: str, java_file: Path) -> list[str]:
-    """Compile a single Java file and return any error messages."""
-    r = subprocess.run(
-        [
-            javac,
-            "-cp",
-            classpath,
-            "-source",
-            "8",
-            "-target",
-            "8",
-            "-Xmaxerrs",
-            "10000",
-            "-d",
-            str(JAVA_CLASSES_DIR),
-            str(java_file),
-        ],
-        capture_output=True,
-        text=True,
-    )
-    if r.returncode == 0:
-        return []
-    errors = []
-    for m in _ERROR_RE.finditer(r.stdout + r.stderr):
-        errors.append(f"  line {m.group(2)}: {m.group(3).strip()}")
-    return errors
+def _classes_dir(sdk_version: str) -> Path:
+    """Output directory for one SDK version, so versions compile side by side."""
+    return JAVA_CLASSES_DIR / sdk_version
+
+
+def _compile_files(
+    javac: str,
+    classpath: str,
+    java_files: list[Path],
+    classes_dir: Path,
+    server: Optional[compile_server.CompileServerClient] = None,
+    check_only: bool = False,
+) -> dict[str, list[str]]:
+    """Compile *java_files* in one javac invocation and return the error
+    messages keyed by file stem (i.e. class name). With *check_only*, javac
+    stops after flow analysis and writes no class files.
+
+    Raises RuntimeError if javac fails without an error in any of *java_files*.
+
+    Runs on the warm compile server when *server* is given, otherwise spawns javac."""
+    args = [
+        "-cp",
+        classpath,
+        "-source",
+        "8",
+        "-target",
+        "8",
+        "-Xmaxerrs",
+        "100000",
+        # By default javac skips flow analysis (missing returns, unreported
+        # exceptions, …) for every file once any file has an error. Keep it
+        # going so a batch reports the same errors as compiling each file alone.
+        "-XDshould-stop.ifError=FLOW",
+        "-d",
+        str(classes_dir),
+    ]
+    if check_only:
+        # Attribution and flow analysis report every compile error; the
+        # desugaring and bytecode generation phases after them are skipped.
+        args += ["-XDshould-stop.ifNoError=FLOW"]
+    args += [str(f) for f in java_files]
+    on_server = bool(server and server.available)
+    with timing.span("javac", "tool", files=len(java_files), server=on_server):
+        try:
+            returncode, output = server.run("javac", args) if on_server else (None, "")
+        except OSError as e:
+            # The server died or stopped mid-run: this and later calls spawn javac.
+            print(f"  WARNING: compile server unavailable ({e}); spawning javac instead.")
+            returncode = None
+        if returncode is None:
+            r = subprocess.run([javac] + args, capture_output=True, text=True)
+            returncode, output = r.returncode, r.stdout + r.stderr
+    errors_by_stem: dict[str, list[str]] = {}
+    if returncode == 0:
+        return errors_by_stem
+    for m in _ERROR_RE.finditer(output):
+        errors_by_stem.setdefault(Path(m.group(1)).stem, []).append(
+            f"  line {m.group(2)}: {m.group(3).strip()}"
+        )
+    # A failed invocation must never pass its files.
+    if not any(f.stem in errors_by_stem for f in java_files):
+        raise RuntimeError(f"javac failed (exit {returncode}) without reporting an error:\n{output}")
+    return errors_by_stem
 
 
 # =============================================================================
@@ -88,6 +142,18 @@ class JavaPlugin(LanguagePlugin):
     def value(self) -> str:
         return "java"
 
+    def prepare(self) -> None:
+        ensure_gradle_wrapper()
+
+    def toolchain_fingerprint(self, sdk_version: str) -> str:
+        return fingerprint(
+            f"java-template-{_TEMPLATE_VERSION}",
+            JAVA_COMMON_IMPORTS,
+            file_digest(VALIDATION_BASE_JAVA),
+            compiler_version("JAVA_HOME", "javac"),
+            classpath_digest(sdk_version),
+        )
+
     def _generate_source(self, class_name: str, snippet: Snippet) -> str:
         extra_imports, body = split_imports(snippet.content)
         body = ELLIPSIS_LINE.sub("// ...", body)
@@ -108,12 +174,13 @@ class JavaPlugin(LanguagePlugin):
             f"}}\n"
         )
 
-    def generate_sources(self, snippets: list[Snippet]) -> None:
-        GENERATED_DIR.mkdir(parents=True, exist_ok=True)
-        for snippet in snippets:
-            class_name = self._class_name(snippet)
-            source = self._generate_source(class_name, snippet)
-            (GENERATED_DIR / f"{class_name}.java").write_text(source, encoding="utf-8")
+    def generate_sources(self, snippets: Iterable[Snippet]) -> None:
+        def sources():
+            for snippet in snippets:
+                class_name = self._class_name(snippet)
+                yield class_name, self._generate_source(class_name, snippet)
+
+        write_generated_sources(sources(), ".java", f"Snippet_{self.value}_", JAVA_CLASSES_DIR)
 
     def clean(self) -> None:
         if GENERATED_DIR.exists():
@@ -123,36 +190,61 @@ class JavaPlugin(LanguagePlugin):
             shutil.rmtree(JAVA_CLASSES_DIR)
 
     def compile(self, snippets: list[Snippet], sdk_version: str) -> CompileResult:
-        """Compile each Java snippet in its own javac process, run in parallel."""
+        """Compile Java snippets in batches on a single warm javac JVM.
+
+        Each batch is one in-process javac call on the compile server (the
+        long-lived one if running, else the one shared by this run). Without a
+        JVM to host it, falls back to one javac process per snippet.
+
+        With `check_only`, snippets are analyzed without generating class
+        files; only ValidationBaseJava, which they extend, is compiled."""
         javac = find_compiler("JAVA_HOME", "javac")
         sdk_classpath = export_classpath(sdk_version)
 
-        JAVA_CLASSES_DIR.mkdir(parents=True, exist_ok=True)
-        base_errors = _compile_file(javac, sdk_classpath, VALIDATION_BASE_JAVA)
-        if base_errors:
-            raise RuntimeError(
-                f"ValidationBaseJava failed to compile:\n" + "\n".join(base_errors)
-            )
-
-        full_classpath = sdk_classpath + os.pathsep + str(JAVA_CLASSES_DIR)
+        classes_dir = _classes_dir(sdk_version)
+        classes_dir.mkdir(parents=True, exist_ok=True)
+        full_classpath = sdk_classpath + os.pathsep + str(classes_dir)
+        snippet_by_class_name = {self._class_name(s): s for s in snippets}
         failures: list[Failure] = []
 
-        if snippets:
-            workers = min(os.cpu_count() or 8, len(snippets))
+        with compile_server.compile_session() as server:
+            base_errors = _compile_files(
+                javac, sdk_classpath, [VALIDATION_BASE_JAVA], classes_dir, server
+            )
+            if base_errors:
+                raise RuntimeError(
+                    f"ValidationBaseJava failed to compile:\n"
+                    + "\n".join(e for errs in base_errors.values() for e in errs)
+                )
+
+            if not snippets:
+                return CompileResult(failures=failures)
+
+            class_names = list(snippet_by_class_name)
+            batch_size = _BATCH_SIZE if server else 1
+            batches = [
+                [GENERATED_DIR / f"{cn}.java" for cn in class_names[i : i + batch_size]]
+                for i in range(0, len(class_names), batch_size)
+            ]
+            workers = min(os.cpu_count() or 8, len(batches))
             with ThreadPoolExecutor(max_workers=workers) as pool:
-                futures = {
+                futures = [
                     pool.submit(
-                        _compile_file,
+                        _compile_files,
                         javac,
                         full_classpath,
-                        GENERATED_DIR / f"{self._class_name(snippet)}.java",
-                    ): snippet
-                    for snippet in snippets
-                }
+                        batch,
+                        classes_dir,
+                        server,
+                        self.check_only,
+                    )
+                    for batch in batches
+                ]
                 for future in as_completed(futures):
-                    snippet = futures[future]
-                    file_errors = future.result()
-                    if file_errors:
-                        failures.append(Failure(snippet=snippet, errors=file_errors))
+                    for cn, file_errors in future.result().items():
+                        if cn in snippet_by_class_name:
+                            failures.append(
+                                Failure(snippet=snippet_by_class_name[cn], errors=file_errors)
+                            )
 
         return CompileResult(failures=failures)
@@ -2,22 +2,37 @@
 Kotlin-specific validation plugin.
 """
 
+import contextlib
+import heapq
+import itertools
+import os
 import re
 import shutil
 import subprocess
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 from textwrap import indent
+from typing import Iterable, Optional
 
 from android import (
     ANDROID_PROJECT_DIR,
     GENERATED_DIR,
     VALIDATION_BASE_KOTLIN,
+    classpath_digest,
+    compiler_version,
+    ensure_gradle_wrapper,
     export_classpath,
+    file_digest,
     find_compiler,
+    fingerprint,
     split_imports,
+    write_generated_sources,
     ELLIPSIS_LINE,
 )
+from android import compile_server
 from base import CompileResult, Failure, LanguagePlugin, Snippet
+import timing
 
 # =============================================================================
 # Kotlin-specific constants
@@ -26,6 +41,10 @@ from base import CompileResult, Failure, LanguagePlugin, Snippet
 KOTLIN_CLASSES_DIR = ANDROID_PROJECT_DIR / "build" / "snippet-kotlin-classes"
 _KOTLIN_ERROR_RE = re.compile(r"(.+?\.kt):(\d+):\d+:\s*error:\s*(.+)")
 
+# Part of every snippet's cache key. Bump it whenever _generate_source or the
+# compiler flags change in a way that can change compile results.
+_TEMPLATE_VERSION = 1
+
 # Matches a top-level Kotlin object declaration (column 0, optional visibility
 # modifier), e.g. `object BuildConfig {` or `private object Foo {`.
 _OBJECT_DECL = re.compile(r"^(?:(?:private|internal|public)\s+)?object\s+\w+")
@@ -84,12 +103,143 @@ def _split_object_blocks(content: str) -> tuple[list[str], list[str], str]:
     return top_level, companion, "\n".join(remaining)
 
 
+def _classes_dir(sdk_version: str) -> Path:
+    """Output directory for one SDK version, so versions compile side by side."""
+    return KOTLIN_CLASSES_DIR / sdk_version
+
+
+class _CompilerCrash(RuntimeError):
+    """kotlinc failed without reporting an error in any file (out of memory,
+    internal compiler error, …)."""
+
+
+def _run_kotlinc(
+    class_names: list[str],
+    sdk_classpath: str,
+    classes_dir: Path,
+    server: Optional[compile_server.CompileServerClient] = None,
+) -> dict[str, list[str]]:
+    """Compile the generated files for *class_names* in one kotlinc invocation.
+    Returns the error lines keyed by class name (empty when everything compiles).
+    Raises RuntimeError if kotlinc fails without an error in any of those files.
+
+    Runs on the compile server when *server* hosts kotlinc, otherwise spawns kotlinc."""
+    kt_files = [str(VALIDATION_BASE_KOTLIN)] + [
+        str(GENERATED_DIR / f"{cn}.kt") for cn in class_names
+    ]
+    args = ["-jvm-target", "11", "-cp", sdk_classpath, "-d", str(classes_dir)] + kt_files
+    on_server = bool(server and server.available and server.kotlin_home)
+    with timing.span("kotlinc", "tool", files=len(class_names), server=on_server):
+        try:
+            returncode, output = server.run("kotlinc", args) if on_server else (None, "")
+        except OSError as e:
+            # The server died or stopped mid-run: this and later calls spawn kotlinc.
+            print(f"  WARNING: compile server unavailable ({e}); spawning kotlinc instead.")
+            returncode = None
+        if returncode is None:
+            kotlinc = find_compiler("KOTLIN_HOME", "kotlinc")
+            r = subprocess.run([kotlinc] + args, capture_output=True, text=True)
+            returncode, output = r.returncode, r.stdout + r.stderr
+
+    errors_by_cn: dict[str, list[str]] = {}
+    if returncode == 0:
+        return errors_by_cn
+    compiled = set(class_names)
+    shared_errors: list[str] = []
+    for m in _KOTLIN_ERROR_RE.finditer(output):
+        cn = Path(m.group(1)).stem
+        message = f"  line {m.group(2)}: {m.group(3).strip()}"
+        if cn in compiled:
+            errors_by_cn.setdefault(cn, []).append(message)
+        else:
+            shared_errors.append(f"  {Path(m.group(1)).name}: {message.strip()}")
+    # A failed invocation must never pass its files.
+    if not errors_by_cn and shared_errors:
+        raise RuntimeError("ValidationBaseKotlin failed to compile:\n" + "\n".join(shared_errors))
+    if not errors_by_cn:
+        raise _CompilerCrash(f"kotlinc failed (exit {returncode}) without reporting an error:\n{output}")
+    return errors_by_cn
+
+
+def _balanced_shards(class_names: list[str], n_shards: int) -> list[list[str]]:
+    """Split *class_names* into *n_shards* groups of similar total source size
+    (largest-first greedy assignment to the lightest shard)."""
+    sizes = {cn: (GENERATED_DIR / f"{cn}.kt").stat().st_size for cn in class_names}
+    heap = [(0, i) for i in range(n_shards)]
+    shards: list[list[str]] = [[] for _ in range(n_shards)]
+    for cn in sorted(class_names, key=lambda c: (-sizes[c], c)):
+        load, i = heapq.heappop(heap)
+        shards[i].append(cn)
+        heapq.heappush(heap, (load + sizes[cn], i))
+    return [shard for shard in shards if shard]
+
+
+def _compile_partitioned(
+    class_names: list[str],
+    sdk_classpath: str,
+    classes_dir: Path,
+    server: Optional[compile_server.CompileServerClient],
+) -> dict[str, list[str]]:
+    """Compile snippets in size-balanced shards, one kotlinc per shard in parallel.
+
+    Files that compile cleanly in a failing shard pass. The files that reported
+    errors are bisected — recompiled in halves, then alone — to pin each error
+    on the smallest group that still produces it: a file keeps the errors it
+    reports on its own, and a file that only fails together with others (e.g.
+    two snippets declaring the same top-level object) keeps the errors of the
+    last group it failed in, as one kotlinc call over every file would report.
+    A shard that fails without reporting any error (e.g. out of memory) is
+    bisected the same way; a single file that does so aborts the run.
+    """
+    workers = min(os.cpu_count() or 4, len(class_names))
+    errors_by_cn: dict[str, list[str]] = {}
+    with tempfile.TemporaryDirectory(prefix="kotlin-bisect-") as scratch:
+        scratch_dirs = (Path(scratch) / str(i) for i in itertools.count())
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = {
+                pool.submit(
+                    _run_kotlinc, shard, sdk_classpath, classes_dir / f"shard-{i}", server
+                ): (shard, {})
+                for i, shard in enumerate(_balanced_shards(class_names, workers))
+            }
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    # *inherited*: the errors of the group this one was split from.
+                    group, inherited = pending.pop(future)
+                    try:
+                        group_errors = future.result()
+                    except _CompilerCrash:
+                        # May be the size of the group (e.g. memory): halve it.
+                        if len(group) == 1:
+                            raise
+                        group_errors = dict.fromkeys(group, [])
+                    for cn in group:
+                        if cn not in group_errors and inherited.get(cn):
+                            # Fails only together with files now split off.
+                            errors_by_cn[cn] = inherited[cn]
+                    if len(group) == 1:
+                        errors_by_cn.update(group_errors)
+                        continue
+                    suspects = [cn for cn in group if cn in group_errors]
+                    halves = [suspects[: len(suspects) // 2], suspects[len(suspects) // 2:]]
+                    for half in (h for h in halves if h):
+                        future = pool.submit(
+                            _run_kotlinc, half, sdk_classpath, next(scratch_dirs), server
+                        )
+                        pending[future] = (half, {cn: group_errors[cn] for cn in half})
+    return errors_by_cn
+
+
 # =============================================================================
 # KotlinPlugin
 # =============================================================================
 
 
 class KotlinPlugin(LanguagePlugin):
+    # Compile in independent shards and bisect failures (see _compile_partitioned).
+    partitioned: bool = False
+
     @property
     def name(self) -> str:
         return "Kotlin"
@@ -98,6 +248,19 @@ class KotlinPlugin(LanguagePlugin):
     def value(self) -> str:
         return "kotlin"
 
+    def prepare(self) -> None:
+        ensure_gradle_wrapper()
+
+    def toolchain_fingerprint(self, sdk_version: str) -> str:
+        return fingerprint(
+            f"kotlin-template-{_TEMPLATE_VERSION}",
+            file_digest(VALIDATION_BASE_KOTLIN),
+            compiler_version("KOTLIN_HOME", "kotlinc"),
+            classpath_digest(sdk_version),
+            # The modes can disagree on errors spanning several snippets.
+            "partitioned" if self.partitioned else "single call",
+        )
+
     def _generate_source(self, class_name: str, snippet: Snippet) -> str:
         extra_imports, body = split_imports(snippet.content)
         body = ELLIPSIS_LINE.sub("// ...", body)
@@ -128,12 +291,13 @@ class KotlinPlugin(LanguagePlugin):
             f"}}\n"
         )
 
-    def generate_sources(self, snippets: list[Snippet]) -> None:
-        GENERATED_DIR.mkdir(parents=True, exist_ok=True)
-        for snippet in snippets:
-            class_name = self._class_name(snippet)
-            source = self._generate_source(class_name, snippet)
-            (GENERATED_DIR / f"{class_name}.kt").write_text(source, encoding="utf-8")
+    def generate_sources(self, snippets: Iterable[Snippet]) -> None:
+        def sources():
+            for snippet in snippets:
+                class_name = self._class_name(snippet)
+                yield class_name, self._generate_source(class_name, snippet)
+
+        write_generated_sources(sources(), ".kt", f"Snippet_{self.value}_", KOTLIN_CLASSES_DIR)
 
     def clean(self) -> None:
         if GENERATED_DIR.exists():
@@ -143,37 +307,39 @@ class KotlinPlugin(LanguagePlugin):
             shutil.rmtree(KOTLIN_CLASSES_DIR)
 
     def compile(self, snippets: list[Snippet], sdk_version: str) -> CompileResult:
-        """Compile all Kotlin snippets in a single kotlinc invocation."""
-        kotlinc = find_compiler("KOTLIN_HOME", "kotlinc")
+        """Compile all Kotlin snippets in a single kotlinc invocation, or in
+        size-balanced shards when `partitioned` is set.
+
+        Uses the warm compile server (the long-lived one if running, else the
+        one shared by this run), otherwise spawns kotlinc.
+
+        kotlinc has no frontend-only mode, so with `check_only` the class
+        files still get generated, but into a scratch directory that is
+        deleted afterwards instead of the per-version output directory."""
         sdk_classpath = export_classpath(sdk_version)
 
-        KOTLIN_CLASSES_DIR.mkdir(parents=True, exist_ok=True)
+        classes_dir = _classes_dir(sdk_version)
+        classes_dir.mkdir(parents=True, exist_ok=True)
 
         if not snippets:
             return CompileResult(failures=[])
 
         snippet_by_class_name = {self._class_name(s): s for s in snippets}
 
-        kt_files = [str(VALIDATION_BASE_KOTLIN)] + [
-            str(GENERATED_DIR / f"{cn}.kt") for cn in snippet_by_class_name
-        ]
-
-        r = subprocess.run(
-            [kotlinc, "-jvm-target", "11", "-cp", sdk_classpath, "-d", str(KOTLIN_CLASSES_DIR)]
-            + kt_files,
-            capture_output=True,
-            text=True,
+        scratch = (
+            tempfile.TemporaryDirectory(prefix="kotlin-check-")
+            if self.check_only
+            else contextlib.nullcontext(classes_dir)
         )
-
-        if r.returncode == 0:
-            return CompileResult(failures=[])
-
-        errors_by_cn: dict[str, list[str]] = {}
-        for m in _KOTLIN_ERROR_RE.finditer(r.stdout + r.stderr):
-            cn = Path(m.group(1)).stem
-            errors_by_cn.setdefault(cn, []).append(
-                f"  line {m.group(2)}: {m.group(3).strip()}"
-            )
+        with scratch as output_dir, compile_server.compile_session() as server:
+            if self.partitioned:
+                errors_by_cn = _compile_partitioned(
+                    list(snippet_by_class_name), sdk_classpath, Path(output_dir), server
+                )
+            else:
+                errors_by_cn = _run_kotlinc(
+                    list(snippet_by_class_name), sdk_classpath, Path(output_dir), server
+                )
 
         return CompileResult(
             failures=[
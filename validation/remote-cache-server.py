@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Serves a remote snippet-result cache for validate-code-snippets.py over HTTP,
+backed by one SQLite database. Meant for local testing and small self-hosted
+setups; any server speaking the same GET/PUT protocol (see the remote_cache
+package) can take its place.
+
+Usage:
+    python3 validation/remote-cache-server.py
+    python3 validation/remote-cache-server.py --host 0.0.0.0 --port 8765 \\
+        --token READ_SECRET --write-token WRITE_SECRET
+    SNIPPET_REMOTE_CACHE_URL=http://127.0.0.1:8765 SNIPPET_REMOTE_CACHE_WRITE_TOKEN=WRITE_SECRET \\
+        python3 validation/validate-code-snippets.py kotlin
+
+Lookups must carry `Authorization: Bearer <token>` with the --token (or
+SNIPPET_REMOTE_CACHE_TOKEN) or the --write-token (or
+SNIPPET_REMOTE_CACHE_WRITE_TOKEN); uploads need the write token. Give the
+write token only to trusted runs, such as CI on the default branch. Without
+either token every request is accepted, which suits local testing only.
+"""
+
+import hmac
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+# Add the validation/ directory to sys.path so the remote_cache package is importable
+sys.path.insert(0, str(Path(__file__).parent))
+
+from remote_cache import REMOTE_CACHE_TOKEN_ENV, REMOTE_CACHE_WRITE_TOKEN_ENV, is_fingerprint
+
+DEFAULT_DB = Path(__file__).parent / "cache" / "remote-cache.sqlite"
+# Larger uploads are refused; a full batch of results is far smaller.
+MAX_BODY_BYTES = 32 * 1024 * 1024
+MAX_KEYS = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    fingerprint TEXT PRIMARY KEY,
+    result TEXT NOT NULL,
+    stored INTEGER NOT NULL
+) WITHOUT ROWID
+"""
+
+
+class ResultStore:
+    """Thread-safe {fingerprint: result JSON} store in SQLite."""
+
+    def __init__(self, db_file: Path):
+        db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_file, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: list[str]) -> dict[str, dict]:
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT fingerprint, result FROM results WHERE fingerprint IN ({placeholders})",
+                keys,
+            ).fetchall()
+        return {key: json.loads(result) for key, result in rows}
+
+    def put_many(self, results: dict[str, dict]) -> None:
+        now = int(time.time())
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO results VALUES (?, ?, ?) ON CONFLICT (fingerprint) DO UPDATE SET "
+                    "result = excluded.result, stored = excluded.stored",
+                    ((key, json.dumps(result), now) for key, result in results.items()),
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+def _valid_result(result) -> bool:
+    return (
+        isinstance(result, dict)
+        and isinstance(result.get("errors"), list)
+        and all(isinstance(e, str) for e in result["errors"])
+        and isinstance(result.get("duration"), (int, float, type(None)))
+    )
+
+
+def make_handler(store: ResultStore, token: str, write_token: str):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, payload=None):
+            body = json.dumps(payload).encode() if payload is not None else b""
+            self.send_response(status)
+            if payload is not None:
+                self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _authorized(self, write: bool) -> bool:
+            if not (token or write_token):
+                return True
+            given = self.headers.get("Authorization", "")
+            accepted = [write_token] if write else [token, write_token]
+            if any(t and hmac.compare_digest(given, f"Bearer {t}") for t in accepted):
+                return True
+            if write and token and hmac.compare_digest(given, f"Bearer {token}"):
+                self._send(403, {"error": "this token is read-only"})
+            else:
+                self._send(401, {"error": "missing or wrong bearer token"})
+            return False
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == "/v1/health":
+                self._send(200, {"results": store.count()})
+                return
+            if url.path != "/v1/results":
+                self._send(404, {"error": "not found"})
+                return
+            if not self._authorized(write=False):
+                return
+            keys = [k for value in parse_qs(url.query).get("keys", []) for k in value.split(",") if k]
+            if len(keys) > MAX_KEYS or not all(is_fingerprint(k) for k in keys):
+                self._send(400, {"error": f"keys must be up to {MAX_KEYS} SHA-256 hex digests"})
+                return
+            self._send(200, {"results": store.get_many(keys) if keys else {}})
+
+        def do_PUT(self):
+            if urlsplit(self.path).path != "/v1/results":
+                self._send(404, {"error": "not found"})
+                return
+            if not self._authorized(write=True):
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY_BYTES:
+                self._send(413, {"error": "body too large"})
+                self.close_connection = True
+                return
+            try:
+                results = json.loads(self.rfile.read(length))["results"]
+                if not isinstance(results, dict) or len(results) > MAX_KEYS:
+                    raise ValueError
+            except (ValueError, KeyError, TypeError):
+                self._send(400, {"error": 'expected {"results": {fingerprint: result}}'})
+                return
+            if not all(is_fingerprint(k) and _valid_result(r) for k, r in results.items()):
+                self._send(400, {"error": 'each result must be {"errors": [str], "duration": number}'})
+                return
+            store.put_many(results)
+            self._send(204)
+
+        def log_message(self, format, *args):
+            if not self.server.quiet:
+                super().log_message(format, *args)
+
+    return Handler
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Serve a remote snippet-result cache for validate-code-snippets.py."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on. Default: 127.0.0.1.")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on. Default: 8765.")
+    parser.add_argument(
+        "--db",
+        type=Path,
+        default=DEFAULT_DB,
+        help="SQLite database to store results in. Default: validation/cache/remote-cache.sqlite.",
+    )
+    parser.add_argument(
+        "--token",
+        default=os.environ.get(REMOTE_CACHE_TOKEN_ENV, ""),
+        help=f"Bearer token for lookups. Default: ${REMOTE_CACHE_TOKEN_ENV}.",
+    )
+    parser.add_argument(
+        "--write-token",
+        default=os.environ.get(REMOTE_CACHE_WRITE_TOKEN_ENV, ""),
+        help=(
+            "Bearer token for uploads, also valid for lookups. Without it and "
+            f"with --token set, nothing can be uploaded. Default: ${REMOTE_CACHE_WRITE_TOKEN_ENV}."
+        ),
+    )
+    parser.add_argument("--quiet", action="store_true", help="Don't log each request.")
+    args = parser.parse_args()
+
+    store = ResultStore(args.db)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(store, args.token, args.write_token))
+    server.quiet = args.quiet
+    print(
+        f"Remote snippet cache serving {store.count()} results from {args.db} "
+        f"on http://{args.host}:{server.server_port}",
+        flush=True,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nRemote snippet cache stopped.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Optional remote cache of snippet results, shared by CI runners and developer
+machines on top of each machine's local SQLite cache.
+
+Results are keyed by the plugins' composite snippet fingerprints (see
+LanguagePlugin.cache_key), which already cover the snippet, template,
+compiler and classpath, so one store can serve every language and SDK
+version. The protocol is two batched requests, served for local testing by
+validation/remote-cache-server.py:
+
+    GET /v1/results?keys=K1,K2,…
+        200 {"results": {"K1": {"errors": [...], "duration": 1.2}, …}}
+        Keys without a stored result are left out.
+    PUT /v1/results
+        {"results": {"K1": {"errors": [...], "duration": 1.2}, …}}
+        204 once stored.
+
+Lookups send the bearer token from SNIPPET_REMOTE_CACHE_TOKEN. Results are
+uploaded only when SNIPPET_REMOTE_CACHE_WRITE_TOKEN is set, and with that
+token, so runs on untrusted changes (pull requests) can read the cache but
+never publish results that trusted runs would later rely on. The first request that
+fails (offline, timeout, error status, malformed reply) switches the remote
+cache off for the rest of the run; validation then carries on with the local
+cache alone.
+"""
+
+import json
+import os
+import re
+import threading
+import urllib.error
+import urllib.request
+from typing import Optional
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+REMOTE_CACHE_URL_ENV = "SNIPPET_REMOTE_CACHE_URL"
+REMOTE_CACHE_TOKEN_ENV = "SNIPPET_REMOTE_CACHE_TOKEN"
+REMOTE_CACHE_WRITE_TOKEN_ENV = "SNIPPET_REMOTE_CACHE_WRITE_TOKEN"
+
+# Keys per request: 200 fingerprints keep a lookup URL around 13 KB.
+_BATCH_SIZE = 200
+# Seconds to wait for the server before treating it as unreachable.
+_TIMEOUT = 5
+
+_FINGERPRINT = re.compile(r"^[0-9a-f]{64}$")
+
+# =============================================================================
+# Client
+# =============================================================================
+
+
+class RemoteCache:
+    """Batched lookups and uploads of {fingerprint: result} entries, where a
+    result is {"errors": [...], "duration": seconds or None}. Uploads need
+    *write_token*; without it the cache is read-only. Safe to use from
+    concurrent compile jobs."""
+
+    def __init__(
+        self,
+        url: str,
+        token: Optional[str] = None,
+        write_token: Optional[str] = None,
+        lookups: bool = True,
+    ):
+        self.url = url.rstrip("/")
+        self.token = token or write_token
+        self.write_token = write_token
+        self.lookups = lookups
+        self.uploads = bool(write_token)
+        self._lock = threading.Lock()
+        self._offline = False
+
+    def _request(
+        self, method: str, path: str, token: Optional[str], body: Optional[bytes] = None
+    ) -> Optional[bytes]:
+        """Send one request. Returns the response body, or None once the
+        remote cache is off."""
+        if self._offline:
+            return None
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        request = urllib.request.Request(self.url + path, data=body, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=_TIMEOUT) as response:
+                return response.read()
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            self._go_offline(getattr(e, "reason", None) or e)
+            return None
+
+    def _go_offline(self, reason) -> None:
+        with self._lock:
+            if self._offline:
+                return
+            self._offline = True
+        print(
+            f"WARNING: remote snippet cache {self.url} unavailable ({reason}); "
+            "continuing with the local cache only.",
+            flush=True,
+        )
+
+    def get_many(self, keys: list[str]) -> dict[str, dict]:
+        """Stored results for those of *keys* the remote cache holds."""
+        if not self.lookups:
+            return {}
+        found: dict[str, dict] = {}
+        for i in range(0, len(keys), _BATCH_SIZE):
+            batch = keys[i:i + _BATCH_SIZE]
+            body = self._request("GET", "/v1/results?keys=" + ",".join(batch), self.token)
+            if body is None:
+                break
+            try:
+                results = json.loads(body)["results"]
+                for key in batch:
+                    result = results.get(key)
+                    if result is None:
+                        continue
+                    errors = result["errors"]
+                    if not isinstance(errors, list) or not all(isinstance(e, str) for e in errors):
+                        raise ValueError(f"malformed errors for {key}")
+                    found[key] = {"errors": errors, "duration": result.get("duration")}
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                self._go_offline(f"malformed reply: {e}")
+                break
+        return found
+
+    def put_many(self, results: dict[str, dict]) -> None:
+        """Upload *results*; entries already stored are overwritten. Does
+        nothing on a read-only cache."""
+        if not self.uploads:
+            return
+        items = list(results.items())
+        for i in range(0, len(items), _BATCH_SIZE):
+            body = json.dumps({"results": dict(items[i:i + _BATCH_SIZE])}).encode()
+            if self._request("PUT", "/v1/results", self.write_token, body) is None:
+                break
+
+
+_client: Optional[RemoteCache] = None
+
+
+def configure(url: Optional[str], lookups: bool = True) -> Optional[RemoteCache]:
+    """Set up the remote cache of this run from *url*, or from the
+    SNIPPET_REMOTE_CACHE_URL environment variable when *url* is None.
+    Without *lookups* results are only uploaded, e.g. when a clean run must
+    compile everything itself. Returns None, and configures no cache, if
+    there is no URL or the cache would be neither read nor written."""
+    global _client
+    url = url if url is not None else os.environ.get(REMOTE_CACHE_URL_ENV, "")
+    _client = None
+    if url:
+        _client = RemoteCache(
+            url,
+            os.environ.get(REMOTE_CACHE_TOKEN_ENV),
+            os.environ.get(REMOTE_CACHE_WRITE_TOKEN_ENV),
+            lookups,
+        )
+        if not (_client.lookups or _client.uploads):
+            _client = None
+    return _client
+
+
+def client() -> Optional[RemoteCache]:
+    """The remote cache of this run, or None if none is configured."""
+    return _client
+
+
+def is_fingerprint(key: str) -> bool:
+    return bool(_FINGERPRINT.match(key))
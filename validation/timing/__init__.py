@@ -0,0 +1,100 @@
+"""
+Timing spans for validation runs.
+
+Phases, compiler invocations and per-snippet compile times are recorded as
+spans from any thread. A run can export them as a Chrome trace (load the file
+in chrome://tracing or https://ui.perfetto.dev) or print them as a summary
+table.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+# =============================================================================
+# Recording
+# =============================================================================
+
+_lock = threading.Lock()
+_events: list[dict] = []
+_thread_names: dict[int, str] = {}
+_origin = time.perf_counter()
+
+
+def now() -> float:
+    """Seconds on the clock spans are measured with."""
+    return time.perf_counter()
+
+
+def record(name: str, category: str, start: float, end: float, **args) -> None:
+    """Record a finished span that ran from *start* to *end* (see now())
+    on the current thread."""
+    thread = threading.current_thread()
+    event = {
+        "name": name,
+        "cat": category,
+        "ph": "X",
+        "ts": round((start - _origin) * 1e6),
+        "dur": round((end - start) * 1e6),
+        "pid": os.getpid(),
+        "tid": thread.ident,
+        "args": args,
+    }
+    with _lock:
+        _events.append(event)
+        _thread_names.setdefault(thread.ident, thread.name)
+
+
+@contextmanager
+def span(name: str, category: str = "phase", **args) -> Iterator[None]:
+    """Record the enclosed block as a span, even if it raises."""
+    start = now()
+    try:
+        yield
+    finally:
+        record(name, category, start, now(), **args)
+
+
+# =============================================================================
+# Output
+# =============================================================================
+
+
+def write_trace(path: Path) -> None:
+    """Write the recorded spans as a Chrome trace-event JSON file."""
+    with _lock:
+        events = list(_events)
+        thread_names = dict(_thread_names)
+    metadata = [
+        {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+        for tid, name in thread_names.items()
+    ]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps({"traceEvents": metadata + events, "displayTimeUnit": "ms"}),
+        encoding="utf-8",
+    )
+
+
+def print_summary() -> None:
+    """Print the total and longest duration of each span name, longest total
+    first. Spans on different threads overlap, so totals can exceed the wall
+    time of the run."""
+    with _lock:
+        events = list(_events)
+    rows: dict[tuple[str, str], list[float]] = {}
+    for event in events:
+        rows.setdefault((event["cat"], event["name"]), []).append(event["dur"] / 1e6)
+    if not rows:
+        return
+    width = max(len(name) for _, name in rows)
+    print(f"\n{'span':<{width}}  {'category':<9} {'count':>6} {'total s':>9} {'max s':>8}")
+    for (category, name), durations in sorted(rows.items(), key=lambda r: -sum(r[1])):
+        print(
+            f"{name:<{width}}  {category:<9} {len(durations):>6} "
+            f"{sum(durations):>9.2f} {max(durations):>8.2f}"
+        )
@@ -0,0 +1,3 @@
+from .plugin import TypeScriptPlugin
+
+plugin = TypeScriptPlugin()
@@ -0,0 +1,233 @@
+"""
+Client for the long-lived TypeScript language service.
+
+The service (test-bed/language-service.js) runs in one Node process per
+validation run. It keeps every snippet checked so far as an in-memory file of
+a single program, so each batch only re-parses and type-checks what changed.
+
+Snippets are checked against the published type declarations of the packages
+they import: the framework packages pinned in test-bed/package.json, and the
+Scandit packages of each SDK version, installed into build/<sdk version>.
+"""
+
+import atexit
+import hashlib
+import json
+import re
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from typing import Optional
+
+import timing
+
+# =============================================================================
+# Paths and constants
+# =============================================================================
+
+TEST_BED_DIR = Path(__file__).parent / "test-bed"
+SERVICE_SCRIPT = TEST_BED_DIR / "language-service.js"
+STUBS_DIR = TEST_BED_DIR / "stubs"
+GENERATED_DIR = TEST_BED_DIR / "src" / "generated"
+PACKAGE_JSON = TEST_BED_DIR / "package.json"
+TYPESCRIPT_PACKAGE = TEST_BED_DIR / "node_modules" / "typescript" / "package.json"
+BUILD_DIR = TEST_BED_DIR / "build"
+LOG_FILE = BUILD_DIR / "language-service.log"
+
+# Digest of the package.json last installed into the test bed's node_modules
+_INSTALL_STAMP = TEST_BED_DIR / "node_modules" / ".package.json.sha256"
+
+# Only the type declarations are needed: skip install scripts (e.g. Electron's
+# binary download), and peer dependencies, which the test bed pins itself.
+_NPM_FLAGS = ["--no-audit", "--no-fund", "--ignore-scripts", "--legacy-peer-deps"]
+
+# npm's error codes for a package or version the registry does not have
+_NOT_PUBLISHED = re.compile(r"\bcode (E404|ETARGET)\b")
+
+# =============================================================================
+# Toolchain
+# =============================================================================
+
+
+def find_node() -> str:
+    """Locate the Node.js runtime on PATH."""
+    node = shutil.which("node")
+    if not node:
+        raise FileNotFoundError("'node' not found. Install Node.js and add it to PATH.")
+    return node
+
+
+def _npm_install(project: Path) -> subprocess.CompletedProcess:
+    npm = shutil.which("npm")
+    if not npm:
+        raise FileNotFoundError("'npm' not found; it is needed to install the test bed's packages.")
+    return subprocess.run(
+        [npm, "install", *_NPM_FLAGS], cwd=project, capture_output=True, text=True
+    )
+
+
+def ensure_typescript():
+    """Install the pinned TypeScript compiler and framework typings into the
+    test bed if package.json changed since they were last installed."""
+    digest = hashlib.sha256(PACKAGE_JSON.read_bytes()).hexdigest()
+    if (
+        TYPESCRIPT_PACKAGE.exists()
+        and _INSTALL_STAMP.exists()
+        and _INSTALL_STAMP.read_text(encoding="utf-8") == digest
+    ):
+        return
+    print("Installing TypeScript and the framework typings into the snippet test bed…")
+    r = _npm_install(TEST_BED_DIR)
+    if r.returncode != 0:
+        raise RuntimeError(f"npm install failed.\n{r.stdout}{r.stderr}")
+    _INSTALL_STAMP.write_text(digest, encoding="utf-8")
+
+
+def typescript_version() -> str:
+    return json.loads(TYPESCRIPT_PACKAGE.read_text(encoding="utf-8"))["version"]
+
+
+# =============================================================================
+# Per-version Scandit packages
+# =============================================================================
+
+_project_lock = threading.Lock()
+
+
+def _write_package_json(project: Path, sdk_version: str, packages: set[str]) -> None:
+    project.mkdir(parents=True, exist_ok=True)
+    (project / "package.json").write_text(
+        json.dumps(
+            {
+                "name": "scandit-snippet-sdk",
+                "private": True,
+                "dependencies": {name: sdk_version for name in sorted(packages)},
+            },
+            indent=2,
+        ) + "\n",
+        encoding="utf-8",
+    )
+
+
+def _raise_unless_unpublished(r: subprocess.CompletedProcess, sdk_version: str) -> None:
+    if not _NOT_PUBLISHED.search(r.stdout + r.stderr):
+        raise RuntimeError(
+            f"could not install the Scandit {sdk_version} npm packages:\n{r.stdout}{r.stderr}"
+        )
+
+
+def sdk_project(sdk_version: str, packages: set[str]) -> Path:
+    """The directory whose node_modules hold the Scandit npm *packages* at
+    *sdk_version*, installing the ones it does not have yet. A package npm
+    does not publish at that version is left out, so imports of it fail to
+    resolve; `--clean` forgets which ones those were."""
+    with _project_lock:
+        project = BUILD_DIR / sdk_version
+        # Where the snippets' virtual files are placed
+        (project / "src").mkdir(parents=True, exist_ok=True)
+        stamp_file = project / "packages.json"
+        try:
+            stamp = json.loads(stamp_file.read_text(encoding="utf-8"))
+            installed = {
+                name for name in stamp["installed"]
+                if (project / "node_modules" / name / "package.json").exists()
+            }
+            unpublished = set(stamp["unpublished"])
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            installed, unpublished = set(), set()
+
+        missing = packages - installed - unpublished
+        if not missing:
+            return project
+        with timing.span("npm install", "tool", sdk_version=sdk_version, packages=len(missing)):
+            _write_package_json(project, sdk_version, installed | missing)
+            r = _npm_install(project)
+            if r.returncode == 0:
+                installed |= missing
+            else:
+                _raise_unless_unpublished(r, sdk_version)
+                # Find out which packages are not published at this version.
+                for name in sorted(missing):
+                    _write_package_json(project, sdk_version, installed | {name})
+                    r = _npm_install(project)
+                    if r.returncode == 0:
+                        installed.add(name)
+                    else:
+                        _raise_unless_unpublished(r, sdk_version)
+                        unpublished.add(name)
+                _write_package_json(project, sdk_version, installed)
+        stamp_file.write_text(
+            json.dumps({"installed": sorted(installed), "unpublished": sorted(unpublished)}),
+            encoding="utf-8",
+        )
+        return project
+
+
+# =============================================================================
+# Client
+# =============================================================================
+
+
+class LanguageServiceClient:
+    """Sends requests to a language service process over its stdin/stdout."""
+
+    def __init__(self):
+        LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with LOG_FILE.open("a", encoding="utf-8") as log:
+            self.process = subprocess.Popen(
+                [find_node(), str(SERVICE_SCRIPT)],
+                cwd=TEST_BED_DIR,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=log,
+                text=True,
+                encoding="utf-8",
+            )
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def request(self, op: str, **fields) -> dict:
+        with self._lock:
+            self._next_id += 1
+            message = {"id": self._next_id, "op": op, **fields}
+            try:
+                self.process.stdin.write(json.dumps(message) + "\n")
+                self.process.stdin.flush()
+                line = self.process.stdout.readline()
+            except OSError:
+                line = ""
+        if not line:
+            raise RuntimeError(f"TypeScript language service exited. See {LOG_FILE}")
+        response = json.loads(line)
+        if "error" in response:
+            raise RuntimeError(f"TypeScript language service failed:\n{response['error']}")
+        return response
+
+    def check(self, files: dict[str, Optional[str]]) -> dict[str, list[list]]:
+        """Set the given virtual files (None removes one) and return the
+        [line, code, message] errors of each file that was set."""
+        return self.request("check", files=files)["diagnostics"]
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+_client_lock = threading.Lock()
+_client: Optional[LanguageServiceClient] = None
+
+
+def client() -> LanguageServiceClient:
+    """The language service of this run, started on first use and stopped
+    when the run exits."""
+    global _client
+    with _client_lock:
+        if _client is None or _client.process.poll() is not None:
+            _client = LanguageServiceClient()
+            atexit.register(_client.close)
+        return _client
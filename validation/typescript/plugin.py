@@ -0,0 +1,171 @@
+"""
+TypeScript/JavaScript-specific validation plugin.
+"""
+
+import re
+import shutil
+from pathlib import Path
+from typing import Iterable
+
+from android import ELLIPSIS_LINE, file_digest, fingerprint, write_generated_sources
+from base import CompileResult, Failure, LanguagePlugin, Snippet, ToolchainUnavailable
+from typescript import language_service
+from typescript.language_service import (
+    BUILD_DIR,
+    GENERATED_DIR,
+    PACKAGE_JSON,
+    SERVICE_SCRIPT,
+    STUBS_DIR,
+    ensure_typescript,
+    find_node,
+    sdk_project,
+    typescript_version,
+)
+import timing
+
+# =============================================================================
+# TypeScript-specific constants
+# =============================================================================
+
+# Generated file extension per fence info string. The extension decides how
+# the language service reads the file: as TypeScript or JavaScript, with JSX.
+_EXTENSIONS = {
+    "ts": ".ts",
+    "typescript": ".ts",
+    "tsx": ".tsx",
+    "js": ".js",
+    "javascript": ".js",
+    "jsx": ".jsx",
+}
+
+# React Native snippets use JSX in plain ```js / ```ts fences.
+_JSX_DOCS = re.compile(r"(^|/)(react-native|_[\w-]*react-native)")
+
+# "Cannot find module" for relative imports: snippets import the sample app's
+# own files (e.g. './cart-model'), which the docs don't contain.
+_MISSING_MODULE = 2307
+_RELATIVE_IMPORT = re.compile(r"""['"]\.\.?/""")
+
+# A Scandit npm package that a snippet imports, e.g. '@scandit/web-datacapture-core'
+# (also through a subpath such as '…/build/electron/main')
+_SCANDIT_IMPORT = re.compile(r"""(?:\bfrom|\bimport|\brequire)\s*\(?\s*['"]((?:@scandit/|scandit-)[\w-]+)""")
+
+# Part of every snippet's cache key. Bump it whenever _generate_source or the
+# compiler options in language-service.js change in a way that can change
+# check results.
+_TEMPLATE_VERSION = 2
+
+# =============================================================================
+# TypeScript source generation utilities
+# =============================================================================
+
+
+def _extension(snippet: Snippet) -> str:
+    extension = _EXTENSIONS.get(snippet.fence, ".ts")
+    if not extension.endswith("x") and _JSX_DOCS.search(snippet.source_file.as_posix()):
+        extension += "x"
+    return extension
+
+
+def _is_ignored(code: int, message: str) -> bool:
+    return code == _MISSING_MODULE and bool(_RELATIVE_IMPORT.search(message))
+
+
+# =============================================================================
+# TypeScriptPlugin
+# =============================================================================
+
+
+class TypeScriptPlugin(LanguagePlugin):
+    @property
+    def name(self) -> str:
+        return "TypeScript"
+
+    @property
+    def value(self) -> str:
+        return "typescript"
+
+    @property
+    def fence_tags(self) -> tuple[str, ...]:
+        return tuple(_EXTENSIONS)
+
+    def prepare(self) -> None:
+        try:
+            find_node()
+            ensure_typescript()
+        except (FileNotFoundError, RuntimeError) as e:
+            raise ToolchainUnavailable(str(e)) from e
+
+    def content_key(self, snippet: Snippet) -> str:
+        # The same code checks differently as TypeScript and as JavaScript.
+        return f"{_extension(snippet)}:{snippet.hash}"
+
+    def toolchain_fingerprint(self, sdk_version: str) -> str:
+        # Scandit imports resolve to the packages npm publishes for sdk_version,
+        # which do not change once published.
+        return fingerprint(
+            f"typescript-template-{_TEMPLATE_VERSION}",
+            f"sdk-{sdk_version}",
+            file_digest(SERVICE_SCRIPT),
+            file_digest(PACKAGE_JSON),
+            *(file_digest(p) for p in sorted(STUBS_DIR.glob("*.d.ts"))),
+            typescript_version(),
+        )
+
+    def _generate_source(self, snippet: Snippet) -> str:
+        body = ELLIPSIS_LINE.sub("// ...", snippet.content)
+        return f"// Source: {snippet.source_file}, snippet {snippet.index}\n{body}\n"
+
+    def generate_sources(self, snippets: Iterable[Snippet]) -> None:
+        by_extension: dict[str, list[tuple[str, str]]] = {
+            extension: [] for extension in set(_EXTENSIONS.values())
+        }
+        for snippet in snippets:
+            by_extension[_extension(snippet)].append(
+                (self._class_name(snippet), self._generate_source(snippet))
+            )
+        # Every extension is written, so stale files of each one are removed.
+        for extension, sources in sorted(by_extension.items()):
+            write_generated_sources(sources, extension, f"Snippet_{self.value}_", None, GENERATED_DIR)
+
+    def clean(self) -> None:
+        if GENERATED_DIR.exists():
+            shutil.rmtree(GENERATED_DIR)
+        if BUILD_DIR.exists():
+            shutil.rmtree(BUILD_DIR)
+
+    def compile(self, snippets: list[Snippet], sdk_version: str) -> CompileResult:
+        """Type-check the snippets in the run's language service process.
+
+        The generated files are sent as in-memory files of one program that
+        lives for the whole run, so later batches and docs versions reuse the
+        parsed default libs and typings, and unchanged files are not re-parsed.
+        Each SDK version's files are placed in the directory holding its
+        Scandit packages, so their imports resolve to that release."""
+        if not snippets:
+            return CompileResult(failures=[])
+
+        project = sdk_project(
+            sdk_version, {name for s in snippets for name in _SCANDIT_IMPORT.findall(s.content)}
+        )
+        snippet_by_path = {
+            project / "src" / f"{self._class_name(s)}{_extension(s)}": s for s in snippets
+        }
+        with timing.span("typescript check", "tool", files=len(snippet_by_path)):
+            diagnostics = language_service.client().check(
+                {
+                    str(path): (GENERATED_DIR / path.name).read_text(encoding="utf-8")
+                    for path in snippet_by_path
+                }
+            )
+
+        failures: list[Failure] = []
+        for path, errors in diagnostics.items():
+            messages = [
+                f"  line {line}: TS{code}: {message}"
+                for line, code, message in errors
+                if not _is_ignored(code, message)
+            ]
+            if messages and Path(path) in snippet_by_path:
+                failures.append(Failure(snippet=snippet_by_path[Path(path)], errors=messages))
+        return CompileResult(failures=failures)
@@ -0,0 +1,146 @@
+#!/usr/bin/env node
+/*
+ * Long-lived TypeScript language service for snippet validation.
+ *
+ * Reads one JSON request per line on stdin and writes one JSON response per
+ * line on stdout. Snippet sources are held in memory as versioned virtual
+ * files; the stub declarations in stubs/, TypeScript's default libs and the
+ * packages in node_modules are read from disk. A virtual file's imports
+ * resolve from its directory, i.e. to the Scandit packages installed for its
+ * SDK version in build/<sdk version>/node_modules, then to the framework
+ * packages in ./node_modules. The service keeps its previous program between requests,
+ * so only virtual files whose text changed are re-parsed and re-bound, and
+ * only the files named in a request are type-checked.
+ *
+ * Requests and responses:
+ *   {"id": 1, "op": "version"}
+ *     -> {"id": 1, "version": "5.6.3"}
+ *   {"id": 2, "op": "check", "files": {"/abs/A.ts": "<text>", "/abs/B.ts": null}}
+ *     Sets the given virtual files (null removes one) and returns the errors
+ *     of every file set by the request:
+ *     -> {"id": 2, "diagnostics": {"/abs/A.ts": [[line, code, message], ...]}}
+ *   Failures are answered with {"id": n, "error": "<message>"}.
+ */
+
+"use strict";
+
+const fs = require("fs");
+const path = require("path");
+const readline = require("readline");
+const ts = require("typescript");
+
+const STUBS_DIR = path.join(__dirname, "stubs");
+
+const COMPILER_OPTIONS = {
+  target: ts.ScriptTarget.ES2022,
+  module: ts.ModuleKind.ESNext,
+  moduleResolution: ts.ModuleResolutionKind.Bundler,
+  // Every snippet is its own module, so top-level declarations of different
+  // snippets never clash and top-level await is allowed.
+  moduleDetection: ts.ModuleDetectionKind.Force,
+  jsx: ts.JsxEmit.Preserve,
+  lib: ["lib.es2022.d.ts", "lib.dom.d.ts", "lib.dom.iterable.d.ts"],
+  allowJs: true,
+  checkJs: true,
+  strict: false,
+  noEmit: true,
+  skipLibCheck: true,
+  // Node's built-in modules (node:fs, …) and React's global JSX namespace,
+  // which JSX in React Native snippets needs without importing React.
+  types: ["node", "react"],
+};
+
+const stubFiles = fs
+  .readdirSync(STUBS_DIR)
+  .filter((name) => name.endsWith(".d.ts"))
+  .map((name) => path.join(STUBS_DIR, name));
+
+// name -> {version, text}
+const files = new Map();
+let projectVersion = 0;
+
+const host = {
+  getProjectVersion: () => String(projectVersion),
+  getScriptFileNames: () => [...stubFiles, ...files.keys()],
+  getScriptVersion: (name) => (files.has(name) ? String(files.get(name).version) : "0"),
+  getScriptSnapshot: (name) => {
+    const text = files.has(name) ? files.get(name).text : ts.sys.readFile(name);
+    return text === undefined ? undefined : ts.ScriptSnapshot.fromString(text);
+  },
+  getCurrentDirectory: () => __dirname,
+  getCompilationSettings: () => COMPILER_OPTIONS,
+  getDefaultLibFileName: (options) => ts.getDefaultLibFilePath(options),
+  fileExists: (name) => files.has(name) || ts.sys.fileExists(name),
+  readFile: (name) => (files.has(name) ? files.get(name).text : ts.sys.readFile(name)),
+  readDirectory: ts.sys.readDirectory,
+  directoryExists: ts.sys.directoryExists,
+  getDirectories: ts.sys.getDirectories,
+};
+
+const service = ts.createLanguageService(host, ts.createDocumentRegistry());
+
+function setFile(name, text) {
+  const current = files.get(name);
+  if (text === null) {
+    if (current) {
+      files.delete(name);
+      projectVersion++;
+    }
+  } else if (!current || current.text !== text) {
+    files.set(name, { version: current ? current.version + 1 : 1, text });
+    projectVersion++;
+  }
+}
+
+function errors(name) {
+  const diagnostics = [
+    ...service.getSyntacticDiagnostics(name),
+    ...service.getSemanticDiagnostics(name),
+  ];
+  return diagnostics
+    .filter((d) => d.category === ts.DiagnosticCategory.Error)
+    .map((d) => [
+      d.file && d.start !== undefined ? d.file.getLineAndCharacterOfPosition(d.start).line + 1 : 0,
+      d.code,
+      ts.flattenDiagnosticMessageText(d.messageText, " "),
+    ]);
+}
+
+function handle(request) {
+  switch (request.op) {
+    case "version":
+      return { version: ts.version };
+    case "check": {
+      const names = Object.keys(request.files);
+      for (const name of names) {
+        setFile(name, request.files[name]);
+      }
+      const diagnostics = {};
+      for (const name of names) {
+        if (files.has(name)) {
+          diagnostics[name] = errors(name);
+        }
+      }
+      return { diagnostics };
+    }
+    default:
+      throw new Error(`unknown op: ${request.op}`);
+  }
+}
+
+const input = readline.createInterface({ input: process.stdin, crlfDelay: Infinity });
+input.on("line", (line) => {
+  if (!line.trim()) {
+    return;
+  }
+  let response;
+  let id = null;
+  try {
+    const request = JSON.parse(line);
+    id = request.id;
+    response = { id, ...handle(request) };
+  } catch (e) {
+    response = { id, error: String(e && e.stack ? e.stack : e) };
+  }
+  process.stdout.write(JSON.stringify(response) + "\n");
+});
@@ -0,0 +1,13 @@
+// Names the documentation snippets use without declaring them: Cordova and
+// Titanium expose the SDK as a global, and sections of one guide build on the
+// variables set up in earlier sections. The same name stands for values of a
+// different framework's API in each guide, so these are left untyped.
+
+declare var Scandit: any;
+declare var Ti: any;
+
+declare var context: any;
+declare var dataCaptureContext: any;
+declare var camera: any;
+declare var view: any;
+declare var dataCaptureView: any;
@@ -0,0 +1,8 @@
+// Modules the documentation snippets import that the test bed does not
+// install. Everything imported from a shorthand ambient module is typed as
+// `any`. The Scandit packages and the frameworks are installed with their
+// published type declarations (see package.json and language_service.py), so
+// misnamed imports and wrong calls of their APIs are reported.
+
+// Camera mock for the web SDK's end-to-end testing guide
+declare module "@eatsjobs/media-mock";
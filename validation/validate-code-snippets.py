@@ -1,57 +1,136 @@
 #!/usr/bin/env python3
 """
-Validates code snippets from the Android SDK documentation by extracting them,
+Validates code snippets from the SDK documentation by extracting them,
 wrapping each one in its own compilable class, and checking they compile against
 the real Scandit SDK.
 
 Usage:
     python3 validation/validate-code-snippets.py kotlin
+    python3 validation/validate-code-snippets.py all
+        Every language whose toolchain (dotnet, node, flutter, …) is
+        installed; the others are skipped with a notice.
     python3 validation/validate-code-snippets.py java --clean
+    python3 validation/validate-code-snippets.py csharp
+        C# snippets build with the dotnet CLI; the Scandit .NET packages are
+        restored into the local NuGet cache on first use.
+    python3 validation/validate-code-snippets.py typescript
+        Type-checks ```js/```ts snippets in one Node language service process
+        against the published typings of the packages they import: the
+        Scandit npm packages of the SDK version and pinned framework packages.
+    python3 validation/validate-code-snippets.py dart
+        Analyzes ```dart snippets on one Dart analysis server per run. Flutter
+        packages are resolved offline from validation/dart/test-bed/.pub-cache;
+        if a version is missing, the run fails with the commands that fetch it.
+    python3 validation/validate-code-snippets.py all --changed-since origin/main
+    python3 validation/validate-code-snippets.py kotlin --partitioned
+    python3 validation/validate-code-snippets.py all --check-only
+    python3 validation/validate-code-snippets.py all --timings --trace trace.json
+        Print how long each phase and compiler call took, and write them as a
+        Chrome trace (open in chrome://tracing or ui.perfetto.dev).
+    python3 validation/validate-code-snippets.py all --fail-fast
+    python3 validation/validate-code-snippets.py all --remote-cache http://cache.example:8765
+        Share results with other machines through a remote cache, e.g. one
+        served by validation/remote-cache-server.py. SNIPPET_REMOTE_CACHE_URL
+        sets the same default. Results are uploaded only when
+        SNIPPET_REMOTE_CACHE_WRITE_TOKEN is set; otherwise the cache is read-only.
+    python3 validation/validate-code-snippets.py kotlin --watch
+        After the run, revalidate the snippets of each docs file as soon as it
+        is saved, on compilers kept warm between rounds.
+    python3 validation/validate-code-snippets.py all --versions all
+        Also validate the versioned_docs snapshots, each against its own SDK
+        version, in the same run.
+    python3 validation/validate-code-snippets.py all --shard 2/4
+    python3 validation/validate-code-snippets.py merge
+        Split a run across CI nodes: each node compiles one shard and writes
+        its results; `merge` combines the shard files into the usual report,
+        baseline comparison and exit code.
     python3 validation/validate-code-snippets.py kotlin --baseline
         Run full validation and write a baseline JSON of all currently-failing
         snippet hashes. Commit this file to silence known failures in CI.
+
+Start `python3 validation/compile-server.py start` to keep a warm compiler JVM
+between runs; without it, each run launches kotlinc/javac from scratch.
 """
 
+import atexit
+import contextlib
+import hashlib
+import heapq
 import json
+import queue
 import re
+import subprocess
 import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
 
 # Add the validation/ directory to sys.path so language plugins can import android
 sys.path.insert(0, str(Path(__file__).parent))
 
 from android import (
+    delete_cache,
     load_cache,
     save_cache,
-    ensure_gradle_wrapper,
 )
-from base import CompileResult, Failure, LanguagePlugin, Snippet
+from android import compile_server
+from base import CompileResult, Failure, LanguagePlugin, Snippet, ToolchainUnavailable
+from csharp import plugin as csharp_plugin
+from dart import plugin as dart_plugin
 from java import plugin as java_plugin
 from kotlin import plugin as kotlin_plugin
+from typescript import plugin as typescript_plugin
+import remote_cache
+import timing
+from watch import Watcher
 
 # =============================================================================
 # Configuration
 # =============================================================================
 
 REPO_ROOT = Path(__file__).parent.parent
+DOCS_ROOT = REPO_ROOT / "docs"
+VERSIONED_DOCS_ROOT = REPO_ROOT / "versioned_docs"
+VERSIONS_FILE = REPO_ROOT / "versions.json"
+DOCUSAURUS_CONFIG = REPO_ROOT / "docusaurus.config.ts"
+
+# Docs version of the unversioned docs/ tree. Every other docs version is a
+# versioned_docs/version-X/ snapshot, validated against SDK version X.
+CURRENT_DOCS = "current"
+
+# Subtrees of each docs root (docs/ or versioned_docs/version-X/) to collect
+# snippets from.
 DOCS_DIRS = [
-    REPO_ROOT / "docs" / "sdks",
+    Path("sdks"),
 ]
-DOCUSAURUS_CONFIG = REPO_ROOT / "docusaurus.config.ts"
 
 # Doc subtrees excluded from snippet collection: this validator compiles
 # ```kotlin fences against the Android SDK classpath. KMP snippets import
 # com.kmp.* packages from KMP klibs that aren't published/toolchain-available
 # here, so they can't compile against the Android classpath.
 EXCLUDED_DOC_DIRS = {
-    REPO_ROOT / "docs" / "sdks" / "kmp",
+    Path("sdks") / "kmp",
 }
 VALIDATION_DIR = Path(__file__).parent
 CACHE_DIR = VALIDATION_DIR / "cache"
 BASELINES_DIR = VALIDATION_DIR / "baselines"
 CONFIG_FILE = VALIDATION_DIR / "config.json"
+EXTRACTION_INDEX_FILE = CACHE_DIR / "extraction-index.json"
+
+LANGUAGE_PLUGINS = {
+    p.value: p
+    for p in [java_plugin, kotlin_plugin, csharp_plugin, typescript_plugin, dart_plugin]
+}
+
+_print_lock = threading.Lock()
+
+
+def _log(message: str):
+    """Print a whole line at once, even while languages compile concurrently."""
+    with _print_lock:
+        print(message, flush=True)
 
-LANGUAGE_PLUGINS = {p.value: p for p in [java_plugin, kotlin_plugin]}
 
 def _load_config() -> dict:
     with CONFIG_FILE.open("r", encoding="utf-8") as f:
@@ -86,6 +165,28 @@ def _read_sdk_version() -> str:
     return version
 
 
+def _read_docs_versions() -> list[str]:
+    """Versioned docs snapshots listed in versions.json, newest first."""
+    try:
+        return json.loads(VERSIONS_FILE.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return []
+
+
+def _docs_root(docs_version: str) -> Path:
+    if docs_version == CURRENT_DOCS:
+        return DOCS_ROOT
+    return VERSIONED_DOCS_ROOT / f"version-{docs_version}"
+
+
+def _docs_version(source_file: Path) -> str:
+    """Docs version that the repo-relative *source_file* belongs to."""
+    parts = source_file.parts
+    if len(parts) > 1 and parts[0] == VERSIONED_DOCS_ROOT.name:
+        return parts[1].removeprefix("version-")
+    return CURRENT_DOCS
+
+
 # =============================================================================
 # Step 1 — Extract snippets from markdown
 # =============================================================================
@@ -103,17 +204,41 @@ def _restore_hidden_lines(content: str) -> str:
 def _extract_snippets(text: str, path: Path, fence: re.Pattern) -> list[Snippet]:
     snippets = []
     for i, match in enumerate(fence.finditer(text)):
-        content = _restore_hidden_lines(match.group(1).rstrip())
+        content = _restore_hidden_lines(match.group(2).rstrip())
         if _ONLY_DOTS.match(content):
             continue
         snippets.append(
-            Snippet(source_file=path.relative_to(REPO_ROOT), index=i, content=content)
+            Snippet(
+                source_file=path.relative_to(REPO_ROOT),
+                index=i,
+                content=content,
+                fence=match.group(1),
+            )
         )
     return snippets
 
 
 _IMPORT_RE = re.compile(r"""^import\s+\w+\s+from\s+['"](\.[^'"]+\.mdx?)['"];?\s*$""", re.MULTILINE)
-_IMPORT_EXCLUDE = {(REPO_ROOT / p).resolve() for p in _load_config().get("import_exclude", [])}
+
+
+def _import_excludes() -> set[Path]:
+    """Resolved `import_exclude` paths from config.json. Paths under docs/ are
+    excluded in every versioned docs snapshot too."""
+    excluded: set[Path] = set()
+    for p in _load_config().get("import_exclude", []):
+        path = Path(p)
+        excluded.add((REPO_ROOT / path).resolve())
+        if path.parts[0] == DOCS_ROOT.name:
+            for root in VERSIONED_DOCS_ROOT.glob("version-*"):
+                excluded.add((root / path.relative_to(DOCS_ROOT.name)).resolve())
+    return excluded
+
+
+_IMPORT_EXCLUDE = _import_excludes()
+# Recorded in the extraction index, whose imports were resolved against it.
+_IMPORT_EXCLUDE_DIGEST = hashlib.sha256(
+    json.dumps(sorted(_load_config().get("import_exclude", []))).encode()
+).hexdigest()
 
 
 def _resolve_imports(text: str, path: Path) -> list[Path]:
@@ -129,28 +254,308 @@ def _resolve_imports(text: str, path: Path) -> list[Path]:
     return imported
 
 
-def _collect_snippets(fence: re.Pattern) -> list[Snippet]:
-    all_snippets: list[Snippet] = []
-    seen: set[Path] = set()
-    for docs_dir in DOCS_DIRS:
-        if not docs_dir.exists():
-            continue
-        for path in sorted(docs_dir.rglob("*.md")) + sorted(docs_dir.rglob("*.mdx")):
-            resolved_path = path.resolve()
-            if any(
-                resolved_path == excluded or excluded in resolved_path.parents
-                for excluded in EXCLUDED_DOC_DIRS
-            ):
+def _doc_files(docs_versions: list[str]) -> list[Path]:
+    """Markdown files under DOCS_DIRS of each docs version in collection order,
+    minus excluded subtrees."""
+    files: list[Path] = []
+    for docs_version in docs_versions:
+        root = _docs_root(docs_version)
+        excluded_dirs = {(root / d).resolve() for d in EXCLUDED_DOC_DIRS}
+        for docs_dir in (root / d for d in DOCS_DIRS):
+            if not docs_dir.exists():
                 continue
-            seen.add(resolved_path)
-            text = path.read_text(encoding="utf-8")
-            all_snippets.extend(_extract_snippets(text, path, fence))
-            for imported in _resolve_imports(text, path):
-                if imported not in seen:
-                    seen.add(imported)
-                    imported_text = imported.read_text(encoding="utf-8")
-                    all_snippets.extend(_extract_snippets(imported_text, imported, fence))
-    return all_snippets
+            for path in sorted(docs_dir.rglob("*.md")) + sorted(docs_dir.rglob("*.mdx")):
+                resolved_path = path.resolve()
+                if any(
+                    resolved_path == excluded or excluded in resolved_path.parents
+                    for excluded in excluded_dirs
+                ):
+                    continue
+                files.append(path)
+    return files
+
+
+def _extract_file(path: Path, fences: dict[str, re.Pattern]) -> dict:
+    """Read *path* once and return its extraction-index entry: stat, content
+    hash, imported files and snippets per language."""
+    data = path.read_bytes()
+    st = path.stat()
+    text = data.decode("utf-8")
+    return {
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "imports": [str(p.relative_to(REPO_ROOT)) for p in _resolve_imports(text, path)],
+        "snippets": {
+            lang: [[s.index, s.content, s.fence] for s in _extract_snippets(text, path, fence)]
+            for lang, fence in fences.items()
+        },
+    }
+
+
+# =============================================================================
+# Extraction index — skips re-parsing docs files that haven't changed
+# =============================================================================
+
+# Bump when _extract_snippets or _resolve_imports change what they produce.
+_EXTRACTOR_VERSION = 2
+
+
+def _language_scope(lang: str, fence: re.Pattern) -> dict:
+    """What the indexed snippets of *lang* depend on besides file contents."""
+    return {
+        "fence": fence.pattern,
+        "excluded_doc_dirs": sorted(str(d) for d in LANGUAGE_PLUGINS[lang].excluded_doc_dirs),
+    }
+
+
+def _load_extraction_index(fences: dict[str, re.Pattern]) -> dict:
+    """Return {repo-relative path: entry} from the on-disk index. Everything is
+    dropped if `import_exclude` changed since it was written, and the snippets
+    of any language whose fence pattern or excluded docs dirs changed."""
+    try:
+        data = json.loads(EXTRACTION_INDEX_FILE.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if data.get("version") != _EXTRACTOR_VERSION:
+        return {}
+    if data.get("import_exclude") != _IMPORT_EXCLUDE_DIGEST:
+        return {}
+    files = data.get("files", {})
+    stale_langs = [
+        lang for lang, fence in fences.items()
+        if data.get("languages", {}).get(lang) != _language_scope(lang, fence)
+    ]
+    for entry in files.values():
+        for lang in stale_langs:
+            entry["snippets"].pop(lang, None)
+    return files
+
+
+def _save_extraction_index(files: dict, fences: dict[str, re.Pattern]) -> None:
+    try:
+        previous = json.loads(EXTRACTION_INDEX_FILE.read_text(encoding="utf-8"))
+        current = (
+            previous.get("version") == _EXTRACTOR_VERSION
+            and previous.get("import_exclude") == _IMPORT_EXCLUDE_DIGEST
+        )
+        recorded = previous.get("languages", {}) if current else {}
+    except (FileNotFoundError, json.JSONDecodeError):
+        recorded = {}
+    recorded.update({lang: _language_scope(lang, fence) for lang, fence in fences.items()})
+    EXTRACTION_INDEX_FILE.parent.mkdir(parents=True, exist_ok=True)
+    EXTRACTION_INDEX_FILE.write_text(
+        json.dumps({
+            "version": _EXTRACTOR_VERSION,
+            "import_exclude": _IMPORT_EXCLUDE_DIGEST,
+            "languages": recorded,
+            "files": files,
+        }),
+        encoding="utf-8",
+    )
+
+
+def _is_fresh(entry: Optional[dict], path: Path, fences: dict[str, re.Pattern]) -> bool:
+    """True if *entry* still describes *path* (same mtime and size) and holds
+    snippets for every requested language."""
+    if entry is None or not all(lang in entry["snippets"] for lang in fences):
+        return False
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return False
+    return st.st_mtime_ns == entry["mtime_ns"] and st.st_size == entry["size"]
+
+
+def _index_key(path: Path) -> str:
+    return str(path.relative_to(REPO_ROOT))
+
+
+def _excluded_for(lang: str, key: str) -> bool:
+    """True if the file at repo-relative *key* lies in one of the docs
+    subtrees the plugin for *lang* does not collect snippets from."""
+    excluded_dirs = LANGUAGE_PLUGINS[lang].excluded_doc_dirs
+    if not excluded_dirs:
+        return False
+    path = REPO_ROOT / key
+    root = _docs_root(_docs_version(Path(key)))
+    try:
+        relative = path.relative_to(root)
+    except ValueError:
+        return False
+    return any(d == relative or d in relative.parents for d in excluded_dirs)
+
+
+def _snippets_from_entry(
+    entry: dict, key: str, fences: dict[str, re.Pattern], importers: frozenset = frozenset()
+) -> Iterator[tuple[str, Snippet]]:
+    for lang in fences:
+        if _excluded_for(lang, key):
+            continue
+        for index, content, fence in entry["snippets"][lang]:
+            yield lang, Snippet(
+                source_file=Path(key), index=index, content=content, fence=fence,
+                importers=importers,
+            )
+
+
+def _iter_snippets(
+    fences: dict[str, re.Pattern], docs_versions: list[str]
+) -> Iterator[tuple[str, Snippet]]:
+    """Yield (language, snippet) pairs for every fence in *fences* in a single
+    pass over the docs trees of *docs_versions*.
+
+    Files whose mtime and size match the extraction index are served from it
+    without being read. The rest are parsed on a process pool and yielded in
+    collection order as soon as each one is ready, so consumers can start
+    before the walk finishes. Imported MDX partials are indexed like any other
+    file, so an edited partial is re-extracted on its own while its unchanged
+    importers stay cached. Each partial is yielded once, after the last docs
+    file, with the files importing it directly or through other partials.
+    """
+    index = _load_extraction_index(fences)
+    files = _doc_files(docs_versions)
+    stale = [path for path in files if not _is_fresh(index.get(_index_key(path)), path, fences)]
+    # Partial -> the docs files importing it, in order of first import
+    importers: dict[str, set[str]] = {}
+
+    def lookup(path: Path, future=None) -> dict:
+        key = _index_key(path)
+        if future is None and _is_fresh(index.get(key), path, fences):
+            return index[key]
+        entry = future.result() if future is not None else _extract_file(path, fences)
+        previous = index.get(key)
+        if previous and previous["sha256"] == entry["sha256"]:
+            # Same content: keep the other languages' snippets from the index.
+            entry["snippets"] = {**previous["snippets"], **entry["snippets"]}
+        index[key] = entry
+        return entry
+
+    with ProcessPoolExecutor() if stale else contextlib.nullcontext() as pool:
+        futures = {path: pool.submit(_extract_file, path, fences) for path in stale}
+        for path in files:
+            key = _index_key(path)
+            entry = lookup(path, futures.get(path))
+            yield from _snippets_from_entry(entry, key, fences)
+            pending = list(entry["imports"])
+            reached: set[str] = set()
+            while pending:
+                imported = pending.pop()
+                if imported not in reached:
+                    reached.add(imported)
+                    importers.setdefault(imported, set()).add(key)
+                    pending.extend(lookup(REPO_ROOT / imported)["imports"])
+
+    keys = {_index_key(path) for path in files}
+    for imported, pages in importers.items():
+        if imported not in keys:
+            yield from _snippets_from_entry(
+                index[imported], imported, fences, frozenset(Path(p) for p in pages)
+            )
+
+    _save_extraction_index(
+        {key: entry for key, entry in index.items() if (REPO_ROOT / key).exists()}, fences
+    )
+
+
+def _collect_snippets(
+    fences: dict[str, re.Pattern], docs_versions: list[str]
+) -> dict[str, list[Snippet]]:
+    """Collect the snippets of every language in *fences* in one pass."""
+    collected: dict[str, list[Snippet]] = {lang: [] for lang in fences}
+    for lang, snippet in _iter_snippets(fences, docs_versions):
+        collected[lang].append(snippet)
+    return collected
+
+
+def _fence_for(plugin: LanguagePlugin) -> re.Pattern:
+    """Pattern matching the plugin's code fences: group 1 is the fence's info
+    string, group 2 the code."""
+    tags = "|".join(re.escape(tag) for tag in plugin.fence_tags)
+    return re.compile(rf"```({tags})\s*\n(.*?)```", re.DOTALL)
+
+
+# =============================================================================
+# Change scoping — restrict validation to docs touched since a git ref
+# =============================================================================
+
+
+def _git(*args: str) -> str:
+    r = subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True, text=True)
+    if r.returncode != 0:
+        print(f"ERROR: git {' '.join(args)} failed.")
+        print(r.stderr)
+        sys.exit(1)
+    return r.stdout
+
+
+def _changed_files(ref: str) -> set[Path]:
+    """Repo-relative paths changed since the merge base of *ref* and HEAD,
+    including uncommitted and untracked files."""
+    merge_base = _git("merge-base", ref, "HEAD").strip()
+    changed = _git("diff", "--name-only", "-z", merge_base).split("\0")
+    untracked = _git("ls-files", "--others", "--exclude-standard", "-z").split("\0")
+    return {Path(name) for name in changed + untracked if name}
+
+
+def _affected_files(changed: set[Path]) -> set[Path]:
+    """*changed* plus every docs file that imports one of them, directly or
+    through other partials, per the MDX import graph in the extraction index."""
+    importers: dict[Path, set[Path]] = {}
+    for key, entry in _load_extraction_index({}).items():
+        for imported in entry["imports"]:
+            importers.setdefault(Path(imported), set()).add(Path(key))
+
+    affected = set(changed)
+    pending = list(changed)
+    while pending:
+        for importer in importers.get(pending.pop(), ()):
+            if importer not in affected:
+                affected.add(importer)
+                pending.append(importer)
+    return affected
+
+
+def _edit_times(files: set[Path], docs_versions: list[str]) -> dict[Path, float]:
+    """When each repo-relative file in *files* was last edited: its mtime if
+    it has uncommitted changes or git doesn't track it, else the time of the
+    last commit that touched it (a fresh checkout's mtimes say nothing)."""
+    def mtime(path: Path) -> float:
+        try:
+            return (REPO_ROOT / path).stat().st_mtime
+        except FileNotFoundError:
+            return 0.0
+
+    pathspec = [str(_docs_root(v).relative_to(REPO_ROOT)) for v in docs_versions]
+    try:
+        dirty = set(subprocess.run(
+            ["git", "diff", "--name-only", "-z", "HEAD", "--", *pathspec],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.split("\0"))
+    except (OSError, subprocess.CalledProcessError):
+        return {path: mtime(path) for path in files}
+
+    times = {path: mtime(path) for path in files if str(path) in dirty}
+    pending = files - times.keys()
+    # Walk history newest first and stop once every file has been seen.
+    log = subprocess.Popen(
+        ["git", "log", "--format=%x00%ct", "--name-only", "--", *pathspec],
+        cwd=REPO_ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    commit_time = 0.0
+    for line in log.stdout:
+        if line.startswith("\0"):
+            commit_time = float(line[1:])
+        elif Path(line.strip()) in pending:
+            times[Path(line.strip())] = commit_time
+            pending.discard(Path(line.strip()))
+            if not pending:
+                break
+    log.kill()
+    log.wait()
+    for path in pending:
+        times[path] = mtime(path)
+    return times
 
 
 # =============================================================================
@@ -185,40 +590,186 @@ def _save_baseline(entries: list[dict], baseline_file: Path):
 
 
 def _cache_file_for(plugin: LanguagePlugin) -> Path:
-    return CACHE_DIR / f"snippet-{plugin.value}-cache.json"
+    return CACHE_DIR / f"snippet-{plugin.value}-cache.sqlite"
+
+
+def _unique(plugin: LanguagePlugin, snippets: Iterable[Snippet]) -> Iterator[Snippet]:
+    """Yield the first occurrence of each distinct snippet body (per the
+    plugin's content key) within each docs version; later verbatim copies
+    share its result. Copies in different versions compile against different
+    SDKs, so each version keeps its own."""
+    seen: set[tuple[str, str]] = set()
+    for snippet in snippets:
+        key = (_docs_version(snippet.source_file), plugin.content_key(snippet))
+        if key not in seen:
+            seen.add(key)
+            yield snippet
+
+
+# Uncached snippets compile in batches that start small and double, so the
+# likeliest failures are reported within seconds while later batches stay
+# large enough to amortise per-call compiler overhead.
+_FIRST_BATCH_SIZE = 8
 
 
 def _run_compile(
-    plugin: LanguagePlugin, snippets: list[Snippet], sdk_version: str
+    plugin: LanguagePlugin,
+    snippets: list[Snippet],
+    sdk_version: str,
+    edit_times: Optional[Callable[[set[Path]], dict[Path, float]]] = None,
+    baseline: Optional[set] = None,
+    stop: Optional[threading.Event] = None,
 ) -> CompileResult:
-    """Load cache, filter already-compiled snippets, compile the rest, save cache."""
-    cache = load_cache(sdk_version, _cache_file_for(plugin))
+    """Load cache, filter already-compiled snippets, compile the rest, save cache.
+
+    Cache entries are keyed by the plugin's composite fingerprint (snippet
+    content plus template, base class, compiler and classpath), so a change to
+    any of them recompiles exactly the snippets it can affect. Occurrences
+    sharing a key are compiled once, through the first occurrence (the one
+    _unique() generated a source file for), and the result is reported for
+    every occurrence.
+
+    Snippets are compiled in priority order: those that failed last time
+    first, then by how recently their file was edited (*edit_times* maps a
+    set of files to their edit times), and snippets in the *baseline* last. Failures outside the baseline are printed
+    as soon as their batch finishes. When *stop* is given (--fail-fast), such
+    a failure sets it, and every job skips its remaining batches.
+
+    Compile times are recorded for sharding. One compiler call covers many
+    snippets, so its wall time is split between them by source size."""
+    baseline = baseline or set()
+    with timing.span("toolchain fingerprint", language=plugin.name, sdk_version=sdk_version):
+        toolchain = plugin.toolchain_fingerprint(sdk_version)
+    occurrences: dict[str, list[Snippet]] = {}
+    for snippet in snippets:
+        occurrences.setdefault(plugin.cache_key(snippet, toolchain), []).append(snippet)
+
+    def report_failures(failures: list[Failure]):
+        for failure in failures:
+            if _baseline_key(failure) in baseline:
+                continue
+            _log(
+                "\n".join([
+                    f"  [FAIL] {plugin.name} {sdk_version}: "
+                    f"{failure.snippet.source_file}  (snippet {failure.snippet.index})",
+                    *failure.errors,
+                ])
+            )
+            if stop is not None:
+                stop.set()
+
     cached_failures: list[Failure] = []
-    to_compile: list[Snippet] = []
+    to_compile: dict[str, Snippet] = {}
     preserved: dict = {}
 
-    for snippet in snippets:
-        h = snippet.hash
-        if h in cache:
-            preserved[h] = cache[h]
-            if cache[h]:
-                cached_failures.append(Failure(snippet=snippet, errors=cache[h]))
-        else:
-            to_compile.append(snippet)
-
-    print(f"  {len(snippets) - len(to_compile)} cached, {len(to_compile)} to compile")
+    with load_cache(sdk_version, _cache_file_for(plugin)) as cache:
+        with timing.span("load cache", "cache", language=plugin.name, sdk_version=sdk_version):
+            previously_failed = cache.failed_locations()
+            for key, group in occurrences.items():
+                errors = cache.get(key)
+                if errors is not None:
+                    preserved[key] = errors
+                    if errors:
+                        cached_failures.extend(Failure(snippet=s, errors=errors) for s in group)
+                else:
+                    to_compile[key] = group[0]
+
+    # Read-through: snippets missing locally are looked up remotely in
+    # batches, and hits are saved to the local cache with the rest.
+    remote = remote_cache.client()
+    remote_results: dict[str, dict] = {}
+    remote_durations: dict[str, float] = {}
+    if remote is not None and to_compile:
+        with timing.span("remote cache lookup", "cache", language=plugin.name, keys=len(to_compile)):
+            remote_results = remote.get_many(list(to_compile))
+        for key, result in remote_results.items():
+            del to_compile[key]
+            preserved[key] = result["errors"]
+            if result["duration"] is not None:
+                remote_durations[key] = result["duration"]
+            if result["errors"]:
+                cached_failures.extend(Failure(snippet=s, errors=result["errors"]) for s in occurrences[key])
+
+    remote_note = f" ({len(remote_results)} remote)" if remote_results else ""
+    _log(
+        f"  {plugin.name} {sdk_version}: {len(occurrences)} unique of {len(snippets)} snippets — "
+        f"{len(occurrences) - len(to_compile)} cached{remote_note}, {len(to_compile)} to compile"
+    )
+    report_failures(cached_failures)
+
+    # Edit times only matter when the uncached snippets span several batches.
+    edited: dict[Path, float] = {}
+    if edit_times is not None and len(to_compile) > _FIRST_BATCH_SIZE:
+        with timing.span("edit times", language=plugin.name, sdk_version=sdk_version):
+            edited = edit_times({s.source_file for key in to_compile for s in occurrences[key]})
+
+    def priority(key: str) -> tuple:
+        group = occurrences[key]
+        return (
+            all(_snippet_baseline_key(s) in baseline for s in group),
+            not any((str(s.source_file), s.index) in previously_failed for s in group),
+            -max(edited.get(s.source_file, 0.0) for s in group),
+        )
 
+    order = sorted(to_compile, key=priority)
     new_cache = dict(preserved)
+    durations: dict[str, float] = {}
     new_failures: list[Failure] = []
-    if to_compile:
-        result = plugin.compile(to_compile, sdk_version)
-        new_failures = result.failures
-        failed_hashes = {f.snippet.hash: f.errors for f in new_failures}
-        for snippet in to_compile:
-            new_cache[snippet.hash] = failed_hashes.get(snippet.hash, [])
-
-    save_cache(new_cache, sdk_version, _cache_file_for(plugin))
-    return CompileResult(failures=cached_failures + new_failures)
+    skipped: list[Snippet] = []
+    batch_size = _FIRST_BATCH_SIZE
+    while order:
+        if stop is not None and stop.is_set():
+            skipped = [s for key in order for s in occurrences[key]]
+            break
+        batch, order = order[:batch_size], order[batch_size:]
+        batch_size *= 2
+        started = timing.now()
+        with timing.span(
+            "compile batch", language=plugin.name, sdk_version=sdk_version, snippets=len(batch)
+        ):
+            result = plugin.compile([to_compile[key] for key in batch], sdk_version)
+        elapsed = timing.now() - started
+        total_size = sum(len(to_compile[key].content) for key in batch) or 1
+        errors_by_key = {plugin.content_key(f.snippet): f.errors for f in result.failures}
+        batch_failures: list[Failure] = []
+        for key in batch:
+            snippet = to_compile[key]
+            errors = errors_by_key.get(plugin.content_key(snippet), [])
+            new_cache[key] = errors
+            durations[key] = elapsed * len(snippet.content) / total_size
+            # Laid out one after another across the batch, for the trace.
+            timing.record(
+                "snippet",
+                "snippet",
+                started,
+                started + durations[key],
+                file=str(snippet.source_file),
+                index=snippet.index,
+                failed=bool(errors),
+            )
+            started += durations[key]
+            if errors:
+                batch_failures.extend(Failure(snippet=s, errors=errors) for s in occurrences[key])
+        new_failures.extend(batch_failures)
+        report_failures(batch_failures)
+
+    outcomes = {
+        (str(s.source_file), s.index): bool(new_cache[key])
+        for key, group in occurrences.items()
+        if key in new_cache
+        for s in group
+    }
+    with timing.span("save cache", "cache", language=plugin.name, sdk_version=sdk_version):
+        save_cache(
+            new_cache, sdk_version, _cache_file_for(plugin), {**remote_durations, **durations}, outcomes
+        )
+    if remote is not None and remote.uploads and durations:
+        # Write-through: share what this run compiled.
+        with timing.span("remote cache upload", "cache", language=plugin.name, keys=len(durations)):
+            remote.put_many(
+                {key: {"errors": new_cache[key], "duration": durations[key]} for key in durations}
+            )
+    return CompileResult(failures=cached_failures + new_failures, skipped=skipped)
 
 
 # =============================================================================
@@ -232,17 +783,20 @@ def _report(
     plugin: LanguagePlugin,
     returncode: int,
     baseline_skipped: int = 0,
+    sdk_version: Optional[str] = None,
 ) -> int:
     total = len(snippets)
     failed = len(result.failures)
-    passed = total - failed
+    passed = total - failed - len(result.skipped)
 
     print(f"\n{'=' * 60}")
-    print(f"{plugin.name} Snippet Validation")
+    print(f"{plugin.name} Snippet Validation" + (f" — SDK {sdk_version}" if sdk_version else ""))
     print(f"{'=' * 60}")
     summary = f"{total} snippets  |  {passed} passed  |  {failed} failed"
     if baseline_skipped:
         summary += f"  |  {baseline_skipped} skipped (baseline)"
+    if result.skipped:
+        summary += f"  |  {len(result.skipped)} not compiled (--fail-fast)"
     print(summary + "\n")
 
     for failure in sorted(
@@ -262,26 +816,553 @@ def _report(
     return returncode
 
 
+# =============================================================================
+# Step 3 — Baseline
+# =============================================================================
+
+
+def _snippet_baseline_key(snippet: Snippet) -> tuple:
+    return (snippet.hash, str(snippet.source_file), snippet.index)
+
+
+def _baseline_key(failure: Failure) -> tuple:
+    return _snippet_baseline_key(failure.snippet)
+
+
+def _write_baseline(plugin: LanguagePlugin, result: CompileResult, docs_versions: list[str]):
+    """Record the current failures of *plugin* as its baseline for
+    *docs_versions*, keeping the entries of docs versions that were not run."""
+    baseline_file = BASELINES_DIR / f"baseline-{plugin.value}.json"
+    kept = [
+        {"hash": h, "file": file, "snippet": idx}
+        for h, file, idx in _load_baseline(baseline_file)
+        if _docs_version(Path(file)) not in docs_versions
+    ]
+    if result.failures or kept:
+        failed_entries = kept + [
+            {
+                "hash": failure.snippet.hash,
+                "file": str(failure.snippet.source_file),
+                "snippet": failure.snippet.index,
+            }
+            for failure in result.failures
+        ]
+        _save_baseline(failed_entries, baseline_file)
+        print(
+            f"Baseline saved: {len(failed_entries)} failing snippet(s) → "
+            f"{baseline_file.relative_to(REPO_ROOT)}"
+        )
+    else:
+        if baseline_file.exists():
+            baseline_file.unlink()
+            print("All snippets passed — baseline file removed.")
+        else:
+            print("All snippets passed — no baseline file generated.")
+
+
+def _apply_baseline(
+    plugin: LanguagePlugin,
+    result: CompileResult,
+    docs_version: str,
+    scope: Optional[set[Path]] = None,
+) -> tuple[CompileResult, int]:
+    """Filter out baseline failures, but report if any baseline entries are now fixed.
+    Returns (remaining failures, number of failures skipped by the baseline).
+
+    Only baseline entries of *docs_version* — and, with a *scope*, for files
+    in it — are considered, so snippets that were not validated are not
+    reported as fixed."""
+    baseline = _load_baseline(BASELINES_DIR / f"baseline-{plugin.value}.json")
+    baseline = {entry for entry in baseline if _docs_version(Path(entry[1])) == docs_version}
+    if scope is not None:
+        baseline = {entry for entry in baseline if Path(entry[1]) in scope}
+    if not baseline:
+        return result, 0
+
+    failed_keys = {_baseline_key(f) for f in result.failures}
+    skipped_keys = {_snippet_baseline_key(s) for s in result.skipped}
+    still_baseline = failed_keys & baseline
+    fixed_in_baseline = baseline - failed_keys - skipped_keys
+
+    if fixed_in_baseline:
+        print(f"\n{len(fixed_in_baseline)} {plugin.name} baseline snippet(s) now compile successfully — consider updating the baseline:")
+        for h, file, idx in sorted(fixed_in_baseline, key=lambda e: (e[1], e[2])):
+            print(f"  {file}  (snippet {idx})")
+
+    return (
+        CompileResult(
+            failures=[f for f in result.failures if _baseline_key(f) not in baseline],
+            skipped=result.skipped,
+        ),
+        len(still_baseline),
+    )
+
+
+# =============================================================================
+# Sharding — split one run across CI nodes and merge their results
+# =============================================================================
+
+SHARD_RESULTS_DIR = CACHE_DIR / "shards"
+_SHARD_FORMAT = 2
+
+
+def _parse_shard(value: str) -> tuple[int, int]:
+    """argparse type for --shard K/N (1 <= K <= N)."""
+    m = re.fullmatch(r"(\d+)/(\d+)", value)
+    if not m or not 1 <= int(m.group(1)) <= int(m.group(2)):
+        raise ValueError(value)
+    return int(m.group(1)), int(m.group(2))
+
+
+def _shard_group(plugin: LanguagePlugin, docs_version: str, snippet: Snippet) -> str:
+    """Stable id of the group a snippet is sharded with. Verbatim copies share
+    a group, so they are still compiled once."""
+    key = f"{plugin.value}\0{docs_version}\0{plugin.content_key(snippet)}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _partition(
+    job_snippets: dict[tuple, list[Snippet]], sdk_versions: dict[str, str], n_shards: int
+) -> tuple[dict[str, int], str]:
+    """Assign every snippet group to one of *n_shards* shards.
+
+    Groups are weighted by their compile time recorded in the cache; groups
+    without one are estimated from their source size at the average rate of
+    the timed ones. Heaviest groups go first to the lightest shard, with ties
+    broken by group id, so every node computes the same assignment from the
+    same inputs. Returns ({group id: shard index}, digest of the assignment)."""
+    sizes: dict[str, int] = {}
+    timed: dict[str, float] = {}
+    for (plugin, docs_version), snippets in job_snippets.items():
+        sdk_version = sdk_versions[docs_version]
+        toolchain = plugin.toolchain_fingerprint(sdk_version)
+        with load_cache(sdk_version, _cache_file_for(plugin)) as cache:
+            for snippet in snippets:
+                group = _shard_group(plugin, docs_version, snippet)
+                if group in sizes:
+                    continue
+                sizes[group] = len(snippet.content)
+                duration = cache.duration(plugin.cache_key(snippet, toolchain))
+                if duration is not None:
+                    timed[group] = duration
+    timed_size = sum(sizes[g] for g in timed)
+    rate = sum(timed.values()) / timed_size if timed and timed_size else 1.0
+    weights = {g: timed.get(g, sizes[g] * rate) for g in sizes}
+
+    loads = [(0.0, i) for i in range(n_shards)]
+    assignment: dict[str, int] = {}
+    for group in sorted(weights, key=lambda g: (-weights[g], g)):
+        load, i = heapq.heappop(loads)
+        assignment[group] = i
+        heapq.heappush(loads, (load + weights[group], i))
+
+    digest = hashlib.sha256(f"{n_shards}\n".encode())
+    for group in sorted(assignment):
+        digest.update(f"{group}:{assignment[group]}\n".encode())
+    return assignment, digest.hexdigest()
+
+
+def _shard_results_file(shard: int, n_shards: int) -> Path:
+    return SHARD_RESULTS_DIR / f"shard-{shard}-of-{n_shards}.json"
+
+
+def _write_shard_results(
+    path: Path,
+    shard: tuple[int, int],
+    partition: str,
+    plugins: list[LanguagePlugin],
+    sdk_versions: dict[str, str],
+    scope: Optional[set[Path]],
+    job_snippets: dict[tuple, list[Snippet]],
+    results: dict[tuple, CompileResult],
+):
+    """Write one shard's snippets and failures for `merge` to combine."""
+    data = {
+        "format": _SHARD_FORMAT,
+        "shard": shard[0],
+        "shards": shard[1],
+        "partition": partition,
+        "languages": [p.value for p in plugins],
+        "versions": sdk_versions,
+        "scope": sorted(str(p) for p in scope) if scope is not None else None,
+        "jobs": [
+            {
+                "language": plugin.value,
+                "docs_version": docs_version,
+                "snippets": [
+                    [str(s.source_file), s.index, s.content, s.fence]
+                    for s in job_snippets[(plugin, docs_version)]
+                ],
+                "failures": [
+                    [str(f.snippet.source_file), f.snippet.index, f.errors]
+                    for f in results[(plugin, docs_version)].failures
+                ],
+                "skipped": [
+                    [str(s.source_file), s.index] for s in results[(plugin, docs_version)].skipped
+                ],
+            }
+            for plugin, docs_version in job_snippets
+        ],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+def _read_shard_results(paths: list[Path]) -> tuple[
+    list[LanguagePlugin],
+    dict[str, str],
+    Optional[set[Path]],
+    dict[tuple, list[Snippet]],
+    dict[tuple, CompileResult],
+]:
+    """Combine shard result files. Exits with an error unless they are the
+    complete set of shards of one partition."""
+    shards = []
+    for path in paths:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            print(f"ERROR: cannot read shard results {path}: {e}")
+            sys.exit(1)
+        if data.get("format") != _SHARD_FORMAT:
+            print(f"ERROR: {path} was written by an incompatible version of this script.")
+            sys.exit(1)
+        shards.append(data)
+    if not shards:
+        print(f"ERROR: no shard results found in {SHARD_RESULTS_DIR.relative_to(REPO_ROOT)}.")
+        sys.exit(1)
+
+    first = shards[0]
+    for data in shards[1:]:
+        for field in ("shards", "partition", "languages", "versions", "scope"):
+            if data[field] != first[field]:
+                print(
+                    f"ERROR: shards disagree on '{field}'. All shards must run with the "
+                    "same arguments, docs and snippet cache."
+                )
+                sys.exit(1)
+    indices = sorted(data["shard"] for data in shards)
+    if indices != list(range(1, first["shards"] + 1)):
+        print(
+            f"ERROR: expected shards 1-{first['shards']} exactly once, "
+            f"got {', '.join(map(str, indices))}."
+        )
+        sys.exit(1)
+
+    plugins = [LANGUAGE_PLUGINS[lang] for lang in first["languages"]]
+    scope = {Path(p) for p in first["scope"]} if first["scope"] is not None else None
+    job_snippets: dict[tuple, list[Snippet]] = {
+        (plugin, v): [] for v in first["versions"] for plugin in plugins
+    }
+    results: dict[tuple, CompileResult] = {job: CompileResult(failures=[]) for job in job_snippets}
+    for data in shards:
+        for job_data in data["jobs"]:
+            job = (LANGUAGE_PLUGINS[job_data["language"]], job_data["docs_version"])
+            by_location: dict[tuple, Snippet] = {}
+            for file, index, content, fence in job_data["snippets"]:
+                snippet = Snippet(
+                    source_file=Path(file), index=index, content=content, fence=fence
+                )
+                by_location[(file, index)] = snippet
+                job_snippets[job].append(snippet)
+            results[job].failures.extend(
+                Failure(snippet=by_location[(file, index)], errors=errors)
+                for file, index, errors in job_data["failures"]
+            )
+            results[job].skipped.extend(
+                by_location[(file, index)] for file, index in job_data["skipped"]
+            )
+    return plugins, first["versions"], scope, job_snippets, results
+
+
+def _merge_main(argv: list[str]):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="validate-code-snippets.py merge",
+        description=(
+            "Combine the result files of a --shard K/N run into one report, "
+            "baseline comparison and exit code."
+        ),
+    )
+    parser.add_argument(
+        "files",
+        nargs="*",
+        type=Path,
+        help=(
+            "Shard result files (default: every file in "
+            f"{SHARD_RESULTS_DIR.relative_to(REPO_ROOT)})."
+        ),
+    )
+    parser.add_argument(
+        "--baseline",
+        action="store_true",
+        help="Write the baseline from the merged results instead of applying it.",
+    )
+    args = parser.parse_args(argv)
+    files = args.files or sorted(SHARD_RESULTS_DIR.glob("shard-*-of-*.json"))
+    plugins, sdk_versions, scope, job_snippets, results = _read_shard_results(files)
+    if args.baseline and scope is not None:
+        parser.error("--baseline needs the full snippet set; the shards ran with --changed-since")
+    print(f"Merged {len(files)} shard result file(s).")
+    sys.exit(
+        _finish(plugins, list(sdk_versions), sdk_versions, job_snippets, results, scope, args.baseline)
+    )
+
+
 # =============================================================================
 # Entry point
 # =============================================================================
 
 
+def _extract_and_generate(
+    plugins: list[LanguagePlugin], docs_versions: list[str]
+) -> dict[str, list[Snippet]]:
+    """Extract every plugin's snippets in one pass over the docs tree, feeding
+    each plugin's generate_sources() on its own thread as snippets stream in."""
+    snippets: dict[str, list[Snippet]] = {p.value: [] for p in plugins}
+    queues = {p.value: queue.SimpleQueue() for p in plugins}
+
+    def generate(plugin: LanguagePlugin):
+        # Spans the whole stream, so it includes waiting for extraction.
+        with timing.span("generate_sources", language=plugin.name):
+            plugin.generate_sources(_unique(plugin, iter(queues[plugin.value].get, None)))
+
+    with ThreadPoolExecutor(max_workers=len(plugins)) as pool:
+        generators = [pool.submit(generate, p) for p in plugins]
+        try:
+            fences = {p.value: _fence_for(p) for p in plugins}
+            for lang, snippet in _iter_snippets(fences, docs_versions):
+                snippets[lang].append(snippet)
+                queues[lang].put(snippet)
+        finally:
+            for q in queues.values():
+                q.put(None)
+        for future in generators:
+            future.result()
+    return snippets
+
+
+def _extract_scoped(
+    plugins: list[LanguagePlugin], docs_versions: list[str], changed: set[Path]
+) -> tuple[dict[str, list[Snippet]], set[Path]]:
+    """Extract every plugin's snippets and keep those of the repo-relative
+    files in *changed* or importing one of them. Returns (snippets, scope)."""
+    # The affected set needs the complete import graph, so extract first.
+    # Sources are still generated for every snippet: generation only
+    # rewrites changed files, and a partial set would delete the others.
+    with timing.span("extract"):
+        snippets = _collect_snippets({p.value: _fence_for(p) for p in plugins}, docs_versions)
+    scope = _affected_files(changed)
+    for plugin in plugins:
+        in_scope = [s for s in snippets[plugin.value] if s.source_file in scope]
+        # In-scope occurrences first, so they are the ones compiled.
+        with timing.span("generate_sources", language=plugin.name):
+            plugin.generate_sources(_unique(plugin, in_scope + snippets[plugin.value]))
+        snippets[plugin.value] = in_scope
+    return snippets, scope
+
+
+def _compile_jobs(
+    job_snippets: dict[tuple, list[Snippet]],
+    sdk_versions: dict[str, str],
+    edit_times: Optional[Callable[[set[Path]], dict[Path, float]]],
+    baselines: dict[LanguagePlugin, set],
+    stop: Optional[threading.Event],
+) -> dict[tuple, CompileResult]:
+    """Run every (plugin, docs version) compile job concurrently. Called
+    inside compile_server.session_scope(), so the jobs share one compiler JVM."""
+
+    def compile_job(plugin: LanguagePlugin, docs_version: str) -> CompileResult:
+        with timing.span("compile job", language=plugin.name, sdk_version=sdk_versions[docs_version]):
+            return _run_compile(
+                plugin,
+                job_snippets[(plugin, docs_version)],
+                sdk_versions[docs_version],
+                edit_times,
+                baselines[plugin],
+                stop,
+            )
+
+    with timing.span("compile"), ThreadPoolExecutor(max_workers=len(job_snippets)) as pool:
+        futures = {job: pool.submit(compile_job, *job) for job in job_snippets}
+        return {job: future.result() for job, future in futures.items()}
+
+
+def _watch_round(
+    plugins: list[LanguagePlugin],
+    docs_versions: list[str],
+    sdk_versions: dict[str, str],
+    baselines: dict[LanguagePlugin, set],
+    fail_fast: bool,
+    changed: Optional[set[Path]],
+) -> tuple[int, int]:
+    """Validate the files in *changed* (absolute paths, or None for every
+    file) and those importing them. Returns (exit code, snippets checked)."""
+    if changed is None:
+        print("\nLost track of file changes; checking every file…")
+        changed = {Path(key) for key in _load_extraction_index({})}
+    else:
+        changed = {path.relative_to(REPO_ROOT) for path in changed}
+        print(f"\nChanged: {', '.join(sorted(str(p) for p in changed))}")
+    snippets, scope = _extract_scoped(plugins, docs_versions, changed)
+    # Report only the languages and docs versions the changes touched.
+    in_scope = [s for lang_snippets in snippets.values() for s in lang_snippets]
+    round_plugins = [p for p in plugins if snippets[p.value]]
+    round_versions = [
+        v for v in docs_versions
+        if any(_docs_version(s.source_file) == v for s in in_scope)
+    ]
+    job_snippets = {
+        (plugin, v): [s for s in snippets[plugin.value] if _docs_version(s.source_file) == v]
+        for v in round_versions
+        for plugin in round_plugins
+    }
+    if not job_snippets:
+        print("  No snippets in the changed files or the files importing them.")
+        return 0, 0
+    stop = threading.Event() if fail_fast else None
+    results = _compile_jobs(job_snippets, sdk_versions, None, baselines, stop)
+    exit_code = _finish(
+        round_plugins, round_versions, sdk_versions, job_snippets, results, scope, False
+    )
+    return exit_code, len(in_scope)
+
+
+def _watch(
+    plugins: list[LanguagePlugin],
+    docs_versions: list[str],
+    sdk_versions: dict[str, str],
+    baselines: dict[LanguagePlugin, set],
+    fail_fast: bool,
+    exit_code: int,
+) -> int:
+    """Validate again each time docs files are saved, until interrupted.
+
+    Only the saved files and the files importing them are re-extracted and
+    reported; everything else is served from the extraction index and the
+    snippet cache, and the compilers (JVM, language service, analysis
+    server) stay warm between rounds. Returns the exit code of the last round."""
+    roots = [_docs_root(v) for v in docs_versions]
+    try:
+        watcher = Watcher(roots, (".md", ".mdx"))
+    except OSError as e:
+        print(f"ERROR: cannot watch the docs: {e}")
+        return 1
+    print(
+        f"\nWatching {', '.join(str(r.relative_to(REPO_ROOT)) for r in roots)} "
+        "for changes (Ctrl+C to stop)…"
+    )
+    try:
+        while True:
+            changed = watcher.changes()
+            started = timing.now()
+            # The compile server may have idled out or been stopped since
+            # the last round; reconnect or relaunch it if so.
+            compile_server.refresh_session()
+            try:
+                with timing.span("watch round"):
+                    exit_code, checked = _watch_round(
+                        plugins, docs_versions, sdk_versions, baselines, fail_fast, changed
+                    )
+            except (Exception, SystemExit) as e:
+                # Keep watching: the next save may well fix it.
+                if not isinstance(e, SystemExit):
+                    print(f"\nERROR: {type(e).__name__}: {e}")
+                print("\nValidation round failed. Watching for changes…")
+                exit_code = 1
+            else:
+                print(
+                    f"\nChecked {checked} snippet(s) in {timing.now() - started:.1f}s. "
+                    "Watching for changes…"
+                )
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    finally:
+        watcher.close()
+    return exit_code
+
+
+def _finish(
+    plugins: list[LanguagePlugin],
+    docs_versions: list[str],
+    sdk_versions: dict[str, str],
+    job_snippets: dict[tuple, list[Snippet]],
+    results: dict[tuple, CompileResult],
+    scope: Optional[set[Path]],
+    write_baseline: bool,
+) -> int:
+    """Write or apply the baselines and report every job. Returns the exit code."""
+    if write_baseline:
+        for plugin in plugins:
+            _write_baseline(
+                plugin,
+                CompileResult(
+                    failures=[f for v in docs_versions for f in results[(plugin, v)].failures]
+                ),
+                docs_versions,
+            )
+
+    jobs = [(plugin, v) for v in docs_versions for plugin in plugins]
+    returncode = 0
+    for plugin, v in jobs:
+        result, baseline_ignored = results[(plugin, v)], 0
+        if not write_baseline:
+            result, baseline_ignored = _apply_baseline(plugin, result, v, scope)
+        job_returncode = 1 if result.failures else 0
+        _report(
+            job_snippets[(plugin, v)],
+            result,
+            plugin,
+            job_returncode,
+            baseline_ignored,
+            sdk_versions[v] if len(docs_versions) > 1 else None,
+        )
+        returncode = max(returncode, job_returncode)
+
+    if len(jobs) > 1:
+        checked = "languages" if len(docs_versions) == 1 else "SDK versions"
+        print(f"\n{'=' * 60}")
+        print(f"[PASS] All {checked} passed." if returncode == 0 else f"[FAIL] Some {checked} failed.")
+    return returncode
+
+
+def _report_timings(trace: Optional[Path], summary: bool):
+    if summary:
+        timing.print_summary()
+    if trace:
+        timing.write_trace(trace)
+        print(f"Trace written to {trace}")
+
+
 def main():
     import argparse
 
+    if sys.argv[1:2] == ["merge"]:
+        _merge_main(sys.argv[2:])
+
     parser = argparse.ArgumentParser(
         description="Validate code snippets from Android SDK docs."
     )
     parser.add_argument(
         "--clean",
         action="store_true",
-        help="Remove the snippet cache before running.",
+        help=(
+            "Remove the snippet cache, extraction index, generated sources and "
+            "compiled classes before running."
+        ),
     )
     parser.add_argument(
-        "language",
-        choices=list(LANGUAGE_PLUGINS),
-        help="Language of snippets to validate.",
+        "languages",
+        nargs="+",
+        metavar="language",
+        choices=list(LANGUAGE_PLUGINS) + ["all"],
+        help=(
+            "Languages of snippets to validate (one or more of: "
+            f"{', '.join(LANGUAGE_PLUGINS)}), or 'all' for every language whose "
+            "toolchain is installed. Multiple languages share one extraction "
+            "pass and classpath export and compile concurrently."
+        ),
     )
     parser.add_argument(
         "--baseline",
@@ -292,83 +1373,259 @@ def main():
             "Commit this file to silence these failures in future runs."
         ),
     )
+    parser.add_argument(
+        "--partitioned",
+        action="store_true",
+        help=(
+            "Kotlin only: compile snippets in parallel size-balanced shards and "
+            "bisect failing shards down to the offending snippets."
+        ),
+    )
+    parser.add_argument(
+        "--check-only",
+        action="store_true",
+        help=(
+            "Only collect diagnostics: javac stops before generating bytecode "
+            "and kotlinc output goes to a scratch directory. Shares the snippet "
+            "cache with full compiles."
+        ),
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        type=Path,
+        help=(
+            "Write timing spans of every phase, compiler call and snippet to "
+            "FILE as Chrome trace-event JSON."
+        ),
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Print a table of time spent per phase and compiler call at the end of the run.",
+    )
+    parser.add_argument(
+        "--changed-since",
+        metavar="REF",
+        help=(
+            "Only validate snippets in docs files changed since the merge base "
+            "of REF and HEAD (committed, uncommitted or untracked), plus the "
+            "files that import a changed partial."
+        ),
+    )
+    parser.add_argument(
+        "--versions",
+        metavar="LIST",
+        default=CURRENT_DOCS,
+        help=(
+            "Comma-separated docs versions to validate: 'current' (docs/, against "
+            "the SDK version in docusaurus.config.ts), any version listed in "
+            "versions.json (versioned_docs/version-X/, against SDK X), or 'all'. "
+            "Versions share one compiler JVM and compile concurrently. "
+            f"Default: {CURRENT_DOCS}."
+        ),
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="K/N",
+        type=_parse_shard,
+        help=(
+            "Compile only the K-th of N balanced shards of the snippets and write "
+            f"the results to {SHARD_RESULTS_DIR.relative_to(REPO_ROOT)}/shard-K-of-N.json "
+            "instead of reporting. Combine the shards with "
+            "`validate-code-snippets.py merge`."
+        ),
+    )
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help=(
+            "Stop compiling after the first failure that is not in the baseline. "
+            "Likely failures (snippets that failed last time, recently edited "
+            "files) are compiled first."
+        ),
+    )
+    parser.add_argument(
+        "--remote-cache",
+        metavar="URL",
+        help=(
+            "Share snippet results through the remote cache at URL (see "
+            "validation/remote-cache-server.py): results missing locally are "
+            "looked up there, and newly compiled ones are uploaded if "
+            f"${remote_cache.REMOTE_CACHE_WRITE_TOKEN_ENV} is set. Default: "
+            f"${remote_cache.REMOTE_CACHE_URL_ENV}, if set. Pass '' to disable. "
+            "An unreachable cache is skipped for the rest of the run."
+        ),
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help=(
+            "After the run, keep watching the docs (Linux only). Each time "
+            ".md/.mdx files are saved, re-extract them and the files importing "
+            "them, and recompile just their changed snippets on the compilers "
+            "kept warm from the first run."
+        ),
+    )
     args = parser.parse_args()
+    if args.watch and args.baseline:
+        parser.error("--baseline runs once; drop --watch")
+    if args.watch and args.shard:
+        parser.error("--shard runs once; drop --watch")
+    if args.fail_fast and args.baseline:
+        parser.error("--baseline needs every snippet compiled; drop --fail-fast")
+    if args.changed_since and args.baseline:
+        parser.error("--baseline needs the full snippet set; drop --changed-since")
+    if args.shard and args.baseline:
+        parser.error("--baseline needs the full snippet set; use `merge --baseline`")
+
+    available_versions = [CURRENT_DOCS] + _read_docs_versions()
+    requested_versions = [v.strip() for v in args.versions.split(",") if v.strip()]
+    if "all" in requested_versions:
+        docs_versions = available_versions
+    else:
+        docs_versions = list(dict.fromkeys(requested_versions))
+    unknown = [v for v in docs_versions if v not in available_versions]
+    if unknown or not docs_versions:
+        parser.error(
+            f"unknown docs version(s): {', '.join(unknown) or repr(args.versions)} "
+            f"(choose from {', '.join(available_versions)}, all)"
+        )
 
-    plugin = LANGUAGE_PLUGINS[args.language]
+    if args.trace or args.timings:
+        # At exit, so runs that stop early with an error are covered too.
+        atexit.register(_report_timings, args.trace, args.timings)
+
+    if "all" in args.languages:
+        plugins = list(LANGUAGE_PLUGINS.values())
+    else:
+        plugins = [LANGUAGE_PLUGINS[lang] for lang in dict.fromkeys(args.languages)]
+    if args.partitioned:
+        if kotlin_plugin not in plugins:
+            parser.error("--partitioned is only supported for kotlin")
+        kotlin_plugin.partitioned = True
+    for plugin in plugins:
+        plugin.check_only = args.check_only
+
+    # Clean and baseline runs must compile every snippet themselves, so they
+    # only upload to the remote cache.
+    remote = remote_cache.configure(args.remote_cache, lookups=not (args.clean or args.baseline))
+    if remote is not None:
+        mode = ""
+        if not remote.uploads:
+            mode = " (read-only)"
+        elif not remote.lookups:
+            mode = " (upload only)"
+        print(f"Remote cache: {remote.url}{mode}")
 
     if args.clean or args.baseline:
-        _cache_file_for(plugin).unlink(missing_ok=True)
+        for plugin in plugins:
+            delete_cache(_cache_file_for(plugin))
+            plugin.clean()
+        EXTRACTION_INDEX_FILE.unlink(missing_ok=True)
         print("Cleaned snippet cache.")
 
-    sdk_version = _read_sdk_version()
-    print(f"SDK version: {sdk_version}")
-
-    print(f"Extracting {plugin.name} snippets from docs…")
-    fence = re.compile(rf"```{plugin.value}\s*\n(.*?)```", re.DOTALL)
-    snippets = _collect_snippets(fence)
-    n_files = len({s.source_file for s in snippets})
-    print(f"  {len(snippets)} snippets across {n_files} files")
+    sdk_versions = {
+        v: _read_sdk_version() if v == CURRENT_DOCS else v for v in docs_versions
+    }
+    if len(docs_versions) == 1:
+        print(f"SDK version: {sdk_versions[docs_versions[0]]}")
+    else:
+        print("SDK versions: " + ", ".join(
+            f"{sdk_versions[v]} ({_docs_root(v).relative_to(REPO_ROOT)})" for v in docs_versions
+        ))
+
+    # `all` covers every language whose toolchain this machine has; a
+    # language asked for by name must be available.
+    available: list[LanguagePlugin] = []
+    for plugin in plugins:
+        with timing.span("prepare", language=plugin.name):
+            try:
+                plugin.prepare()
+            except ToolchainUnavailable as e:
+                if "all" not in args.languages or plugin.value in args.languages:
+                    print(f"ERROR: {e}")
+                    sys.exit(1)
+                print(f"Skipping {plugin.name}: {e}")
+                continue
+        available.append(plugin)
+    plugins = available
+
+    names = ", ".join(p.name for p in plugins)
+    print(f"Extracting {names} snippets from docs and generating source files…")
+    scope: Optional[set[Path]] = None
+    if args.changed_since:
+        snippets, scope = _extract_scoped(plugins, docs_versions, _changed_files(args.changed_since))
+        print(f"  {len(scope)} file(s) changed since {args.changed_since} or importing one")
+    else:
+        with timing.span("extract and generate"):
+            snippets = _extract_and_generate(plugins, docs_versions)
+    for plugin in plugins:
+        lang_snippets = snippets[plugin.value]
+        n_files = len({s.source_file for s in lang_snippets})
+        print(f"  {plugin.name}: {len(lang_snippets)} snippets across {n_files} files")
+
+    # One compile job per (language, docs version), all on one pool. Classpaths
+    # are resolved once per SDK version and shared by its languages, and every
+    # job compiles on the same warm compiler JVM.
+    jobs = [(plugin, v) for v in docs_versions for plugin in plugins]
+    job_snippets = {
+        (plugin, v): [s for s in snippets[plugin.value] if _docs_version(s.source_file) == v]
+        for plugin, v in jobs
+    }
+    if args.shard:
+        shard, n_shards = args.shard
+        assignment, partition = _partition(job_snippets, sdk_versions, n_shards)
+        job_snippets = {
+            (plugin, v): [
+                s for s in lang_snippets
+                if assignment[_shard_group(plugin, v, s)] == shard - 1
+            ]
+            for (plugin, v), lang_snippets in job_snippets.items()
+        }
+        n_shard_snippets = sum(len(lang_snippets) for lang_snippets in job_snippets.values())
+        print(f"Shard {shard}/{n_shards}: {n_shard_snippets} snippets")
 
-    print(f"Generating {plugin.name} source files…")
+    def edit_times(files: set[Path]) -> dict[Path, float]:
+        return _edit_times(files, docs_versions)
 
-    ensure_gradle_wrapper()
-    plugin.clean()
-    plugin.generate_sources(snippets)
+    baselines = {
+        plugin: _load_baseline(BASELINES_DIR / f"baseline-{plugin.value}.json")
+        for plugin in plugins
+    }
+    stop = threading.Event() if args.fail_fast else None
 
     print("Compiling…")
-    result = _run_compile(plugin, snippets, sdk_version)
-
-    if args.baseline:
-        baseline_file = BASELINES_DIR / f"baseline-{plugin.value}.json"
-        if result.failures:
-            failed_entries = [
-                {
-                    "hash": failure.snippet.hash,
-                    "file": str(failure.snippet.source_file),
-                    "snippet": failure.snippet.index,
-                }
-                for failure in result.failures
-            ]
-            _save_baseline(failed_entries, baseline_file)
+    # With --watch, held until the watch loop ends, so every recompile reuses
+    # the compiler JVM of the first run.
+    with compile_server.session_scope():
+        try:
+            results = _compile_jobs(job_snippets, sdk_versions, edit_times, baselines, stop)
+        except RuntimeError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        if stop is not None and stop.is_set():
+            print("Stopped at the first new failure (--fail-fast).")
+
+        if args.shard:
+            results_file = _shard_results_file(*args.shard)
+            _write_shard_results(
+                results_file, args.shard, partition, plugins, sdk_versions, scope, job_snippets, results
+            )
+            n_failed = sum(len(result.failures) for result in results.values())
             print(
-                f"Baseline saved: {len(failed_entries)} failing snippet(s) → "
-                f"{baseline_file.relative_to(REPO_ROOT)}"
+                f"Shard {args.shard[0]}/{args.shard[1]}: {n_failed} failure(s) before baseline → "
+                f"{results_file.relative_to(REPO_ROOT)}"
             )
-        else:
-            if baseline_file.exists():
-                baseline_file.unlink()
-                print("All snippets passed — baseline file removed.")
-            else:
-                print("All snippets passed — no baseline file generated.")
-        returncode = 1 if result.failures else 0
-        sys.exit(_report(snippets, result, plugin, returncode))
+            sys.exit(0)
 
-    # Filter out baseline failures, but report if any baseline entries are now fixed.
-    baseline = _load_baseline(BASELINES_DIR / f"baseline-{plugin.value}.json")
-    baseline_ignored = 0
-    if baseline:
-        failed_keys = {
-            (f.snippet.hash, str(f.snippet.source_file), f.snippet.index)
-            for f in result.failures
-        }
-        still_baseline = failed_keys & baseline
-        fixed_in_baseline = baseline - failed_keys
-
-        if fixed_in_baseline:
-            print(f"\n{len(fixed_in_baseline)} baseline snippet(s) now compile successfully — consider updating the baseline:")
-            for h, file, idx in sorted(fixed_in_baseline, key=lambda e: (e[1], e[2])):
-                print(f"  {file}  (snippet {idx})")
-
-        baseline_ignored = len(still_baseline)
-        result = CompileResult(
-            failures=[
-                f for f in result.failures
-                if (f.snippet.hash, str(f.snippet.source_file), f.snippet.index) not in baseline
-            ]
-        )
-
-    returncode = 1 if result.failures else 0
-    sys.exit(_report(snippets, result, plugin, returncode, baseline_ignored))
+        with timing.span("report"):
+            exit_code = _finish(
+                plugins, docs_versions, sdk_versions, job_snippets, results, scope, args.baseline
+            )
+        if args.watch:
+            exit_code = _watch(plugins, docs_versions, sdk_versions, baselines, args.fail_fast, exit_code)
+    sys.exit(exit_code)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,144 @@
+"""
+File-change notifications for --watch, through Linux inotify.
+
+inotify watches single directories, so every directory below the watched
+roots gets its own watch, and directories created later are added as they
+appear. Events are read from one non-blocking descriptor; no polling.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+from pathlib import Path
+from typing import Optional
+
+# =============================================================================
+# inotify constants (linux/inotify.h)
+# =============================================================================
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+# Saves show up as IN_CLOSE_WRITE, or as IN_MOVED_TO for editors that write
+# a temporary file and rename it over the original.
+_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# struct inotify_event: wd, mask, cookie, len, then len bytes of name
+_EVENT = struct.Struct("iIII")
+
+# =============================================================================
+# Watcher
+# =============================================================================
+
+
+class Watcher:
+    """Reports files with one of *suffixes* that are written, created,
+    moved or deleted anywhere below *roots*."""
+
+    def __init__(self, roots: list[Path], suffixes: tuple[str, ...]):
+        if not sys.platform.startswith("linux"):
+            raise OSError("file watching needs Linux inotify")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            self._raise("inotify_init1")
+        self._suffixes = suffixes
+        self._dirs: dict[int, Path] = {}
+        for root in roots:
+            self._add_tree(root)
+
+    def _raise(self, call: str, path: Optional[Path] = None):
+        code = ctypes.get_errno()
+        message = f"{call} failed: {os.strerror(code)}"
+        if code == errno.ENOSPC:
+            message += " (raise the fs.inotify.max_user_watches sysctl)"
+        raise OSError(code, message, str(path) if path else None)
+
+    def _add(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _MASK)
+        if wd < 0:
+            if ctypes.get_errno() == errno.ENOENT:
+                return  # removed again before the watch was added
+            self._raise("inotify_add_watch", directory)
+        self._dirs[wd] = directory
+
+    def _add_tree(self, root: Path) -> list[Path]:
+        """Watch *root* and every directory below it. Returns the matching
+        files already in it, which a caller that just saw *root* appear has
+        not been told about."""
+        if not root.is_dir():
+            return []
+        self._add(root)
+        files: list[Path] = []
+        for path in root.rglob("*"):
+            if path.is_dir():
+                self._add(path)
+            elif path.suffix in self._suffixes:
+                files.append(path)
+        return files
+
+    def _read(self) -> Optional[set[Path]]:
+        """Drain the pending events. Returns the changed files, or None if
+        the kernel queue overflowed and events were lost."""
+        changed: set[Path] = set()
+        overflowed = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+                offset += _EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    overflowed = True
+                    continue
+                if mask & IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                    continue
+                directory = self._dirs.get(wd)
+                if directory is None:
+                    continue
+                path = directory / os.fsdecode(name)
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        changed.update(self._add_tree(path))
+                elif path.suffix in self._suffixes:
+                    changed.add(path)
+        return None if overflowed else changed
+
+    def changes(self, settle: float = 0.1) -> Optional[set[Path]]:
+        """Block until a watched file changes, then keep collecting changes
+        until none arrives for *settle* seconds, so that one save (or a
+        burst of them, like a git checkout) is reported once.
+
+        Returns the changed files, or None if events were lost and any file
+        may have changed."""
+        changed: Optional[set[Path]] = set()
+        timeout: Optional[float] = None
+        while True:
+            ready, _, _ = select.select([self._fd], [], [], timeout)
+            if not ready:
+                return changed
+            batch = self._read()
+            if batch is None or changed is None:
+                changed = None
+            else:
+                changed |= batch
+            if changed is None or changed:
+                timeout = settle
+
+    def close(self) -> None:
+        os.close(self._fd)